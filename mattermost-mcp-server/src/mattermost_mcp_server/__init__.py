@@ -1,9 +1,16 @@
 from . import server
+import argparse
 import asyncio
 
 def main():
     """Main entry point for the package."""
-    asyncio.run(server.main())
+    parser = argparse.ArgumentParser(description="Mattermost MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=server.MATTERMOST_MCP_TRANSPORT,
+                        help="stdio for one client, http (Streamable HTTP and SSE) for many")
+    parser.add_argument("--host", default=server.MATTERMOST_MCP_HOST, help="Host to listen on (http)")
+    parser.add_argument("--port", type=int, default=server.MATTERMOST_MCP_PORT, help="Port to listen on (http)")
+    args = parser.parse_args()
+    asyncio.run(server.main(args.transport, args.host, args.port))
 
 # Optionally expose other important items at package level
 __all__ = ['main', 'server']
\ No newline at end of file
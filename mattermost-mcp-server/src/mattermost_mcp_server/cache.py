@@ -0,0 +1,341 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached API object (its JSON size)"""
+    return len(json.dumps(value, default=str))
+
+
+class BoundedCache:
+    """
+    Key-value cache with per-entry TTL, LRU order and one memory cap shared
+    by all namespaces (teams, channels, posts, ...).
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, int, float]]" = OrderedDict()
+        self._on_evict: Dict[str, Callable[[str, Any], None]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def on_evict(self, namespace: str, callback: Callable[[str, Any], None]):
+        """Call callback(key, value) whenever an entry of the namespace is dropped"""
+        self._on_evict[namespace] = callback
+
+    def record(self, namespace: str, counter: str):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0})
+        stats[counter] += 1
+
+    def _drop(self, entry_key: Tuple[str, str], counter: Optional[str] = None):
+        value, size, _ = self._entries.pop(entry_key)
+        self.bytes -= size
+        if counter:
+            self.record(entry_key[0], counter)
+        callback = self._on_evict.get(entry_key[0])
+        if callback is not None:
+            callback(entry_key[1], value)
+
+    def _live(self, namespace: str, key: str):
+        """Entry of a key if it has not expired (expired entries are dropped)"""
+        entry_key = (namespace, key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry[2] <= time.monotonic():
+            self._drop(entry_key, "expirations")
+            return None
+        return entry
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        entry = self._live(namespace, key)
+        if entry is None:
+            self.record(namespace, "misses")
+            return default
+        self._entries.move_to_end((namespace, key))
+        self.record(namespace, "hits")
+        return entry[0]
+
+    def __contains__(self, entry_key: Tuple[str, str]) -> bool:
+        return self._live(*entry_key) is not None
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        entry_key = (namespace, key)
+        if entry_key in self._entries:
+            _, size, _ = self._entries.pop(entry_key)
+            self.bytes -= size
+        size = estimate_size(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        self._entries[entry_key] = (value, size, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self.bytes += size
+        while self.max_bytes and self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)), "evictions")
+
+    def pop(self, namespace: str, key: str):
+        if (namespace, key) in self._entries:
+            self._drop((namespace, key))
+
+    def clear(self):
+        for entry_key in list(self._entries):
+            self._drop(entry_key)
+
+    def stats(self) -> Dict[str, Any]:
+        entries: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
+        for (namespace, _), (_, size, _) in self._entries.items():
+            entries[namespace] = entries.get(namespace, 0) + 1
+            sizes[namespace] = sizes.get(namespace, 0) + size
+        namespaces = {}
+        for namespace in sorted(set(entries) | set(self._stats)):
+            counters = self._stats.get(namespace, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0})
+            lookups = counters["hits"] + counters["misses"]
+            namespaces[namespace] = {
+                "entries": entries.get(namespace, 0),
+                "bytes": sizes.get(namespace, 0),
+                **counters,
+                "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            }
+        hits = sum(stats["hits"] for stats in namespaces.values())
+        lookups = hits + sum(stats["misses"] for stats in namespaces.values())
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "namespaces": namespaces,
+        }
+
+
+class MattermostCache:
+    """
+    Cache of Mattermost teams, channels and posts with indexes for the
+    lookups the server does: team name -> id, (team id, channel name) -> id,
+    post id -> post, channel id -> recent posts, root post id -> thread and
+    user id -> user.
+
+    Posts are also added to (and removed from) search_index, a
+    PostSearchIndex that keeps every post seen, beyond the cache's bounds.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, window: int = 200, search_index=None):
+        self.store = BoundedCache(max_bytes, ttl)
+        self.window = window  # recent posts kept per channel
+        self.search_index = search_index
+        self._team_ids: Dict[str, str] = {}  # team name -> team id
+        self._channel_ids: Dict[Tuple[str, str], str] = {}  # (team id, channel name) -> channel id
+        # The user's teams and their channels (ids only, kept beyond the TTL: they change by events)
+        self._member_team_ids: Optional[List[str]] = None
+        self._member_channel_ids: Dict[str, List[str]] = {}  # team id -> channel ids
+        self.store.on_evict("team", self._unindex_team)
+        self.store.on_evict("channel", self._unindex_channel)
+
+    def _unindex_team(self, team_id: str, team: Dict):
+        if self._team_ids.get(team.get("name")) == team_id:
+            del self._team_ids[team.get("name")]
+
+    def _unindex_channel(self, channel_id: str, channel: Dict):
+        key = (channel.get("team_id"), channel.get("name"))
+        if self._channel_ids.get(key) == channel_id:
+            del self._channel_ids[key]
+
+    # Teams
+    def put_team(self, team: Dict):
+        self.store.put("team", team["id"], team)
+        self._team_ids[team.get("name")] = team["id"]
+
+    def team(self, team_id: str) -> Optional[Dict]:
+        return self.store.get("team", team_id)
+
+    def team_id(self, team_name: str) -> Optional[str]:
+        team_id = self._team_ids.get(team_name)
+        if team_id is None:
+            self.store.record("team", "misses")
+            return None
+        return team_id if self.team(team_id) is not None else None
+
+    def team_name(self, team_id: str, default: Optional[str] = None) -> Optional[str]:
+        team = self.team(team_id)
+        return team.get("name", default) if team else default
+
+    def set_teams(self, teams: List[Dict]):
+        """Cache the teams the user is a member of"""
+        for team in teams:
+            self.put_team(team)
+        self.store.put("team_list", "me", [team["id"] for team in teams])
+        self._member_team_ids = [team["id"] for team in teams]
+
+    def teams(self) -> Optional[List[Dict]]:
+        """The user's teams, or None if the list is not cached (completely)"""
+        return self._resolve(self.store.get("team_list", "me"), "team")
+
+    # Channels
+    def put_channel(self, channel: Dict):
+        self.store.put("channel", channel["id"], channel)
+        self._channel_ids[(channel.get("team_id"), channel.get("name"))] = channel["id"]
+
+    def channel(self, channel_id: str) -> Optional[Dict]:
+        return self.store.get("channel", channel_id)
+
+    def channel_id(self, team_id: str, channel_name: str) -> Optional[str]:
+        channel_id = self._channel_ids.get((team_id, channel_name))
+        if channel_id is None:
+            self.store.record("channel", "misses")
+            return None
+        return channel_id if self.channel(channel_id) is not None else None
+
+    def channel_name(self, channel_id: str, default: Optional[str] = None) -> Optional[str]:
+        channel = self.channel(channel_id)
+        return channel.get("name", default) if channel else default
+
+    def set_team_channels(self, team_id: str, channels: List[Dict]):
+        """Cache the channels of a team the user is a member of"""
+        for channel in channels:
+            self.put_channel(channel)
+        self.store.put("team_channels", team_id, [channel["id"] for channel in channels])
+        self._member_channel_ids[team_id] = [channel["id"] for channel in channels]
+
+    def add_team_channel(self, channel: Dict):
+        """Add a new channel to its team's cached channels, if they are cached"""
+        self.put_channel(channel)
+        channel_ids = self.store.get("team_channels", channel.get("team_id"))
+        if channel_ids is not None and channel["id"] not in channel_ids:
+            self.store.put("team_channels", channel.get("team_id"), channel_ids + [channel["id"]])
+        channel_ids = self._member_channel_ids.get(channel.get("team_id"))
+        if channel_ids is not None and channel["id"] not in channel_ids:
+            channel_ids.append(channel["id"])
+
+    def team_channels(self, team_id: str) -> Optional[List[Dict]]:
+        """The user's channels in a team, or None if the list is not cached (completely)"""
+        return self._resolve(self.store.get("team_channels", team_id), "channel")
+
+    def member_channel_ids(self) -> Optional[List[str]]:
+        """IDs of the channels in all of the user's teams, or None if any list has not been fetched"""
+        if self._member_team_ids is None:
+            return None
+        channel_ids = []
+        for team_id in self._member_team_ids:
+            if team_id not in self._member_channel_ids:
+                return None
+            channel_ids.extend(self._member_channel_ids[team_id])
+        return channel_ids
+
+    # Posts
+    def put_post(self, post: Dict):
+        self.store.put("post", post["id"], post)
+        if self.search_index is not None:
+            self.search_index.add_posts([post])
+
+    def post(self, post_id: str) -> Optional[Dict]:
+        return self.store.get("post", post_id)
+
+    def merge_channel_posts(self, channel_id: str, posts: List[Dict], extend: bool = False):
+        """
+        Merge a batch of fetched posts into the cache; deleted posts (delete_at set) are removed.
+
+        With extend the batch is contiguous with the channel's cached window of
+        recent posts (or starts it), and is merged into it keeping create_at order.
+        """
+        for post in posts:
+            if post.get("delete_at"):
+                self.remove_post(post)
+            else:
+                self.store.put("post", post["id"], post)
+        if self.search_index is not None:
+            self.search_index.add_posts(post for post in posts if not post.get("delete_at"))
+        if not extend:
+            return
+        window = {post["id"]: post for post in self.channel_posts(channel_id) or []}
+        for post in posts:
+            if post.get("delete_at"):
+                window.pop(post["id"], None)
+            else:
+                window[post["id"]] = post
+        ordered = sorted(window.values(), key=lambda post: post.get("create_at", 0))
+        self.store.put("channel_posts", channel_id, [post["id"] for post in ordered[-self.window:]])
+
+    def add_channel_post(self, channel_id: str, post: Dict):
+        """Append a new post to a channel's cached posts, if they are cached"""
+        self.put_post(post)
+        post_ids = self.store.get("channel_posts", channel_id)
+        if post_ids is not None and post["id"] not in post_ids:
+            self.store.put("channel_posts", channel_id, (post_ids + [post["id"]])[-self.window:])
+
+    def remove_post(self, post: Dict):
+        """Drop a deleted post from the post index, its channel's cached posts and its cached thread"""
+        self.store.pop("post", post["id"])
+        if self.search_index is not None:
+            self.search_index.remove_post(post["id"])
+        post_ids = self.store.get("channel_posts", post.get("channel_id"))
+        if post_ids is not None and post["id"] in post_ids:
+            self.store.put("channel_posts", post.get("channel_id"), [post_id for post_id in post_ids if post_id != post["id"]])
+        self.store.pop("thread", post["id"])
+        post_ids = self.store.get("thread", post.get("root_id")) if post.get("root_id") else None
+        if post_ids is not None and post["id"] in post_ids:
+            self.store.put("thread", post["root_id"], [post_id for post_id in post_ids if post_id != post["id"]])
+
+    def channel_posts(self, channel_id: str) -> Optional[List[Dict]]:
+        """The recent posts of a channel, or None if they are not cached (completely)"""
+        return self._resolve(self.store.get("channel_posts", channel_id), "post")
+
+    # Threads
+    def set_thread(self, root_id: str, posts: List[Dict]):
+        """Cache the posts of a thread, root first and replies in create_at order"""
+        for post in posts:
+            self.store.put("post", post["id"], post)
+        if self.search_index is not None:
+            self.search_index.add_posts(posts)
+        self.store.put("thread", root_id, [post["id"] for post in posts])
+
+    def add_thread_post(self, root_id: str, post: Dict):
+        """Append a new reply to its cached thread, if the thread is cached"""
+        self.put_post(post)
+        post_ids = self.store.get("thread", root_id)
+        if post_ids is not None and post["id"] not in post_ids:
+            self.store.put("thread", root_id, post_ids + [post["id"]])
+
+    def thread(self, root_id: str) -> Optional[List[Dict]]:
+        """The posts of a thread, root first, or None if they are not cached (completely)"""
+        return self._resolve(self.store.get("thread", root_id), "post")
+
+    def set_thread_synced(self, root_id: str, synced_at: int):
+        """Remember when (milliseconds) a cached thread was last brought up to date"""
+        self.store.put("thread_synced", root_id, synced_at)
+
+    def thread_synced_at(self, root_id: str) -> Optional[int]:
+        return self.store.get("thread_synced", root_id)
+
+    # Users
+    def put_user(self, user: Dict):
+        self.store.put("user", user["id"], user)
+
+    def user(self, user_id: str) -> Optional[Dict]:
+        return self.store.get("user", user_id)
+
+    def _resolve(self, ids: Optional[List[str]], namespace: str) -> Optional[List[Dict]]:
+        """Objects of a cached id list; None if the list or any object has been evicted"""
+        if ids is None:
+            return None
+        items = []
+        for item_id in ids:
+            item = self.store.get(namespace, item_id)
+            if item is None:
+                return None
+            items.append(item)
+        return items
+
+    def clear(self):
+        """Forget everything, e.g. after updates may have been missed"""
+        self.store.clear()
+        self._member_team_ids = None
+        self._member_channel_ids.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "indexed_team_names": len(self._team_ids),
+            "indexed_channel_names": len(self._channel_ids),
+        }
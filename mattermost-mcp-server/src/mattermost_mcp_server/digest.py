@@ -0,0 +1,59 @@
+import re
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List
+
+# Words that say nothing about the topic of a day
+_STOPWORDS = {
+    "about", "after", "again", "also", "been", "before", "being", "could", "does", "doing", "from",
+    "have", "here", "just", "like", "make", "more", "much", "need", "only", "other", "over", "should",
+    "some", "than", "that", "them", "then", "there", "these", "they", "this", "those", "very", "want",
+    "were", "what", "when", "where", "which", "while", "will", "with", "would", "your",
+}
+_WORD = re.compile(r"[a-zA-Z][a-zA-Z'-]{3,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def post_day(post: Dict) -> date:
+    return datetime.fromtimestamp(post.get("create_at", 0) / 1000).date()
+
+
+def format_post(post: Dict, usernames: Dict[str, str]) -> str:
+    username = usernames.get(post.get("user_id")) or post.get("username") or "unknown"
+    create_time = datetime.fromtimestamp(post.get("create_at", 0) / 1000)
+    return f"[{create_time}] {username}: {post.get('message', '')}"
+
+
+def digest_posts(day: date, posts: List[Dict], usernames: Dict[str, str], top: int = 3) -> str:
+    """
+    Extractive digest of a day of posts: volume, most active authors, frequent
+    words and the posts that started the most discussed threads.
+    """
+    authors = Counter(usernames.get(post.get("user_id")) or post.get("username") or "unknown" for post in posts)
+    words = Counter(
+        word.lower()
+        for post in posts
+        for word in _WORD.findall(post.get("message", ""))
+        if word.lower() not in _STOPWORDS
+    )
+    replies = Counter(post["root_id"] for post in posts if post.get("root_id"))
+    by_id = {post["id"]: post for post in posts}
+
+    parts = [f"{day.isoformat()}: {len(posts)} posts"]
+    if replies:
+        parts.append(f"{len(replies)} threads")
+    parts.append("most active: " + ", ".join(f"{author} ({count})" for author, count in authors.most_common(top)))
+    if words:
+        parts.append("frequent words: " + ", ".join(word for word, _ in words.most_common(top + 2)))
+    highlights = [
+        f'"{" ".join(by_id[root_id].get("message", "").split())[:120]}" ({count} replies)'
+        for root_id, count in replies.most_common(top)
+        if root_id in by_id
+    ]
+    if highlights:
+        parts.append("most discussed: " + "; ".join(highlights))
+    return "; ".join(parts)
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceListNotifier:
+    """
+    Debounced resources/list_changed notifications.
+
+    changed() may be called after anything that could have changed the
+    resource list; within window seconds the calls are coalesced into one
+    check, which notifies each client session whose last listed (or
+    announced) set of resource URIs differs from the current one (from list_uris).
+    """
+
+    def __init__(self, list_uris: Callable[[], Awaitable[Iterable[str]]], window: float = 1.0):
+        self.list_uris = list_uris
+        self.window = window
+        self.sessions = weakref.WeakSet()
+        self.sent = 0
+        self.suppressed = 0
+        self._listed: "weakref.WeakKeyDictionary[Any, frozenset]" = weakref.WeakKeyDictionary()
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+
+    def listed(self, session, uris: Iterable[str]):
+        """Record the resource list a client has just been given"""
+        self.sessions.add(session)
+        self._listed[session] = frozenset(uris)
+
+    def changed(self, session=None):
+        """Check the resource list (once per window) and notify the clients if it changed"""
+        if session is not None:
+            self.sessions.add(session)
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        # Changes during a check (while list_uris runs) are picked up by another check
+        while self._dirty:
+            await asyncio.sleep(self.window)
+            self._dirty = False
+            try:
+                uris = frozenset(await self.list_uris())
+            except Exception as e:
+                logger.warning(f"Failed to list resources for change notifications: {str(e)}")
+                continue
+            await self._notify(uris)
+
+    async def _notify(self, uris: frozenset):
+        stale = [session for session in list(self.sessions) if self._listed.get(session) != uris]
+        if not stale:
+            self.suppressed += 1
+            return
+        for session in stale:
+            self._listed[session] = uris
+            try:
+                await session.send_resource_list_changed()
+                self.sent += 1
+            except Exception as e:
+                logger.warning(f"Failed to notify a client about changed resources: {str(e)}")
+                self.sessions.discard(session)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,190 @@
+import re
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS post (
+    rowid INTEGER PRIMARY KEY,
+    post_id TEXT UNIQUE NOT NULL,
+    channel_id TEXT,
+    user_id TEXT,
+    username TEXT,
+    create_at INTEGER,
+    message TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(message, content='post', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS post_ai AFTER INSERT ON post BEGIN
+    INSERT INTO post_fts(rowid, message) VALUES (new.rowid, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS post_ad AFTER DELETE ON post BEGIN
+    INSERT INTO post_fts(post_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+END;
+CREATE TRIGGER IF NOT EXISTS post_au AFTER UPDATE ON post BEGIN
+    INSERT INTO post_fts(post_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+    INSERT INTO post_fts(rowid, message) VALUES (new.rowid, new.message);
+END;
+CREATE TABLE IF NOT EXISTS covered_channel (channel_id TEXT PRIMARY KEY);
+"""
+
+# Mattermost search modifiers that the local index cannot evaluate
+_MODIFIER = re.compile(r'^-|^(from|in|on|before|after|channel):', re.IGNORECASE)
+_TERM = re.compile(r'"[^"]*"|\S+')
+
+_UPSERT_POST = (
+    "INSERT INTO post (post_id, channel_id, user_id, username, create_at, message) VALUES (?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT(post_id) DO UPDATE SET message = excluded.message, username = COALESCE(excluded.username, username)"
+    " WHERE message IS NOT excluded.message OR username IS NOT COALESCE(excluded.username, username)"
+)
+
+
+def to_fts_query(terms: str, is_or_search: bool = False) -> Optional[str]:
+    """
+    Translate Mattermost search terms to an FTS5 query, or None if they use
+    modifiers (from:, in:, -excluded, ...) that only the server can evaluate.
+    """
+    parts = []
+    for term in _TERM.findall(terms):
+        if _MODIFIER.match(term):
+            return None
+        prefix = term.endswith("*")
+        text = term.strip('"').rstrip("*").replace('"', '""')
+        if not text:
+            continue
+        parts.append(f'"{text}"*' if prefix else f'"{text}"')
+    if not parts:
+        return None
+    return (" OR " if is_or_search else " ").join(parts)
+
+
+class PostSearchIndex:
+    """
+    SQLite FTS5 index over every post the server has seen.
+
+    A channel counts as covered once its whole history has been indexed; searches
+    can be answered locally while every channel in scope is covered and kept
+    current (see covers()).
+
+    Changes are queued and written in a worker thread, in order, so that large
+    batches (backfill, catch-up) do not block the event loop; search() writes
+    whatever is still queued first. Coverage is also kept in memory, so
+    covers() never touches the database.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        # Used from worker threads, one at a time
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.searches = 0
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, List[Tuple]]] = []  # (statement, parameter rows) not written yet
+        self._flush_task: Optional[asyncio.Task] = None
+        self._covered = {row[0] for row in self.db.execute("SELECT channel_id FROM covered_channel")}
+
+    @classmethod
+    def open(cls, path: str) -> Optional["PostSearchIndex"]:
+        """The index at path, or None if SQLite lacks FTS5"""
+        try:
+            return cls(path)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Local post search disabled: {str(e)}")
+            return None
+
+    def _queue(self, statement: str, rows: List[Tuple]):
+        """Queue a change; it is written by a flush task, or right away without an event loop"""
+        if not rows:
+            return
+        self._pending.append((statement, rows))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_pending()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    def _write_pending(self):
+        # Taken and written under the lock, so that changes are never reordered
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                with self.db:
+                    for statement, rows in pending:
+                        self.db.executemany(statement, rows)
+
+    async def flush(self):
+        """Write the queued changes in a worker thread"""
+        while self._pending:
+            try:
+                await asyncio.to_thread(self._write_pending)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to update the search index: {str(e)}")
+
+    def add_posts(self, posts: Iterable[Dict]):
+        self._queue(_UPSERT_POST, [
+            (post["id"], post.get("channel_id"), post.get("user_id"), post.get("username"), post.get("create_at", 0), post.get("message", ""))
+            for post in posts
+        ])
+
+    def remove_post(self, post_id: str):
+        self._queue("DELETE FROM post WHERE post_id = ?", [(post_id,)])
+
+    def mark_covered(self, channel_id: str):
+        self._covered.add(channel_id)
+        self._queue("INSERT OR IGNORE INTO covered_channel VALUES (?)", [(channel_id,)])
+
+    def reset_coverage(self, channel_ids: Optional[Iterable[str]] = None):
+        """Forget the coverage of channels (all by default), e.g. after events may have been missed"""
+        channel_ids = list(self._covered if channel_ids is None else channel_ids)
+        self._covered.difference_update(channel_ids)
+        self._queue("DELETE FROM covered_channel WHERE channel_id = ?", [(channel_id,) for channel_id in channel_ids])
+
+    def covered_channels(self) -> set:
+        return set(self._covered)
+
+    def covers(self, channel_ids: Iterable[str]) -> bool:
+        return set(channel_ids) <= self._covered
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Posts matching an FTS5 query, best BM25 match first, with highlighted snippets
+
+        Blocks while changes are written: call it in a worker thread from the event loop.
+        """
+        self.searches += 1
+        self._write_pending()
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT p.post_id, p.channel_id, p.user_id, p.username, p.create_at, p.message,"
+                " snippet(post_fts, 0, '**', '**', '...', 16), bm25(post_fts)"
+                " FROM post_fts JOIN post p ON p.rowid = post_fts.rowid"
+                " WHERE post_fts MATCH ? ORDER BY bm25(post_fts) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [
+            {
+                "id": post_id,
+                "channel_id": channel_id,
+                "user_id": user_id,
+                "username": username,
+                "create_at": create_at,
+                "message": message,
+                "snippet": snippet,
+                "score": -score,
+            }
+            for post_id, channel_id, user_id, username, create_at, message, snippet, score in rows
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            posts = self.db.execute("SELECT COUNT(*) FROM post").fetchone()[0]
+        return {
+            "posts": posts,
+            "pending_writes": sum(len(rows) for _, rows in self._pending),
+            "covered_channels": len(self._covered),
+            "searches": self.searches,
+        }
@@ -1,16 +1,25 @@
 import asyncio
+import json
 import os
 import logging
-from datetime import datetime
+import time
+import weakref
+from datetime import date, datetime, timedelta
 from typing import Dict, List
 
 import aiohttp
-from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
 from pydantic import AnyUrl
 import mcp.server.stdio
 
+from mattermost_mcp_server.cache import MattermostCache
+from mattermost_mcp_server.digest import digest_posts, estimate_tokens, format_post, post_day
+from mattermost_mcp_server.notifier import ResourceListNotifier
+from mattermost_mcp_server.search_index import PostSearchIndex, to_fts_query
+from mattermost_mcp_server import streamable_http
+from mattermost_mcp_server.websocket import MattermostWebSocket
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,6 +33,66 @@ MATTERMOST_TEAM_NAME = os.environ.get('MATTERMOST_TEAM_NAME', 'test')
 MATTERMOST_CHANNEL_NAME = os.environ.get('MATTERMOST_CHANNEL_NAME', 'MCP-Client')
 MATTERMOST_CHANNEL_ID = os.environ.get('MATTERMOST_CHANNEL_ID', 'bkciffjkfbgp9g44safgbfh1ew') 
 
+# HTTP connection pool for the Mattermost API
+# Connections in total and per host (0 = unlimited)
+MATTERMOST_HTTP_POOL_SIZE = int(os.environ.get('MATTERMOST_HTTP_POOL_SIZE', '100'))
+MATTERMOST_HTTP_POOL_PER_HOST = int(os.environ.get('MATTERMOST_HTTP_POOL_PER_HOST', '20'))
+# Seconds an idle connection is kept open for reuse
+MATTERMOST_HTTP_KEEPALIVE = float(os.environ.get('MATTERMOST_HTTP_KEEPALIVE', '60'))
+# Seconds resolved host names are cached
+MATTERMOST_DNS_CACHE_TTL = int(os.environ.get('MATTERMOST_DNS_CACHE_TTL', '300'))
+# Total seconds per API request
+MATTERMOST_HTTP_TIMEOUT = float(os.environ.get('MATTERMOST_HTTP_TIMEOUT', '30'))
+
+# Posts per request when fetching channel history (at most 200)
+MATTERMOST_POSTS_PER_PAGE = int(os.environ.get('MATTERMOST_POSTS_PER_PAGE', '100'))
+# Resources per resources/list page
+MATTERMOST_RESOURCES_PAGE_SIZE = int(os.environ.get('MATTERMOST_RESOURCES_PAGE_SIZE', '100'))
+# Concurrent Mattermost API requests when fetching for many teams or channels at once
+MATTERMOST_FETCH_CONCURRENCY = int(os.environ.get('MATTERMOST_FETCH_CONCURRENCY', '8'))
+
+# Concurrent Mattermost API requests of one batch tool call (post-messages, add-reactions, pin-messages)
+MATTERMOST_BATCH_CONCURRENCY = int(os.environ.get('MATTERMOST_BATCH_CONCURRENCY', '4'))
+
+# Seconds during which resources/list_changed notifications are coalesced into one
+MATTERMOST_RESOURCE_LIST_DEBOUNCE = float(os.environ.get('MATTERMOST_RESOURCE_LIST_DEBOUNCE', '1.0'))
+
+# Keep the cache up to date from the Mattermost websocket (posted/post_edited/post_deleted/channel_created)
+MATTERMOST_WEBSOCKET = os.environ.get('MATTERMOST_WEBSOCKET', 'true').lower() == 'true'
+
+# Cache of teams, channels and posts
+# Seconds before a cached object is fetched again
+MATTERMOST_CACHE_TTL = float(os.environ.get('MATTERMOST_CACHE_TTL', '300'))
+# Maximum total size of the cached objects in bytes (least recently used are evicted first)
+MATTERMOST_CACHE_MAX_BYTES = int(os.environ.get('MATTERMOST_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+# Recent posts cached per channel
+MATTERMOST_CACHED_POSTS_PER_CHANNEL = int(os.environ.get('MATTERMOST_CACHED_POSTS_PER_CHANNEL', '200'))
+
+# Local full-text index (SQLite FTS5) that answers search-posts while it covers every channel
+MATTERMOST_SEARCH_INDEX = os.environ.get('MATTERMOST_SEARCH_INDEX', 'true').lower() == 'true'
+# Index the history of all channels in the background (otherwise only posts the server sees are indexed)
+MATTERMOST_SEARCH_BACKFILL = os.environ.get('MATTERMOST_SEARCH_BACKFILL', 'true').lower() == 'true'
+MATTERMOST_SEARCH_BACKFILL_CONCURRENCY = int(os.environ.get('MATTERMOST_SEARCH_BACKFILL_CONCURRENCY', '2'))
+# Results returned by a local search
+MATTERMOST_SEARCH_LIMIT = int(os.environ.get('MATTERMOST_SEARCH_LIMIT', '20'))
+
+# summarize-channel: days of history and token budget of the prompt (3/4 for recent posts, the rest for daily digests)
+MATTERMOST_SUMMARY_DAYS = int(os.environ.get('MATTERMOST_SUMMARY_DAYS', '7'))
+MATTERMOST_SUMMARY_MAX_TOKENS = int(os.environ.get('MATTERMOST_SUMMARY_MAX_TOKENS', '4000'))
+# Digest the past days of a channel in the background after this many new posts (0 = never)
+MATTERMOST_DIGEST_AFTER_POSTS = int(os.environ.get('MATTERMOST_DIGEST_AFTER_POSTS', '100'))
+
+# How clients connect: stdio (one client per process) or http (Streamable HTTP and SSE, many clients share the server)
+MATTERMOST_MCP_TRANSPORT = os.environ.get('MATTERMOST_MCP_TRANSPORT', 'stdio')
+MATTERMOST_MCP_HOST = os.environ.get('MATTERMOST_MCP_HOST', '127.0.0.1')
+MATTERMOST_MCP_PORT = int(os.environ.get('MATTERMOST_MCP_PORT', '8000'))
+# Over http: client sessions at once (0 = unlimited), and requests handled at once per session and in total
+MATTERMOST_MCP_MAX_SESSIONS = int(os.environ.get('MATTERMOST_MCP_MAX_SESSIONS', '100'))
+MATTERMOST_MCP_SESSION_CONCURRENCY = int(os.environ.get('MATTERMOST_MCP_SESSION_CONCURRENCY', '4'))
+MATTERMOST_MCP_MAX_CONCURRENCY = int(os.environ.get('MATTERMOST_MCP_MAX_CONCURRENCY', '32'))
+# Over http: seconds without requests after which a client session is terminated (0 = never)
+MATTERMOST_MCP_SESSION_IDLE_TIMEOUT = float(os.environ.get('MATTERMOST_MCP_SESSION_IDLE_TIMEOUT', '1800'))
+
 class config:
     LOG_LEVEL = "DEBUG"
 
@@ -34,14 +103,158 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Store messages and channels as in-memory cache
-channels_cache: Dict[str, Dict] = {}
-team_cache: Dict[str, Dict] = {}
-posts_cache: Dict[str, List[Dict]] = {}
-channel_id_to_name: Dict[str, str] = {}
-team_id_to_name: Dict[str, str] = {}
+# Full-text index of all posts seen (None if disabled or SQLite lacks FTS5)
+search_index = PostSearchIndex.open(":memory:") if MATTERMOST_SEARCH_INDEX else None
+search_backfill_task: asyncio.Task | None = None
+
+# Teams, channels and posts cached in memory, indexed by id and name
+cache = MattermostCache(
+    max_bytes=MATTERMOST_CACHE_MAX_BYTES,
+    ttl=MATTERMOST_CACHE_TTL,
+    window=MATTERMOST_CACHED_POSTS_PER_CHANNEL,
+    search_index=search_index,
+)
+
+# Digests of past days only change when old posts are edited or deleted
+DIGEST_TTL = 24 * 60 * 60
+# Channel ID -> background digest task, and posts seen since the channel was last digested
+digest_tasks: Dict[str, asyncio.Task] = {}
+digest_post_counts: Dict[str, int] = {}
+
+# Websocket that keeps the cache current (see main)
+websocket: MattermostWebSocket | None = None
+# Fetches the changes missed while the websocket was disconnected (see handle_websocket_reconnect)
+websocket_catch_up_task: asyncio.Task | None = None
+websocket_catch_up_since: int | None = None
+# Seconds the catch-up starts before the last websocket message, for clock skew with the Mattermost server
+WEBSOCKET_CATCH_UP_MARGIN = 60
+
+CACHE_STATS_URI = "mattermost://server/cache"
+
+# Resource URI -> MCP sessions subscribed to it
+resource_subscriptions: Dict[str, weakref.WeakSet] = {}
+
+class MattermostServer(Server):
+    """Server that counts its running client sessions and announces the capabilities it serves."""
+
+    active_sessions = 0
+
+    def create_initialization_options(self, notification_options=None, experimental_capabilities=None):
+        options = super().create_initialization_options(
+            notification_options or NotificationOptions(resources_changed=True), experimental_capabilities
+        )
+        # Subscriptions are served from websocket events
+        options.capabilities.resources.subscribe = MATTERMOST_WEBSOCKET
+        return options
+
+    async def run(self, *args, **kwargs):
+        self.active_sessions += 1
+        try:
+            return await super().run(*args, **kwargs)
+        finally:
+            self.active_sessions -= 1
+
+server = MattermostServer("mattermost-mcp-server", version="0.1.0")
 
-server = Server("mattermost-mcp-server")
+# Shared HTTP session (see open_http_session)
+http_session: aiohttp.ClientSession | None = None
+http_pool_counters: Dict[str, int] = {}
+# Connections handed out by the pool and release times of the idle ones (newest last), from the trace hooks
+http_pool_in_use = 0
+http_pool_idle: List[float] = []
+
+HTTP_POOL_STATS_URI = "mattermost://server/http-pool"
+
+def _http_trace_config():
+    """
+    Count requests, new and reused connections and DNS cache hits of the
+    shared session, and track the connections in use and idle in the pool
+    """
+    trace_config = aiohttp.TraceConfig()
+
+    def count(counter):
+        async def _on_event(session, context, params):
+            http_pool_counters[counter] = http_pool_counters.get(counter, 0) + 1
+        return _on_event
+
+    async def _on_connection(session, context, params):
+        global http_pool_in_use
+        context.connections = getattr(context, "connections", 0) + 1
+        http_pool_in_use += 1
+
+    async def _on_reuse(session, context, params):
+        # The pool hands out the most recently released connection
+        if http_pool_idle:
+            http_pool_idle.pop()
+        await _on_connection(session, context, params)
+
+    async def _on_request_done(session, context, params):
+        global http_pool_in_use
+        released = getattr(context, "connections", 0)
+        context.connections = 0
+        http_pool_in_use -= released
+        http_pool_idle.extend([time.monotonic()] * released)
+
+    trace_config.on_request_start.append(count("requests"))
+    trace_config.on_connection_create_end.append(count("connections_created"))
+    trace_config.on_connection_create_end.append(_on_connection)
+    trace_config.on_connection_reuseconn.append(count("connections_reused"))
+    trace_config.on_connection_reuseconn.append(_on_reuse)
+    trace_config.on_request_end.append(_on_request_done)
+    trace_config.on_request_exception.append(_on_request_done)
+    trace_config.on_dns_cache_hit.append(count("dns_cache_hits"))
+    trace_config.on_dns_cache_miss.append(count("dns_cache_misses"))
+    return trace_config
+
+async def open_http_session():
+    """Create the HTTP session that all Mattermost API calls share"""
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=MATTERMOST_HTTP_POOL_SIZE,
+            limit_per_host=MATTERMOST_HTTP_POOL_PER_HOST,
+            keepalive_timeout=MATTERMOST_HTTP_KEEPALIVE,
+            ttl_dns_cache=MATTERMOST_DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=MATTERMOST_HTTP_TIMEOUT),
+            trace_configs=[_http_trace_config()],
+        )
+    return http_session
+
+async def get_http_session():
+    """Return the shared HTTP session, creating it if main() has not"""
+    if http_session is None or http_session.closed:
+        return await open_http_session()
+    return http_session
+
+async def close_http_session():
+    """Close the shared HTTP session and its pooled connections"""
+    global http_session
+    if http_session is not None:
+        logger.info(f"HTTP pool stats: {http_pool_stats()}")
+        await http_session.close()
+        http_session = None
+        http_pool_idle.clear()
+
+def http_pool_stats():
+    """Connection pool statistics of the shared HTTP session"""
+    stats = dict.fromkeys(["requests", "connections_created", "connections_reused", "dns_cache_hits", "dns_cache_misses"], 0)
+    stats.update(http_pool_counters)
+    connections = stats["connections_created"] + stats["connections_reused"]
+    stats["reuse_rate"] = stats["connections_reused"] / connections if connections else 0.0
+    connector = http_session.connector if http_session is not None and not http_session.closed else None
+    if connector is not None:
+        stats["limit"] = connector.limit
+        stats["limit_per_host"] = connector.limit_per_host
+        # Released connections are closed after the keep-alive timeout; closes by the server are not seen
+        expired = time.monotonic() - MATTERMOST_HTTP_KEEPALIVE
+        http_pool_idle[:] = [released_at for released_at in http_pool_idle if released_at > expired]
+        stats["in_use"] = http_pool_in_use
+        stats["idle"] = len(http_pool_idle)
+    return stats
 
 # Mattermost API helper functions
 async def get_mattermost_headers():
@@ -55,97 +268,539 @@ async def get_mattermost_base_url():
     """Return base URL for Mattermost API"""
     return f"{MATTERMOST_SCHEME}://{MATTERMOST_URL}:{MATTERMOST_PORT}/api/v4"
 
+async def get_mattermost_websocket_url():
+    """Return URL of the Mattermost websocket API"""
+    scheme = "wss" if MATTERMOST_SCHEME == "https" else "ws"
+    return f"{scheme}://{MATTERMOST_URL}:{MATTERMOST_PORT}/api/v4/websocket"
+
 async def fetch_team_id(team_name: str):
     """Fetch team ID from team name"""
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
     # Check cache first
-    for team_id, team in team_cache.items():
-        if team.get("name") == team_name:
-            return team_id
+    team_id = cache.team_id(team_name)
+    if team_id:
+        return team_id
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/teams/name/{team_name}"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                team_data = await response.json()
-                team_id = team_data.get("id")
-                team_cache[team_id] = team_data
-                team_id_to_name[team_id] = team_name
-                return team_id
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get team ID. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/teams/name/{team_name}"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            team_data = await response.json()
+            cache.put_team(team_data)
+            return team_data.get("id")
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get team ID. Status: {response.status}, Error: {error}")
 
 async def fetch_channel_id(team_id: str, channel_name: str):
     """Fetch channel ID from team ID and channel name"""
     # Check cache first
-    for channel_id, channel in channels_cache.items():
-        if channel.get("name") == channel_name and channel.get("team_id") == team_id:
-            return channel_id
+    channel_id = cache.channel_id(team_id, channel_name)
+    if channel_id:
+        return channel_id
     
     # If not in cache, fetch from API
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/teams/{team_id}/channels/name/{channel_name}"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                channel_data = await response.json()
-                channel_id = channel_data.get("id")
-                channels_cache[channel_id] = channel_data
-                channel_id_to_name[channel_id] = channel_name
-                return channel_id
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get channel ID. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/teams/{team_id}/channels/name/{channel_name}"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            channel_data = await response.json()
+            cache.put_channel(channel_data)
+            return channel_data.get("id")
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get channel ID. Status: {response.status}, Error: {error}")
+
+async def fetch_channel(channel_id: str):
+    """Fetch a channel by ID"""
+    base_url = await get_mattermost_base_url()
+    headers = await get_mattermost_headers()
+    
+    session = await get_http_session()
+    url = f"{base_url}/channels/{channel_id}"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            channel_data = await response.json()
+            cache.put_channel(channel_data)
+            return channel_data
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get channel. Status: {response.status}, Error: {error}")
 
 async def fetch_channels(team_id: str):
     """Fetch all channels for a team"""
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/users/me/teams/{team_id}/channels"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                channels_data = await response.json()
-                # Update cache
-                for channel in channels_data:
-                    channel_id = channel.get("id")
-                    channels_cache[channel_id] = channel
-                    channel_id_to_name[channel_id] = channel.get("name")
-                return channels_data
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get channels. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/users/me/teams/{team_id}/channels"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            channels_data = await response.json()
+            # Update cache
+            cache.set_team_channels(team_id, channels_data)
+            return channels_data
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get channels. Status: {response.status}, Error: {error}")
 
-async def fetch_posts(channel_id: str, limit: int = 30):
-    """Fetch posts from a channel with pagination"""
+async def fetch_posts(
+    channel_id: str,
+    per_page: int | None = None,
+    page: int = 0,
+    since: int | None = None,
+    before: str | None = None,
+    after: str | None = None,
+    include_deleted: bool = False,
+):
+    """
+    Fetch posts from a channel as an async generator of batches (each sorted by create_at).
+    
+    Without a cursor the channel is walked from page backwards to older posts;
+    before/after walk backwards/forwards from a post ID; since (milliseconds)
+    returns all posts changed since then in one batch. Each batch is merged
+    into the cache as it arrives, so callers can stop iterating early.
+    Deleted posts (delete_at set) are only yielded with include_deleted.
+    """
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
+    per_page = min(per_page or MATTERMOST_POSTS_PER_PAGE, 200)
+    # A walk from the newest post builds the channel's cached window of recent posts
+    extend = since is None and before is None and after is None and page == 0
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/channels/{channel_id}/posts?per_page={limit}"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                posts_data = await response.json()
-                # Extract posts list and update cache
-                posts = []
-                for post_id, post in posts_data.get("posts", {}).items():
-                    posts.append(post)
-                
-                # Sort by create_at (timestamp)
-                posts.sort(key=lambda x: x.get("create_at", 0))
-                
-                # Update cache
-                posts_cache[channel_id] = posts
-                return posts
-            else:
+    session = await get_http_session()
+    url = f"{base_url}/channels/{channel_id}/posts"
+    while True:
+        params = {"per_page": per_page}
+        if since is not None:
+            params["since"] = since
+        elif after:
+            params["after"] = after
+        elif before:
+            params["before"] = before
+        else:
+            params["page"] = page
+        async with session.get(url, headers=headers, params=params) as response:
+            if response.status != 200:
                 error = await response.text()
                 raise ValueError(f"Failed to get posts. Status: {response.status}, Error: {error}")
+            posts_data = await response.json()
+        
+        order = posts_data.get("order") or list(posts_data.get("posts", {}))
+        posts = [posts_data["posts"][post_id] for post_id in order if post_id in posts_data.get("posts", {})]
+        # Sort by create_at (timestamp)
+        posts.sort(key=lambda x: x.get("create_at", 0))
+        
+        # Update cache
+        cache.merge_channel_posts(channel_id, posts, extend=extend)
+        
+        batch = posts if include_deleted else [post for post in posts if not post.get("delete_at")]
+        if batch:
+            yield batch
+        if since is not None or not posts or len(order) < per_page:
+            if extend and search_index is not None:
+                # The whole history of the channel has been indexed
+                search_index.mark_covered(channel_id)
+            return
+        if after:
+            after = posts[-1]["id"]
+        else:
+            before = posts[0]["id"]
+
+async def fetch_recent_posts(channel_id: str, limit: int = 30):
+    """Fetch the newest posts of a channel, sorted by create_at"""
+    posts = []
+    async for batch in fetch_posts(channel_id, per_page=limit):
+        posts[:0] = batch
+        if len(posts) >= limit:
+            break
+    return posts[-limit:]
+
+def cache_is_current():
+    """Whether websocket events keep the cache current (connected, and nothing missed is still being fetched)"""
+    if websocket is None or not websocket.connected:
+        return False
+    return websocket_catch_up_task is None or websocket_catch_up_task.done()
+
+async def fetch_thread(post_id: str):
+    """
+    Fetch the thread of a post (root or reply): the root first, then the replies in create_at order.
+
+    Threads are cached per root. A cached thread is kept current by websocket
+    events; without them the posts of its channel changed since the thread was
+    last synced are fetched, so new, edited and deleted replies are applied.
+    """
+    cached_post = cache.post(post_id)
+    root_id = (cached_post.get("root_id") if cached_post else None) or post_id
+    posts = cache.thread(root_id)
+    if posts is not None and cache_is_current():
+        return posts
+    
+    # The margin covers clock skew with the Mattermost server, as for the websocket catch-up
+    synced_at = int((time.time() - WEBSOCKET_CATCH_UP_MARGIN) * 1000)
+    since = cache.thread_synced_at(root_id) if posts is not None else None
+    if since is not None:
+        # Edits and deletions are merged into the cache by fetch_posts; only new replies are added here
+        async for batch in fetch_posts(posts[0].get("channel_id"), since=since, include_deleted=True):
+            for post in batch:
+                if post.get("root_id") == root_id and not post.get("delete_at"):
+                    cache.add_thread_post(root_id, post)
+        posts = cache.thread(root_id)
+        if posts is not None:
+            cache.set_thread_synced(root_id, synced_at)
+            return posts
+    
+    base_url = await get_mattermost_base_url()
+    headers = await get_mattermost_headers()
+    
+    session = await get_http_session()
+    url = f"{base_url}/posts/{post_id}/thread"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            thread_data = await response.json()
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get thread. Status: {response.status}, Error: {error}")
+    
+    # The order array is newest first, so reversed it starts with the root
+    thread_posts = thread_data.get("posts", {})
+    fetched = [thread_posts[key] for key in reversed(thread_data.get("order", [])) if key in thread_posts]
+    root_id = (thread_posts.get(post_id) or {}).get("root_id") or post_id
+    cache.set_thread(root_id, fetched)
+    cache.set_thread_synced(root_id, synced_at)
+    return fetched
+
+async def fetch_users(user_ids):
+    """Fetch users by ID (the ones not in cache in one request); user ID -> user"""
+    users = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        user = cache.user(user_id) if user_id else None
+        if user is not None:
+            users[user_id] = user
+        elif user_id:
+            missing.append(user_id)
+    if not missing:
+        return users
+    
+    base_url = await get_mattermost_base_url()
+    headers = await get_mattermost_headers()
+    
+    session = await get_http_session()
+    url = f"{base_url}/users/ids"
+    async with session.post(url, headers=headers, json=missing) as response:
+        if response.status == 200:
+            for user in await response.json():
+                cache.put_user(user)
+                users[user["id"]] = user
+            return users
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get users. Status: {response.status}, Error: {error}")
+
+async def fetch_usernames(posts):
+    """Usernames of the authors of posts (user ID -> username); empty if they cannot be fetched"""
+    try:
+        users = await fetch_users(post.get("user_id") for post in posts)
+    except Exception as e:
+        logger.warning(f"Could not resolve post authors: {str(e)}")
+        return {}
+    return {user_id: user.get("username") for user_id, user in users.items()}
+
+async def walk_channel_posts(channel_id: str):
+    """
+    Batches of a channel's posts from the newest to older ones (each sorted by create_at),
+    starting with the cached recent posts while websocket events keep them current
+    """
+    posts = cache.channel_posts(channel_id) if cache_is_current() else None
+    if not posts:
+        async for batch in fetch_posts(channel_id):
+            yield batch
+        return
+    yield posts
+    async for batch in fetch_posts(channel_id, before=posts[0]["id"]):
+        yield batch
+
+async def collect_channel_history(channel_id: str, since: int, tail_tokens: int):
+    """
+    Walk a channel back to since (milliseconds): the newest posts that fit in
+    tail_tokens (in create_at order), and by day the posts of the older days
+    that have no cached digest. The day the tail starts in is left out (it
+    would only be digested partly), and the walk stops at the oldest day it needs.
+    """
+    today = datetime.now().date()
+    first_day = datetime.fromtimestamp(since / 1000).date()
+    walked_to = first_day
+    tail = []
+    tail_tokens_used = 0
+    tail_full = tail_tokens <= 0
+    day_posts: Dict[date, List[Dict]] = {}
+    oldest_missing = None
+    
+    done = False
+    async for batch in walk_channel_posts(channel_id):
+        for post in reversed(batch):
+            if post.get("create_at", 0) < since:
+                done = True
+                break
+            if not tail_full:
+                cost = estimate_tokens(post.get("message", "")) + 8
+                if tail_tokens_used + cost <= tail_tokens:
+                    tail.append(post)
+                    tail_tokens_used += cost
+                    continue
+                tail_full = True
+            day = post_day(post)
+            if tail and day == post_day(tail[-1]):
+                continue
+            if oldest_missing is None:
+                missing = [
+                    date.fromordinal(ordinal)
+                    for ordinal in range(first_day.toordinal(), day.toordinal() + 1)
+                    if date.fromordinal(ordinal) == today or cached_digest(channel_id, date.fromordinal(ordinal)) is None
+                ]
+                oldest_missing = missing[0] if missing else today + timedelta(days=1)
+            if day < oldest_missing:
+                walked_to = oldest_missing
+                done = True
+                break
+            if day == today or cached_digest(channel_id, day) is None:
+                day_posts.setdefault(day, []).append(post)
+        if done:
+            break
+    # Days the walk went through without a post get an empty digest, so
+    # that the next walk can stop before them too
+    last_day = post_day(tail[-1]) if tail else today
+    for ordinal in range(walked_to.toordinal(), last_day.toordinal()):
+        day = date.fromordinal(ordinal)
+        if day not in day_posts and cached_digest(channel_id, day) is None:
+            day_posts[day] = []
+    # Both were collected newest first
+    return tail[::-1], {day: posts[::-1] for day, posts in day_posts.items()}
+
+def cached_digest(channel_id: str, day):
+    return cache.store.get("digest", f"{channel_id}/{day.isoformat()}")
+
+async def digest_channel_days(channel_id: str, day_posts: Dict):
+    """Digest the posts of each day (day -> posts); past days are cached"""
+    usernames = await fetch_usernames([post for posts in day_posts.values() for post in posts])
+    today = datetime.now().date()
+    digests = {}
+    for day, posts in day_posts.items():
+        digests[day] = digest_posts(day, posts, usernames) if posts else ""
+        if day < today:
+            cache.store.put("digest", f"{channel_id}/{day.isoformat()}", digests[day], ttl=DIGEST_TTL)
+    return digests
+
+async def build_channel_summary(channel_id: str, days: int, max_tokens: int):
+    """
+    The text of summarize-channel: digests of the older days of the window
+    (as many of the newest as fit) followed by the raw recent posts.
+    """
+    since = int((datetime.now().timestamp() - days * 24 * 60 * 60) * 1000)
+    tail, day_posts = await collect_channel_history(channel_id, since, max_tokens * 3 // 4)
+    digests = await digest_channel_days(channel_id, day_posts)
+    usernames = await fetch_usernames(tail)
+    tail_lines = [format_post(post, usernames) for post in tail]
+    
+    digest_header = "Digest of earlier days:\n"
+    tail_header = "Most recent messages:\n\n"
+    # Each line is counted with one token more for the separators after it
+    budget = (
+        max_tokens
+        - estimate_tokens(digest_header + tail_header)
+        - sum(estimate_tokens(line) + 1 for line in tail_lines)
+    )
+    digest_lines = []
+    # Days before the one the tail starts in, newest first
+    last_day = post_day(tail[0]).toordinal() - 1 if tail else datetime.now().date().toordinal()
+    first_day = datetime.fromtimestamp(since / 1000).date().toordinal()
+    for ordinal in range(last_day, first_day - 1, -1):
+        day = date.fromordinal(ordinal)
+        digest = digests.get(day) or cached_digest(channel_id, day)
+        if not digest:
+            continue
+        budget -= estimate_tokens(digest) + 1
+        if budget < 0:
+            break
+        digest_lines.append(digest)
+    
+    sections = []
+    if digest_lines:
+        sections.append(digest_header + "\n".join(reversed(digest_lines)))
+    if tail_lines:
+        sections.append(tail_header + "\n\n".join(tail_lines))
+    return "\n\n".join(sections)
+
+async def digest_channel(channel_id: str):
+    """Digest the past days of a channel's summary window that are not cached"""
+    since = int((datetime.now().timestamp() - MATTERMOST_SUMMARY_DAYS * 24 * 60 * 60) * 1000)
+    try:
+        _, day_posts = await collect_channel_history(channel_id, since, 0)
+        await digest_channel_days(channel_id, day_posts)
+    except Exception as e:
+        logger.warning(f"Error digesting posts of channel {channel_id}: {str(e)}")
+
+def start_channel_digest(channel_id: str):
+    task = digest_tasks.get(channel_id)
+    if task is None or task.done():
+        digest_tasks[channel_id] = asyncio.create_task(digest_channel(channel_id))
+
+async def search_posts_api(terms: str, is_or_search: bool = False):
+    """Search posts on the Mattermost server; results are cached and indexed"""
+    base_url = await get_mattermost_base_url()
+    headers = await get_mattermost_headers()
+    
+    search_params = {
+        "terms": terms,
+        "is_or_search": is_or_search
+    }
+    
+    session = await get_http_session()
+    url = f"{base_url}/posts/search"
+    async with session.post(url, headers=headers, json=search_params) as response:
+        if response.status == 200:
+            search_results = await response.json()
+            found = search_results.get("posts", {})
+            posts = [found[post_id] for post_id in search_results.get("order") or list(found) if post_id in found]
+            # Update cache with these posts
+            for post in posts:
+                cache.put_post(post)
+            return posts
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to search posts. Status: {response.status}, Error: {error}")
+
+async def search_posts_local(terms: str, is_or_search: bool = False):
+    """
+    Search the local index, or return None if it cannot answer for the whole workspace:
+    not every channel is indexed, the websocket that keeps it current is down, or the
+    terms use modifiers only the server understands.
+    """
+    if search_index is None or not cache_is_current():
+        return None
+    query = to_fts_query(terms, is_or_search)
+    channel_ids = cache.member_channel_ids()
+    if query is None or channel_ids is None or not search_index.covers(channel_ids):
+        return None
+    # Waits for the queued index writes: off the event loop
+    return await asyncio.to_thread(search_index.search, query, MATTERMOST_SEARCH_LIMIT)
+
+async def fetch_all_channel_ids(refresh: bool = False):
+    """IDs of all channels in the user's teams; the team and channel lists are fetched if not cached (or with refresh)"""
+    teams = None if refresh else cache.teams()
+    if teams is None:
+        teams = await fetch_teams()
+    channel_ids = []
+    for team in teams:
+        channels = None if refresh else cache.team_channels(team.get("id"))
+        if channels is None:
+            channels = await fetch_channels(team.get("id"))
+        channel_ids.extend(channel.get("id") for channel in channels)
+    return channel_ids
+
+async def backfill_search_index():
+    """Index the whole history of every channel that is not covered yet"""
+    channel_ids = await fetch_all_channel_ids()
+    
+    async def _index_channel(channel_id):
+        # fetch_posts marks the channel as covered when it reaches the oldest post
+        async for _ in fetch_posts(channel_id, per_page=200):
+            pass
+    
+    covered = search_index.covered_channels()
+    missing = [channel_id for channel_id in channel_ids if channel_id not in covered]
+    results = await gather_bounded((_index_channel(channel_id) for channel_id in missing), limit=MATTERMOST_SEARCH_BACKFILL_CONCURRENCY)
+    for channel_id, result in zip(missing, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Error indexing posts of channel {channel_id}: {str(result)}")
+    await search_index.flush()
+    logger.info(f"Search index: {await asyncio.to_thread(search_index.stats)}")
+
+def start_search_backfill():
+    global search_backfill_task
+    if search_index is None or not MATTERMOST_SEARCH_BACKFILL:
+        return
+    if search_backfill_task is None or search_backfill_task.done():
+        search_backfill_task = asyncio.create_task(backfill_search_index())
+
+async def catch_up_channel(channel_id: str, since: int):
+    """
+    Apply the posts of a channel created, edited or deleted since a time
+    (milliseconds) as their websocket events would have; returns whether there were any
+    """
+    posts = []
+    # fetch_posts stores the changed posts and drops the deleted ones
+    async for batch in fetch_posts(channel_id, since=since, include_deleted=True):
+        posts.extend(batch)
+    if not posts:
+        return False
+    # New posts continue the cached recent posts (older posts that were edited do not)
+    new_posts = [post for post in posts if not post.get("delete_at") and post.get("create_at", 0) >= since]
+    if new_posts and cache.channel_posts(channel_id) is not None:
+        cache.merge_channel_posts(channel_id, new_posts, extend=True)
+    for post in new_posts:
+        if post.get("root_id"):
+            cache.add_thread_post(post["root_id"], post)
+    for post in posts:
+        cache.store.pop("digest", f"{channel_id}/{post_day(post).isoformat()}")
+    channel = cache.channel(channel_id)
+    if new_posts and channel is not None:
+        cache.put_channel({**channel, "last_post_at": max(post.get("create_at", 0) for post in new_posts)})
+    await notify_resources_updated(
+        f"mattermost://posts/{channel_id}",
+        f"mattermost://channel/{channel_id}",
+        f"mattermost://pinned/{channel_id}",
+        *(f"mattermost://post/{post['id']}" for post in posts),
+    )
+    return True
+
+async def catch_up_websocket(since: int):
+    """Fetch what changed in every channel since the websocket disconnected (milliseconds)"""
+    try:
+        channel_ids = await fetch_all_channel_ids(refresh=True)
+    except Exception as e:
+        logger.warning(f"Could not catch up after the websocket reconnected, dropping the cache: {str(e)}")
+        drop_cache()
+        return
+    results = await gather_bounded(catch_up_channel(channel_id, since) for channel_id in channel_ids)
+    failed = [channel_id for channel_id, result in zip(channel_ids, results) if isinstance(result, Exception)]
+    for channel_id in failed:
+        # Its cached posts may be stale: fetch them again when needed
+        logger.warning(f"Could not catch up on channel {channel_id}, dropping its cached posts")
+        cache.store.pop("channel_posts", channel_id)
+    if search_index is not None and failed:
+        search_index.reset_coverage(failed)
+    logger.info(f"Caught up on {sum(result is True for result in results)} changed channels after the websocket reconnected")
+    resource_list_notifier.changed()
+    # Channels created meanwhile are not indexed yet
+    start_search_backfill()
+
+def drop_cache():
+    """Forget everything that may be stale and index the history again"""
+    cache.clear()
+    if search_index is not None:
+        search_index.reset_coverage()
+    start_search_backfill()
+
+def handle_websocket_reconnect(last_message_at: float | None = None):
+    """Events may have been missed while disconnected: fetch the changes since the last message"""
+    global websocket_catch_up_task, websocket_catch_up_since
+    if last_message_at is None:
+        drop_cache()
+        return
+    since = int((last_message_at - WEBSOCKET_CATCH_UP_MARGIN) * 1000)
+    if websocket_catch_up_task is not None and not websocket_catch_up_task.done():
+        # Still catching up on an earlier disconnect: start over from the earlier time
+        websocket_catch_up_task.cancel()
+        since = min(since, websocket_catch_up_since)
+    websocket_catch_up_since = since
+    websocket_catch_up_task = asyncio.create_task(catch_up_websocket(since))
 
 async def create_post(channel_id: str, message: str):
     """Create a new post in the specified channel"""
@@ -157,40 +812,34 @@ async def create_post(channel_id: str, message: str):
         "message": message
     }
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/posts"
-        async with session.post(url, headers=headers, json=post_data) as response:
-            if response.status == 201:
-                post = await response.json()
-                # Update cache
-                if channel_id in posts_cache:
-                    posts_cache[channel_id].append(post)
-                else:
-                    posts_cache[channel_id] = [post]
-                return post
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to create post. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/posts"
+    async with session.post(url, headers=headers, json=post_data) as response:
+        if response.status == 201:
+            post = await response.json()
+            # Update cache
+            cache.add_channel_post(channel_id, post)
+            return post
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to create post. Status: {response.status}, Error: {error}")
 
 async def fetch_teams():
     """Fetch all teams the user is a member of"""
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/users/me/teams"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                teams_data = await response.json()
-                # Update cache
-                for team in teams_data:
-                    team_id = team.get("id")
-                    team_cache[team_id] = team
-                    team_id_to_name[team_id] = team.get("name")
-                return teams_data
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get teams. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/users/me/teams"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            teams_data = await response.json()
+            # Update cache
+            cache.set_teams(teams_data)
+            return teams_data
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get teams. Status: {response.status}, Error: {error}")
 
 # Load initial data from Mattermost on startup
 async def initialize_mattermost_data():
@@ -225,7 +874,7 @@ async def initialize_mattermost_data():
                 raise ValueError(f"Channel '{MATTERMOST_CHANNEL_NAME}' not found in team '{MATTERMOST_TEAM_NAME}'")
         
         # Fetch posts for the channel
-        await fetch_posts(channel_id)
+        await fetch_recent_posts(channel_id)
         
         return {
             "team_id": team_id,
@@ -241,61 +890,116 @@ async def fetch_pinned_posts(channel_id: str):
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/channels/{channel_id}/pinned"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                pinned_posts = await response.json()
-                return pinned_posts
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get pinned posts. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/channels/{channel_id}/pinned"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            pinned_posts = await response.json()
+            return pinned_posts
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get pinned posts. Status: {response.status}, Error: {error}")
 
 async def fetch_channel_stats(channel_id: str):
     """Fetch statistics for a specific channel"""
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/channels/{channel_id}/stats"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                stats = await response.json()
-                return stats
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get channel stats. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/channels/{channel_id}/stats"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            stats = await response.json()
+            return stats
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get channel stats. Status: {response.status}, Error: {error}")
 
 async def fetch_channel_members(channel_id: str):
     """Fetch members of a specific channel"""
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/channels/{channel_id}/members"
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                members = await response.json()
-                return members
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to get channel members. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/channels/{channel_id}/members"
+    async with session.get(url, headers=headers) as response:
+        if response.status == 200:
+            members = await response.json()
+            return members
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to get channel members. Status: {response.status}, Error: {error}")
+
+async def gather_bounded(coroutines, limit: int = None):
+    """Run coroutines concurrently, at most limit at a time; results (or exceptions) in order"""
+    semaphore = asyncio.Semaphore(limit or MATTERMOST_FETCH_CONCURRENCY)
+    
+    async def _run(coroutine):
+        async with semaphore:
+            return await coroutine
+    
+    return await asyncio.gather(*(_run(coroutine) for coroutine in coroutines), return_exceptions=True)
+
+async def resolve_channel_ids(targets):
+    """
+    Channel IDs of (team name, channel name) pairs, each team and channel resolved once;
+    a pair maps to the exception if it could not be resolved
+    """
+    targets = set(targets)
+    team_names = list({team_name for team_name, _ in targets})
+    team_ids = dict(zip(team_names, await gather_bounded(fetch_team_id(team_name) for team_name in team_names)))
+    
+    resolved = {}
+    pending = []
+    for team_name, channel_name in targets:
+        team_id = team_ids[team_name]
+        if isinstance(team_id, BaseException):
+            resolved[(team_name, channel_name)] = team_id
+        else:
+            pending.append((team_name, channel_name, team_id))
+    channel_ids = await gather_bounded(fetch_channel_id(team_id, channel_name) for _, channel_name, team_id in pending)
+    for (team_name, channel_name, _), channel_id in zip(pending, channel_ids):
+        resolved[(team_name, channel_name)] = channel_id
+    return resolved
+
+def format_batch_results(action: str, labels: list, results: list) -> str:
+    """One line per batch item, with the item's result (or error) text"""
+    failed = sum(isinstance(result, BaseException) for result in results)
+    lines = [f"{action}: {len(results) - failed} succeeded, {failed} failed."]
+    for index, (label, result) in enumerate(zip(labels, results), 1):
+        if isinstance(result, BaseException):
+            lines.append(f"{index}. {label}: Error: {str(result)}")
+        else:
+            lines.append(f"{index}. {label}: {result}")
+    return "\n".join(lines)
 
-@server.list_resources()
-async def handle_list_resources() -> list[types.Resource]:
+async def list_all_resources() -> list[types.Resource]:
     """
-    List available Mattermost resources.
-    Each channel, post, and data point is exposed as a resource.
+    All concrete Mattermost resources: teams, channels and server statistics.
+    Posts, pinned posts, statistics and members of a channel are exposed
+    through resource templates and read on demand.
     """
     resources = []
     
     try:
         # Fetch teams if not in cache
-        if not team_cache:
-            await fetch_teams()
+        teams = cache.teams()
+        if teams is None:
+            teams = await fetch_teams()
+        
+        # Fetch the channels of all teams that are not in cache concurrently
+        channels_by_team = {team.get("id"): cache.team_channels(team.get("id")) for team in teams}
+        missing = [team_id for team_id, channels in channels_by_team.items() if channels is None]
+        results = await gather_bounded(fetch_channels(team_id) for team_id in missing)
+        for team_id, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching channels for team {team_id}: {str(result)}")
+                result = []
+            channels_by_team[team_id] = result
             
         # Add team resources
-        for team_id, team in team_cache.items():
+        for team in teams:
+            team_id = team.get("id")
             team_name = team.get("name")
             resources.append(
                 types.Resource(
@@ -305,83 +1009,108 @@ async def handle_list_resources() -> list[types.Resource]:
                     mimeType="application/json",
                 )
             )
-            
-            # Fetch channels for this team if not in cache
-            if not any(channel.get("team_id") == team_id for channel in channels_cache.values()):
-                await fetch_channels(team_id)
                 
             # Add channel resources
-            for channel_id, channel in channels_cache.items():
-                if channel.get("team_id") == team_id:
-                    channel_name = channel.get("name")
-                    resources.append(
-                        types.Resource(
-                            uri=AnyUrl(f"mattermost://channel/{channel_id}"),
-                            name=f"Channel: {channel_name}",
-                            description=f"Mattermost channel: {channel_name}",
-                            mimeType="application/json",
-                        )
+            for channel in channels_by_team[team_id]:
+                channel_id = channel.get("id")
+                channel_name = channel.get("name")
+                resources.append(
+                    types.Resource(
+                        uri=AnyUrl(f"mattermost://channel/{channel_id}"),
+                        name=f"Channel: {channel_name}",
+                        description=f"Mattermost channel: {channel_name} (team {team_name})",
+                        mimeType="application/json",
                     )
-                    
-                    # Fetch posts for this channel if not in cache
-                    if channel_id not in posts_cache:
-                        try:
-                            await fetch_posts(channel_id)
-                        except Exception as e:
-                            # Skip if we can't fetch posts
-                            print(f"Error fetching posts for channel {channel_id}: {str(e)}")
-                            continue
-                    
-                    # Add post resources (only the recent ones)
-                    if channel_id in posts_cache:
-                        for post in posts_cache[channel_id][-10:]:  # Show last 10 posts
-                            post_id = post.get("id")
-                            message = post.get("message", "")
-                            # Truncate message for display
-                            short_message = message[:30] + "..." if len(message) > 30 else message
-                            resources.append(
-                                types.Resource(
-                                    uri=AnyUrl(f"mattermost://post/{post_id}"),
-                                    name=f"Post: {short_message}",
-                                    description=f"Mattermost post in channel {channel_name}",
-                                    mimeType="text/plain",
-                                )
-                            )
-            
-            # Add pinned posts resources
-            resources.append(
-                types.Resource(
-                    uri=AnyUrl(f"mattermost://pinned/{channel_id}"),
-                    name=f"Pinned Posts: {channel_name}",
-                    description=f"Pinned posts in Mattermost channel: {channel_name}",
-                    mimeType="application/json",
-                )
-            )
-            
-            # Add channel statistics resources
-            resources.append(
-                types.Resource(
-                    uri=AnyUrl(f"mattermost://stats/{channel_id}"),
-                    name=f"Channel Stats: {channel_name}",
-                    description=f"Statistics for Mattermost channel: {channel_name}",
-                    mimeType="application/json",
                 )
+
+        resources.append(
+            types.Resource(
+                uri=AnyUrl(CACHE_STATS_URI),
+                name="Cache Stats",
+                description="Size and hit rate of the server's team, channel and post cache",
+                mimeType="application/json",
             )
-            
-            # Add channel members resources
-            resources.append(
-                types.Resource(
-                    uri=AnyUrl(f"mattermost://members/{channel_id}"),
-                    name=f"Channel Members: {channel_name}",
-                    description=f"Members of Mattermost channel: {channel_name}",
-                    mimeType="application/json",
-                )
+        )
+        resources.append(
+            types.Resource(
+                uri=AnyUrl(HTTP_POOL_STATS_URI),
+                name="HTTP Pool Stats",
+                description="Connection pool statistics of the server's Mattermost API session",
+                mimeType="application/json",
             )
+        )
     except Exception as e:
         logger.error(f"Error listing resources: {str(e)}")
     
     return resources
 
+async def list_resource_uris() -> list[str]:
+    return [str(resource.uri) for resource in await list_all_resources()]
+
+resource_list_notifier = ResourceListNotifier(list_resource_uris, MATTERMOST_RESOURCE_LIST_DEBOUNCE)
+
+async def handle_list_resources(request: types.ListResourcesRequest) -> types.ServerResult:
+    """
+    List available Mattermost resources, MATTERMOST_RESOURCES_PAGE_SIZE at a time.
+    The cursor is the offset of the next page.
+    """
+    cursor = request.params.cursor if request.params else None
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    
+    resources = await list_all_resources()
+    resource_list_notifier.listed(server.request_context.session, (str(resource.uri) for resource in resources))
+    end = offset + MATTERMOST_RESOURCES_PAGE_SIZE
+    return types.ServerResult(
+        types.ListResourcesResult(
+            resources=resources[offset:end],
+            nextCursor=str(end) if end < len(resources) else None,
+        )
+    )
+
+# Registered directly: the list_resources() decorator does not pass the cursor
+server.request_handlers[types.ListResourcesRequest] = handle_list_resources
+
+@server.list_resource_templates()
+async def handle_list_resource_templates() -> list[types.ResourceTemplate]:
+    """
+    List templates for per-post and per-channel resources.
+    """
+    return [
+        types.ResourceTemplate(
+            uriTemplate="mattermost://posts/{channel_id}",
+            name="Channel Posts",
+            description="Recent posts in a Mattermost channel",
+            mimeType="text/plain",
+        ),
+        types.ResourceTemplate(
+            uriTemplate="mattermost://post/{post_id}",
+            name="Post",
+            description="A Mattermost post",
+            mimeType="text/plain",
+        ),
+        types.ResourceTemplate(
+            uriTemplate="mattermost://pinned/{channel_id}",
+            name="Pinned Posts",
+            description="Pinned posts in a Mattermost channel",
+            mimeType="text/plain",
+        ),
+        types.ResourceTemplate(
+            uriTemplate="mattermost://stats/{channel_id}",
+            name="Channel Stats",
+            description="Statistics for a Mattermost channel",
+            mimeType="text/plain",
+        ),
+        types.ResourceTemplate(
+            uriTemplate="mattermost://members/{channel_id}",
+            name="Channel Members",
+            description="Members of a Mattermost channel",
+            mimeType="text/plain",
+        ),
+    ]
+
 @server.read_resource()
 async def handle_read_resource(uri: AnyUrl) -> str:
     """
@@ -390,87 +1119,96 @@ async def handle_read_resource(uri: AnyUrl) -> str:
     if uri.scheme != "mattermost":
         raise ValueError(f"Unsupported URI scheme: {uri.scheme}")
 
-    path = uri.path
-    if path.startswith("/"):
-        path = path[1:]
-    
-    parts = path.split("/")
+    if str(uri) == HTTP_POOL_STATS_URI:
+        return json.dumps(http_pool_stats(), indent=2)
+    if str(uri) == CACHE_STATS_URI:
+        index_stats = await asyncio.to_thread(search_index.stats) if search_index else None
+        return json.dumps({**cache.stats(), "search_index": index_stats}, indent=2)
+
+    # mattermost://<type>/<id>: the resource type is the URI's host
+    resource_type = uri.host
+    resource_id = (uri.path or "").lstrip("/")
     
-    if len(parts) != 2:
+    if not resource_type or not resource_id or "/" in resource_id:
         raise ValueError(f"Invalid URI format: {uri}")
     
-    resource_type, resource_id = parts
-    
     if resource_type == "team":
         # Return team info
-        if resource_id in team_cache:
-            return str(team_cache[resource_id])
+        team = cache.team(resource_id)
+        if team is not None:
+            return str(team)
         else:
             # Fetch team
             base_url = await get_mattermost_base_url()
             headers = await get_mattermost_headers()
             
-            async with aiohttp.ClientSession() as session:
-                url = f"{base_url}/teams/{resource_id}"
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        team_data = await response.json()
-                        team_cache[resource_id] = team_data
-                        return str(team_data)
-                    else:
-                        error = await response.text()
-                        raise ValueError(f"Failed to get team. Status: {response.status}, Error: {error}")
+            session = await get_http_session()
+            url = f"{base_url}/teams/{resource_id}"
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    team_data = await response.json()
+                    cache.put_team(team_data)
+                    return str(team_data)
+                else:
+                    error = await response.text()
+                    raise ValueError(f"Failed to get team. Status: {response.status}, Error: {error}")
     
     elif resource_type == "channel":
         # Return channel info
-        if resource_id in channels_cache:
-            return str(channels_cache[resource_id])
+        channel = cache.channel(resource_id)
+        if channel is not None:
+            return str(channel)
         else:
             # Fetch channel
-            base_url = await get_mattermost_base_url()
-            headers = await get_mattermost_headers()
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"{base_url}/channels/{resource_id}"
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        channel_data = await response.json()
-                        channels_cache[resource_id] = channel_data
-                        return str(channel_data)
-                    else:
-                        error = await response.text()
-                        raise ValueError(f"Failed to get channel. Status: {response.status}, Error: {error}")
+            return str(await fetch_channel(resource_id))
     
     elif resource_type == "post":
         # Find post in cache
-        for channel_id, posts in posts_cache.items():
-            for post in posts:
-                if post.get("id") == resource_id:
-                    username = post.get("username", "unknown")
-                    create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
-                    message = post.get("message", "")
-                    channel_name = channel_id_to_name.get(post.get("channel_id"), "unknown channel")
-                    
-                    return f"Post by {username} at {create_time} in {channel_name}:\n\n{message}"
+        post = cache.post(resource_id)
+        if post is not None:
+            username = post.get("username", "unknown")
+            create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
+            message = post.get("message", "")
+            channel_name = cache.channel_name(post.get("channel_id"), "unknown channel")
+            
+            return f"Post by {username} at {create_time} in {channel_name}:\n\n{message}"
         
         # If not found in cache, fetch from API
         base_url = await get_mattermost_base_url()
         headers = await get_mattermost_headers()
         
-        async with aiohttp.ClientSession() as session:
-            url = f"{base_url}/posts/{resource_id}"
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    post_data = await response.json()
-                    username = post_data.get("username", "unknown")
-                    create_time = datetime.fromtimestamp(post_data.get("create_at", 0)/1000)
-                    message = post_data.get("message", "")
-                    channel_name = channel_id_to_name.get(post_data.get("channel_id"), "unknown channel")
+        session = await get_http_session()
+        url = f"{base_url}/posts/{resource_id}"
+        async with session.get(url, headers=headers) as response:
+            if response.status == 200:
+                post_data = await response.json()
+                cache.put_post(post_data)
+                username = post_data.get("username", "unknown")
+                create_time = datetime.fromtimestamp(post_data.get("create_at", 0)/1000)
+                message = post_data.get("message", "")
+                channel_name = cache.channel_name(post_data.get("channel_id"), "unknown channel")
                     
-                    return f"Post by {username} at {create_time} in {channel_name}:\n\n{message}"
-                else:
-                    error = await response.text()
-                    raise ValueError(f"Failed to get post. Status: {response.status}, Error: {error}")
+                return f"Post by {username} at {create_time} in {channel_name}:\n\n{message}"
+            else:
+                error = await response.text()
+                raise ValueError(f"Failed to get post. Status: {response.status}, Error: {error}")
+    
+    elif resource_type == "posts":
+        # Recent posts of a channel
+        posts = cache.channel_posts(resource_id)
+        if posts is None:
+            posts = await fetch_recent_posts(resource_id)
+        channel_name = cache.channel_name(resource_id, resource_id)
+        
+        formatted_posts = []
+        for post in posts:
+            username = post.get("username", "unknown")
+            create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
+            message = post.get("message", "")
+            
+            formatted_posts.append(f"[{create_time}] {username}: {message}")
+        
+        return f"Recent posts in {channel_name}:\n\n" + "\n\n".join(formatted_posts)
     
     elif resource_type == "pinned":
         # Get pinned posts for a channel
@@ -516,6 +1254,81 @@ async def handle_read_resource(uri: AnyUrl) -> str:
     
     raise ValueError(f"Unsupported resource type: {resource_type}")
 
+@server.subscribe_resource()
+async def handle_subscribe_resource(uri: AnyUrl):
+    """
+    Subscribe the client to updates of a resource (sent as websocket events arrive).
+    """
+    resource_subscriptions.setdefault(str(uri), weakref.WeakSet()).add(server.request_context.session)
+
+@server.unsubscribe_resource()
+async def handle_unsubscribe_resource(uri: AnyUrl):
+    """
+    Unsubscribe the client from updates of a resource.
+    """
+    sessions = resource_subscriptions.get(str(uri))
+    if sessions is not None:
+        sessions.discard(server.request_context.session)
+        if not sessions:
+            del resource_subscriptions[str(uri)]
+
+async def notify_resources_updated(*uris: str):
+    """Send resources/updated to the clients subscribed to any of the URIs"""
+    for uri in uris:
+        for session in list(resource_subscriptions.get(uri, ())):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception as e:
+                logger.warning(f"Failed to notify a client about {uri}: {str(e)}")
+                resource_subscriptions[uri].discard(session)
+
+async def handle_websocket_event(event: Dict):
+    """Apply a Mattermost websocket event to the cache and notify subscribed clients"""
+    event_type = event.get("event")
+    data = event.get("data") or {}
+    
+    if event_type in ("posted", "post_edited", "post_deleted"):
+        # The post is sent as a JSON string
+        post = json.loads(data.get("post") or "{}")
+        if not post.get("id"):
+            return
+        channel_id = post.get("channel_id")
+        uris = [f"mattermost://post/{post['id']}", f"mattermost://posts/{channel_id}"]
+        
+        if event_type == "posted":
+            cache.add_channel_post(channel_id, post)
+            if post.get("root_id"):
+                cache.add_thread_post(post["root_id"], post)
+            # Keep the digests of busy channels ready for summarize-channel
+            digest_post_counts[channel_id] = digest_post_counts.get(channel_id, 0) + 1
+            if MATTERMOST_DIGEST_AFTER_POSTS and digest_post_counts[channel_id] >= MATTERMOST_DIGEST_AFTER_POSTS:
+                digest_post_counts[channel_id] = 0
+                start_channel_digest(channel_id)
+            channel = cache.channel(channel_id)
+            if channel is not None:
+                cache.put_channel({**channel, "last_post_at": post.get("create_at", channel.get("last_post_at"))})
+            uris.append(f"mattermost://channel/{channel_id}")
+        elif event_type == "post_edited":
+            cache.put_post(post)
+            cache.store.pop("digest", f"{channel_id}/{post_day(post).isoformat()}")
+            # Pinning and unpinning arrive as edits
+            uris.append(f"mattermost://pinned/{channel_id}")
+        else:
+            cache.remove_post(post)
+            cache.store.pop("digest", f"{channel_id}/{post_day(post).isoformat()}")
+            uris.append(f"mattermost://pinned/{channel_id}")
+        
+        await notify_resources_updated(*uris)
+    
+    elif event_type == "channel_created":
+        channel = await fetch_channel(data.get("channel_id"))
+        cache.add_team_channel(channel)
+        if search_index is not None:
+            # A new channel has no history: its posts are indexed as their events arrive
+            search_index.mark_covered(channel["id"])
+        await notify_resources_updated(f"mattermost://team/{channel.get('team_id')}")
+        resource_list_notifier.changed()
+
 @server.list_prompts()
 async def handle_list_prompts() -> list[types.Prompt]:
     """
@@ -535,7 +1348,17 @@ async def handle_list_prompts() -> list[types.Prompt]:
                     name="format",
                     description="Format of the summary (bullet/narrative/topics)",
                     required=False,
-                )
+                ),
+                types.PromptArgument(
+                    name="days",
+                    description=f"Days of history to summarize (default {MATTERMOST_SUMMARY_DAYS})",
+                    required=False,
+                ),
+                types.PromptArgument(
+                    name="max_tokens",
+                    description=f"Approximate size limit of the conversation in tokens (default {MATTERMOST_SUMMARY_MAX_TOKENS})",
+                    required=False,
+                ),
             ],
         ),
         types.Prompt(
@@ -630,25 +1453,17 @@ async def handle_get_prompt(
             raise ValueError("Missing required argument: channel_id")
             
         format_type = arguments.get("format", "bullet")
+        try:
+            days = int(arguments.get("days") or MATTERMOST_SUMMARY_DAYS)
+            max_tokens = int(arguments.get("max_tokens") or MATTERMOST_SUMMARY_MAX_TOKENS)
+        except ValueError:
+            raise ValueError("Invalid argument: days and max_tokens must be numbers")
         
-        # Fetch posts for the channel if not in cache
-        if channel_id not in posts_cache:
-            await fetch_posts(channel_id)
+        # Digests of older days (cached) and the recent posts, within the token budget
+        posts_text = await build_channel_summary(channel_id, days, max_tokens)
             
         # Get channel name
-        channel_name = "unknown channel"
-        if channel_id in channels_cache:
-            channel_name = channels_cache[channel_id].get("name", "unknown channel")
-            
-        # Format posts for the prompt
-        posts_text = ""
-        if channel_id in posts_cache:
-            for post in posts_cache[channel_id]:
-                username = post.get("username", "unknown")
-                create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
-                message = post.get("message", "")
-                
-                posts_text += f"[{create_time}] {username}: {message}\n\n"
+        channel_name = cache.channel_name(channel_id, "unknown channel")
         
         format_instructions = ""
         if format_type == "bullet":
@@ -676,67 +1491,19 @@ async def handle_get_prompt(
         if not post_id:
             raise ValueError("Missing required argument: post_id")
             
-        # Find post and replies in cache
-        root_post = None
-        replies = []
-        
-        # Find post in cache first
-        for channel_posts in posts_cache.values():
-            for post in channel_posts:
-                if post.get("id") == post_id:
-                    root_post = post
-                    break
-            if root_post:
-                break
-                
-        # If not found in cache, fetch from API
-        if not root_post:
-            base_url = await get_mattermost_base_url()
-            headers = await get_mattermost_headers()
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"{base_url}/posts/{post_id}"
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        root_post = await response.json()
-                    else:
-                        error = await response.text()
-                        raise ValueError(f"Failed to get post. Status: {response.status}, Error: {error}")
-        
-        # Fetch thread
-        if root_post:
-            base_url = await get_mattermost_base_url()
-            headers = await get_mattermost_headers()
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"{base_url}/posts/{post_id}/thread"
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        thread_data = await response.json()
-                        # Extract replies
-                        for post_id, post in thread_data.get("posts", {}).items():
-                            if post_id != root_post.get("id"):
-                                replies.append(post)
+        # The root post and its replies in create_at order, in one request (or from cache)
+        thread = await fetch_thread(post_id)
+        usernames = await fetch_usernames(thread)
         
         # Format thread for the prompt
         thread_text = ""
         
-        if root_post:
-            root_username = root_post.get("username", "unknown")
-            root_time = datetime.fromtimestamp(root_post.get("create_at", 0)/1000)
-            root_message = root_post.get("message", "")
-            
-            thread_text += f"[ROOT] [{root_time}] {root_username}: {root_message}\n\n"
+        for index, post in enumerate(thread):
+            username = usernames.get(post.get("user_id")) or post.get("username") or "unknown"
+            create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
+            message = post.get("message", "")
             
-            # Sort replies by timestamp
-            replies.sort(key=lambda x: x.get("create_at", 0))
-            
-            for reply in replies:
-                username = reply.get("username", "unknown")
-                create_time = datetime.fromtimestamp(reply.get("create_at", 0)/1000)
-                message = reply.get("message", "")
-                
-                thread_text += f"[REPLY] [{create_time}] {username}: {message}\n\n"
+            thread_text += f"[{'ROOT' if index == 0 else 'REPLY'}] [{create_time}] {username}: {message}\n\n"
             
         return types.GetPromptResult(
             description="Analyze Mattermost discussion thread",
@@ -885,6 +1652,62 @@ async def handle_list_tools() -> list[types.Tool]:
                 "required": ["user_id", "post_id", "emoji_name"],
             },
         ),
+        types.Tool(
+            name="post-messages",
+            description="Post several messages, each to a Mattermost channel, in one call",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "team_name": {"type": "string", "description": "Team of messages that do not name one"},
+                    "messages": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "team_name": {"type": "string"},
+                                "channel_name": {"type": "string"},
+                                "message": {"type": "string"},
+                            },
+                            "required": ["channel_name", "message"],
+                        },
+                    },
+                },
+                "required": ["messages"],
+            },
+        ),
+        types.Tool(
+            name="pin-messages",
+            description="Pin several messages in one call",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "post_ids": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["post_ids"],
+            },
+        ),
+        types.Tool(
+            name="add-reactions",
+            description="Add several reaction emojis to posts in one call",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "user_id": {"type": "string"},
+                    "reactions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "post_id": {"type": "string"},
+                                "emoji_name": {"type": "string"},
+                            },
+                            "required": ["post_id", "emoji_name"],
+                        },
+                    },
+                },
+                "required": ["user_id", "reactions"],
+            },
+        ),
         types.Tool(
             name="search-posts",
             description="Search for posts with specific keywords",
@@ -924,10 +1747,10 @@ async def handle_call_tool(
         try:
             post = await create_post(channel_id, message)
             
-            channel_name = channel_id_to_name.get(channel_id, channel_id)
+            channel_name = cache.channel_name(channel_id, channel_id)
             
-            # Notify clients that resources have changed
-            await server.request_context.session.send_resource_list_changed()
+            # Notify clients if the resource list has changed
+            resource_list_notifier.changed(server.request_context.session)
             
             return [
                 types.TextContent(
@@ -964,8 +1787,8 @@ async def handle_call_tool(
             
             channel = await create_channel(team_id, options)
             
-            # Notify clients that resources have changed
-            await server.request_context.session.send_resource_list_changed()
+            # Notify clients if the resource list has changed
+            resource_list_notifier.changed(server.request_context.session)
             
             return [
                 types.TextContent(
@@ -990,8 +1813,8 @@ async def handle_call_tool(
         try:
             pinned_post = await pin_post(post_id)
             
-            # Notify clients that resources have changed
-            await server.request_context.session.send_resource_list_changed()
+            # Notify clients if the resource list has changed
+            resource_list_notifier.changed(server.request_context.session)
             
             return [
                 types.TextContent(
@@ -1018,8 +1841,8 @@ async def handle_call_tool(
         try:
             reaction = await add_reaction(user_id, post_id, emoji_name)
             
-            # Notify clients that resources have changed
-            await server.request_context.session.send_resource_list_changed()
+            # Notify clients if the resource list has changed
+            resource_list_notifier.changed(server.request_context.session)
             
             return [
                 types.TextContent(
@@ -1043,62 +1866,27 @@ async def handle_call_tool(
             raise ValueError("Missing required argument: terms")
             
         try:
-            base_url = await get_mattermost_base_url()
-            headers = await get_mattermost_headers()
+            # Answer from the local index when it covers every channel, else ask the server
+            posts = await search_posts_local(terms, is_or_search)
+            searched_locally = posts is not None
+            if posts is None:
+                posts = await search_posts_api(terms, is_or_search)
             
-            search_params = {
-                "terms": terms,
-                "is_or_search": is_or_search
-            }
+            results = []
+            for post in posts:
+                channel_name = cache.channel_name(post.get("channel_id"), "unknown")
+                username = post.get("username") or "unknown"
+                create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
+                message = post.get("snippet") if searched_locally else post.get("message", "")
+                
+                results.append(f"[{create_time}] {username} in {channel_name}:\n{message}")
             
-            async with aiohttp.ClientSession() as session:
-                url = f"{base_url}/posts/search"
-                async with session.post(url, headers=headers, json=search_params) as response:
-                    if response.status == 200:
-                        search_results = await response.json()
-                        
-                        posts = []
-                        for post_id, post in search_results.get("posts", {}).items():
-                            channel_id = post.get("channel_id")
-                            channel_name = channel_id_to_name.get(channel_id, "unknown")
-                            username = post.get("username", "unknown")
-                            create_time = datetime.fromtimestamp(post.get("create_at", 0)/1000)
-                            message = post.get("message", "")
-                            
-                            posts.append({
-                                "id": post_id,
-                                "channel_name": channel_name,
-                                "username": username,
-                                "create_time": str(create_time),
-                                "message": message
-                            })
-                        
-                        # Update cache with these posts
-                        for post in posts:
-                            channel_id = post.get("channel_id")
-                            if channel_id in posts_cache:
-                                # Add to cache if not already present
-                                if not any(p.get("id") == post.get("id") for p in posts_cache[channel_id]):
-                                    posts_cache[channel_id].append(post)
-                        
-                        # Notify clients that resources have changed
-                        await server.request_context.session.send_resource_list_changed()
-                        
-                        return [
-                            types.TextContent(
-                                type="text",
-                                text=f"Search results for '{terms}':\n\n" + 
-                                     "\n\n".join([f"[{p['create_time']}] {p['username']} in {p['channel_name']}:\n{p['message']}" for p in posts])
-                            )
-                        ]
-                    else:
-                        error = await response.text()
-                        return [
-                            types.TextContent(
-                                type="text",
-                                text=f"Error searching posts. Status: {response.status}, Error: {error}",
-                            )
-                        ]
+            return [
+                types.TextContent(
+                    type="text",
+                    text=f"Search results for '{terms}':\n\n" + "\n\n".join(results)
+                )
+            ]
         except Exception as e:
             return [
                 types.TextContent(
@@ -1107,6 +1895,91 @@ async def handle_call_tool(
                 )
             ]
     
+    elif name == "post-messages":
+        default_team_name = arguments.get("team_name")
+        messages = arguments.get("messages")
+        
+        if not messages:
+            raise ValueError("Missing required argument: messages")
+        
+        targets = [(item.get("team_name") or default_team_name, item.get("channel_name")) for item in messages]
+        channel_ids = await resolve_channel_ids(targets)
+        
+        async def _post(target, message):
+            channel_id = channel_ids[target]
+            if isinstance(channel_id, BaseException):
+                raise channel_id
+            if not channel_id or not message:
+                raise ValueError("Missing required arguments: team_name or channel_name or message")
+            post = await create_post(channel_id, message)
+            return f"Post ID: {post.get('id')}"
+        
+        results = await gather_bounded(
+            (_post(target, item.get("message")) for target, item in zip(targets, messages)),
+            MATTERMOST_BATCH_CONCURRENCY,
+        )
+        if not all(isinstance(result, BaseException) for result in results):
+            # One check (and at most one notification) for the whole batch
+            resource_list_notifier.changed(server.request_context.session)
+        
+        labels = [f"channel '{channel_name}'" for _, channel_name in targets]
+        return [
+            types.TextContent(
+                type="text",
+                text=format_batch_results("Posted messages", labels, results),
+            )
+        ]
+    
+    elif name == "pin-messages":
+        post_ids = arguments.get("post_ids")
+        
+        if not post_ids:
+            raise ValueError("Missing required argument: post_ids")
+        
+        async def _pin(post_id):
+            await pin_post(post_id)
+            return "pinned"
+        
+        results = await gather_bounded((_pin(post_id) for post_id in post_ids), MATTERMOST_BATCH_CONCURRENCY)
+        if not all(isinstance(result, BaseException) for result in results):
+            # One check (and at most one notification) for the whole batch
+            resource_list_notifier.changed(server.request_context.session)
+        
+        return [
+            types.TextContent(
+                type="text",
+                text=format_batch_results("Pinned messages", [f"Post ID {post_id}" for post_id in post_ids], results),
+            )
+        ]
+    
+    elif name == "add-reactions":
+        user_id = arguments.get("user_id")
+        reactions = arguments.get("reactions")
+        
+        if not user_id or not reactions:
+            raise ValueError("Missing required arguments: user_id and reactions")
+        
+        async def _react(post_id, emoji_name):
+            if not post_id or not emoji_name:
+                raise ValueError("Missing required arguments: post_id and emoji_name")
+            await add_reaction(user_id, post_id, emoji_name)
+            return f"added :{emoji_name}:"
+        
+        results = await gather_bounded(
+            (_react(item.get("post_id"), item.get("emoji_name")) for item in reactions),
+            MATTERMOST_BATCH_CONCURRENCY,
+        )
+        if not all(isinstance(result, BaseException) for result in results):
+            # One check (and at most one notification) for the whole batch
+            resource_list_notifier.changed(server.request_context.session)
+        
+        return [
+            types.TextContent(
+                type="text",
+                text=format_batch_results("Added reactions", [f"Post ID {item.get('post_id')}" for item in reactions], results),
+            )
+        ]
+    
     raise ValueError(f"Unknown tool: {name}")
 
 async def create_channel(team_id: str, options: dict):
@@ -1114,30 +1987,32 @@ async def create_channel(team_id: str, options: dict):
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/channels"
-        options["team_id"] = team_id
-        async with session.post(url, headers=headers, json=options) as response:
-            if response.status == 201:
-                channel = await response.json()
-                return channel
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to create channel. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/channels"
+    options["team_id"] = team_id
+    async with session.post(url, headers=headers, json=options) as response:
+        if response.status == 201:
+            channel = await response.json()
+            # Update cache
+            cache.add_team_channel(channel)
+            return channel
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to create channel. Status: {response.status}, Error: {error}")
 
 async def pin_post(post_id: str):
     """Pin a post to a channel"""
     base_url = await get_mattermost_base_url()
     headers = await get_mattermost_headers()
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/posts/{post_id}/pin"
-        async with session.post(url, headers=headers) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to pin post. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/posts/{post_id}/pin"
+    async with session.post(url, headers=headers) as response:
+        if response.status == 200:
+            return await response.json()
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to pin post. Status: {response.status}, Error: {error}")
 
 async def add_reaction(user_id: str, post_id: str, emoji_name: str):
     """Add a reaction to a post"""
@@ -1150,33 +2025,67 @@ async def add_reaction(user_id: str, post_id: str, emoji_name: str):
         "emoji_name": emoji_name
     }
     
-    async with aiohttp.ClientSession() as session:
-        url = f"{base_url}/reactions"
-        async with session.post(url, headers=headers, json=reaction_data) as response:
-            if response.status == 201:
-                return await response.json()
-            else:
-                error = await response.text()
-                raise ValueError(f"Failed to add reaction. Status: {response.status}, Error: {error}")
+    session = await get_http_session()
+    url = f"{base_url}/reactions"
+    async with session.post(url, headers=headers, json=reaction_data) as response:
+        if response.status == 201:
+            return await response.json()
+        else:
+            error = await response.text()
+            raise ValueError(f"Failed to add reaction. Status: {response.status}, Error: {error}")
 
-async def main():
-    # Attempt to initialize Mattermost data
-    await initialize_mattermost_data()
-    
-    # Run the server using stdin/stdout streams
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="mattermost-mcp-server",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
-        )
+async def main(transport: str = MATTERMOST_MCP_TRANSPORT, host: str = MATTERMOST_MCP_HOST, port: int = MATTERMOST_MCP_PORT):
+    global websocket
+    await open_http_session()
+    try:
+        # Attempt to initialize Mattermost data
+        await initialize_mattermost_data()
+        
+        if MATTERMOST_WEBSOCKET:
+            websocket = MattermostWebSocket(
+                await get_mattermost_websocket_url(),
+                await get_mattermost_headers(),
+                get_http_session,
+                handle_websocket_event,
+                on_reconnect=handle_websocket_reconnect,
+            )
+            websocket.start()
+            # Without events the index cannot be kept current, so there is no point in backfilling
+            start_search_backfill()
+        
+        if transport == "http":
+            # One server (with its cache, index and websocket) for many clients
+            await streamable_http.serve(
+                server,
+                host,
+                port,
+                max_sessions=MATTERMOST_MCP_MAX_SESSIONS,
+                session_concurrency=MATTERMOST_MCP_SESSION_CONCURRENCY,
+                max_concurrency=MATTERMOST_MCP_MAX_CONCURRENCY,
+                session_idle_timeout=MATTERMOST_MCP_SESSION_IDLE_TIMEOUT,
+                stats=lambda: {"cache": cache.stats(), "http_pool": http_pool_stats()},
+                log_level=config.LOG_LEVEL.lower(),
+            )
+        elif transport == "stdio":
+            # Run the server using stdin/stdout streams
+            async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+        else:
+            raise ValueError(f"Unknown transport: {transport}")
+    finally:
+        if search_backfill_task is not None:
+            search_backfill_task.cancel()
+            await asyncio.gather(search_backfill_task, return_exceptions=True)
+        if websocket_catch_up_task is not None:
+            websocket_catch_up_task.cancel()
+            await asyncio.gather(websocket_catch_up_task, return_exceptions=True)
+        for task in digest_tasks.values():
+            task.cancel()
+        await asyncio.gather(*digest_tasks.values(), return_exceptions=True)
+        if websocket is not None:
+            await websocket.stop()
+        await resource_list_notifier.stop()
+        await close_http_session()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
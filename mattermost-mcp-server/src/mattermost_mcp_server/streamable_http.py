@@ -0,0 +1,292 @@
+import asyncio
+import contextlib
+import logging
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+import mcp.types as types
+import uvicorn
+from mcp.server.lowlevel import Server
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http import MCP_SESSION_ID_HEADER
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLimiter:
+    """
+    Concurrency limits of a server's requests, per client session and in total;
+    further requests wait for their turn.
+    """
+
+    def __init__(self, per_session: int, total: int):
+        self.per_session = per_session
+        self.total = asyncio.Semaphore(total)
+        self.max_total = total
+        self.active = 0
+        self.waiting = 0
+        self._sessions: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def install(self, server: Server):
+        """Wrap the server's request handlers (pings are answered without waiting)"""
+        for request_type, handler in list(server.request_handlers.items()):
+            if request_type is not types.PingRequest:
+                server.request_handlers[request_type] = self._limited(server, handler)
+
+    def _limited(self, server: Server, handler: Callable):
+        async def _handler(request):
+            session = server.request_context.session
+            semaphore = self._sessions.get(session)
+            if semaphore is None:
+                semaphore = self._sessions[session] = asyncio.Semaphore(self.per_session)
+            self.waiting += 1
+            try:
+                await semaphore.acquire()
+                try:
+                    await self.total.acquire()
+                except BaseException:
+                    semaphore.release()
+                    raise
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            try:
+                return await handler(request)
+            finally:
+                self.active -= 1
+                self.total.release()
+                semaphore.release()
+        return _handler
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_total,
+            "max_active_per_session": self.per_session,
+        }
+
+
+class _SessionSlots:
+    """
+    Admission of new client sessions, shared by the transports: a session
+    holds a slot from its admission, so sessions admitted at once cannot
+    pass max_sessions before the server starts running them.
+    """
+
+    def __init__(self, server: Server, max_sessions: int):
+        self.server = server
+        self.max_sessions = max_sessions
+        self.starting = 0  # Admitted sessions the server does not run yet
+        self.rejected = 0
+
+    def admit(self) -> Optional[Callable[[], None]]:
+        """Take a slot; returns the callback that hands it over to the running session, or None if all are taken"""
+        if self.max_sessions and self.server.active_sessions + self.starting >= self.max_sessions:
+            self.rejected += 1
+            return None
+        self.starting += 1
+        handed_over = False
+
+        def _started():
+            nonlocal handed_over
+            if not handed_over:
+                handed_over = True
+                self.starting -= 1
+        return _started
+
+
+class _SessionLimited:
+    """
+    ASGI endpoint that turns away new client sessions while all slots are
+    taken. app may call scope["mcp.session_started"]() right before the
+    server runs the session; otherwise the slot is handed over when the
+    request ends.
+    """
+
+    def __init__(self, app: Callable, slots: _SessionSlots, new_session: Callable[[Dict], bool]):
+        self.app = app
+        self.slots = slots
+        self.new_session = new_session
+
+    async def __call__(self, scope, receive, send):
+        if not self.new_session(scope):
+            await self.app(scope, receive, send)
+            return
+        started = self.slots.admit()
+        if started is None:
+            response = JSONResponse(
+                {"error": f"Too many sessions ({self.slots.max_sessions}), try again later"},
+                status_code=503,
+                headers={"Retry-After": "5"},
+            )
+            await response(scope, receive, send)
+            return
+        scope["mcp.session_started"] = started
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            started()
+
+
+class _IdleSessionReaper:
+    """
+    ASGI middleware of the Streamable HTTP session manager that terminates
+    sessions without requests for idle_timeout seconds (0 = never): the manager
+    keeps a session until its client deletes it, which clients that went away
+    never do, and keeps deleted sessions too, which the reaper forgets.
+    A session with a request in progress (e.g. its GET stream) is not idle.
+    Requests of terminated sessions get 404, which tells clients to start a new one.
+    """
+
+    def __init__(self, app: Callable, manager: StreamableHTTPSessionManager, idle_timeout: float):
+        self.app = app
+        self.manager = manager
+        self.idle_timeout = idle_timeout
+        self.reaped = 0
+        self._last_seen: Dict[str, float] = {}  # session ID -> end of its last request
+        self._in_progress: Dict[str, int] = {}  # session ID -> requests in progress
+
+    async def __call__(self, scope, receive, send):
+        session_id = _session_id(scope.get("headers", []))
+        if session_id is None:
+            # A new session: its ID is in the response
+            async def _send(message):
+                if message["type"] == "http.response.start":
+                    new_session_id = _session_id(message.get("headers", []))
+                    if new_session_id is not None:
+                        self._last_seen[new_session_id] = time.monotonic()
+                await send(message)
+            await self.app(scope, receive, _send)
+            return
+        if session_id not in self.manager._server_instances:
+            response = JSONResponse({"error": "Session not found"}, status_code=404)
+            await response(scope, receive, send)
+            return
+        if session_id not in self._last_seen:
+            await self.app(scope, receive, send)
+            return
+        self._in_progress[session_id] = self._in_progress.get(session_id, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_progress[session_id] -= 1
+            if not self._in_progress[session_id]:
+                del self._in_progress[session_id]
+            if session_id in self._last_seen:
+                self._last_seen[session_id] = time.monotonic()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 4, 1) if self.idle_timeout else 60)
+            await self.reap()
+
+    async def reap(self):
+        """Terminate the idle sessions and forget the terminated ones"""
+        expired = time.monotonic() - self.idle_timeout
+        # The manager has no API for this (and keeps sessions deleted by their
+        # clients): pyproject.toml bounds mcp to the versions checked to have it
+        sessions = self.manager._server_instances
+        for session_id, last_seen in list(self._last_seen.items()):
+            transport = sessions.get(session_id)
+            if transport is not None and not transport.is_terminated:
+                if not self.idle_timeout or last_seen > expired or session_id in self._in_progress:
+                    continue
+                logger.info(f"Terminating MCP session {session_id}, idle for {time.monotonic() - last_seen:.0f}s")
+                await transport.terminate()
+                self.reaped += 1
+            sessions.pop(session_id, None)
+            del self._last_seen[session_id]
+
+
+def _session_id(headers) -> Optional[str]:
+    for name, value in headers:
+        if name.decode().lower() == MCP_SESSION_ID_HEADER:
+            return value.decode()
+    return None
+
+
+def create_app(
+    server: Server,
+    max_sessions: int,
+    limiter: RequestLimiter,
+    stats: Callable[[], Dict],
+    session_idle_timeout: float = 0,
+) -> Starlette:
+    """
+    Starlette app serving one MCP server to many clients: Streamable HTTP at
+    /mcp, the legacy SSE transport at /sse (+ /messages/) and /stats.
+
+    server must count its running sessions in active_sessions (counting a
+    session as soon as its run starts). Streamable HTTP sessions idle for
+    session_idle_timeout seconds are terminated (0 = never).
+    """
+    manager = StreamableHTTPSessionManager(app=server)
+    sse = SseServerTransport("/messages/")
+    slots = _SessionSlots(server, max_sessions)
+
+    async def _sse(scope, receive, send):
+        async with sse.connect_sse(scope, receive, send) as (read_stream, write_stream):
+            scope["mcp.session_started"]()
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+
+    reaper = _IdleSessionReaper(manager.handle_request, manager, session_idle_timeout)
+    # Requests without a session ID start a new Streamable HTTP session
+    mcp_endpoint = _SessionLimited(reaper, slots, lambda scope: _session_id(scope.get("headers", [])) is None)
+    sse_endpoint = _SessionLimited(_sse, slots, lambda scope: True)
+
+    async def _stats(request):
+        return JSONResponse({
+            **stats(),
+            "sessions": server.active_sessions,
+            "max_sessions": max_sessions,
+            "rejected_sessions": slots.rejected,
+            "reaped_sessions": reaper.reaped,
+            "requests": limiter.stats(),
+        })
+
+    @contextlib.asynccontextmanager
+    async def _lifespan(app):
+        async with manager.run():
+            reaper_task = asyncio.create_task(reaper.run())
+            try:
+                yield
+            finally:
+                reaper_task.cancel()
+                await asyncio.gather(reaper_task, return_exceptions=True)
+
+    app = Starlette(
+        routes=[
+            Route("/mcp", endpoint=mcp_endpoint, methods=["GET", "POST", "DELETE"]),
+            Route("/sse", endpoint=sse_endpoint, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+            Route("/stats", endpoint=_stats),
+        ],
+        lifespan=_lifespan,
+    )
+    app.state.session_reaper = reaper
+    return app
+
+
+async def serve(
+    server: Server,
+    host: str,
+    port: int,
+    max_sessions: int,
+    session_concurrency: int,
+    max_concurrency: int,
+    stats: Callable[[], Dict],
+    session_idle_timeout: float = 0,
+    log_level: str = "info",
+):
+    """Serve the server over HTTP until cancelled"""
+    limiter = RequestLimiter(session_concurrency, max_concurrency)
+    limiter.install(server)
+    app = create_app(server, max_sessions, limiter, stats, session_idle_timeout)
+    logger.info(f"Serving MCP over Streamable HTTP at http://{host}:{port}/mcp and SSE at http://{host}:{port}/sse")
+    await uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level=log_level)).serve()
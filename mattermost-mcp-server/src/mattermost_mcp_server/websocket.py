@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class MattermostWebSocket:
+    """
+    Background subscription to the Mattermost websocket API.
+
+    Every event is passed to on_event; the connection is re-established with
+    exponential backoff, and on_reconnect is called with the time (seconds
+    since the epoch) of the last message before the disconnect, since when
+    events may have been missed.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        get_session: Callable[[], Awaitable[aiohttp.ClientSession]],
+        on_event: Callable[[Dict], Awaitable[None]],
+        on_reconnect: Optional[Callable[[float], None]] = None,
+        heartbeat: float = 30,
+        backoff_max: float = 60,
+    ):
+        self.url = url
+        self.headers = headers
+        self.get_session = get_session
+        self.on_event = on_event
+        self.on_reconnect = on_reconnect
+        self.heartbeat = heartbeat
+        self.backoff_max = backoff_max
+        self.connected = False
+        self.events = 0
+        self.last_message_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        delay = 1.0
+        was_connected = False
+        while True:
+            try:
+                session = await self.get_session()
+                async with session.ws_connect(self.url, headers=self.headers, heartbeat=self.heartbeat) as ws:
+                    logger.info(f"Connected to Mattermost websocket {self.url}")
+                    self.connected = True
+                    delay = 1.0
+                    if was_connected and self.on_reconnect is not None:
+                        self.on_reconnect(self.last_message_at)
+                    was_connected = True
+                    self.last_message_at = time.time()
+                    async for message in ws:
+                        self.last_message_at = time.time()
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            await self._dispatch(message.json())
+                        elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+                logger.warning("Mattermost websocket closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Mattermost websocket error: {str(e)}")
+            finally:
+                self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.backoff_max)
+
+    async def _dispatch(self, message: Dict):
+        # Replies to our own requests (status/seq_reply) have no event
+        if "event" not in message:
+            return
+        self.events += 1
+        try:
+            await self.on_event(message)
+        except Exception as e:
+            logger.error(f"Error handling websocket event {message.get('event')}: {str(e)}")
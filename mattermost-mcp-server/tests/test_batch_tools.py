@@ -0,0 +1,134 @@
+import asyncio
+import socket
+import types as pytypes
+
+from aiohttp import web
+from mcp.server.lowlevel.server import request_ctx
+
+from mattermost_mcp_server import server
+from mattermost_mcp_server.cache import MattermostCache
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _app(requests):
+    async def team(request):
+        if request.match_info["name"] != "team":
+            return web.Response(status=404, text="team not found")
+        return web.json_response({"id": "t1", "name": "team"})
+
+    async def channel(request):
+        name = request.match_info["name"]
+        if name == "missing":
+            return web.Response(status=404, text="channel not found")
+        return web.json_response({"id": f"id-{name}", "name": name, "team_id": "t1"})
+
+    async def posts(request):
+        body = await request.json()
+        requests.append(("post", body["channel_id"]))
+        if body["message"] == "too long":
+            return web.Response(status=400, text="message too long")
+        return web.json_response({"id": f"p{len(requests)}", **body}, status=201)
+
+    async def pin(request):
+        post_id = request.match_info["post_id"]
+        requests.append(("pin", post_id))
+        if post_id == "gone":
+            return web.Response(status=404, text="post not found")
+        return web.json_response({"status": "OK"})
+
+    async def reactions(request):
+        body = await request.json()
+        requests.append(("reaction", body["post_id"]))
+        return web.json_response(body, status=201)
+
+    app = web.Application()
+    app.router.add_get("/api/v4/teams/name/{name}", team)
+    app.router.add_get("/api/v4/teams/t1/channels/name/{name}", channel)
+    app.router.add_post("/api/v4/posts", posts)
+    app.router.add_post("/api/v4/posts/{post_id}/pin", pin)
+    app.router.add_post("/api/v4/reactions", reactions)
+    return app
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.changes = 0
+
+    def changed(self, session=None):
+        self.changes += 1
+
+
+def _call_tools(monkeypatch, calls):
+    port = _free_port()
+    monkeypatch.setattr(server, "MATTERMOST_URL", "127.0.0.1")
+    monkeypatch.setattr(server, "MATTERMOST_PORT", port)
+    monkeypatch.setattr(server, "cache", MattermostCache(max_bytes=0, ttl=300))
+    notifier = FakeNotifier()
+    monkeypatch.setattr(server, "resource_list_notifier", notifier)
+    requests = []
+
+    async def run():
+        runner = web.AppRunner(_app(requests))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        request_ctx.set(pytypes.SimpleNamespace(session=None))
+        try:
+            return [(await server.handle_call_tool(name, arguments))[0].text for name, arguments in calls]
+        finally:
+            await server.close_http_session()
+            await runner.cleanup()
+
+    return asyncio.run(run()), requests, notifier
+
+
+def test_post_messages_reports_each_item(monkeypatch):
+    messages = [
+        {"channel_name": "town", "message": "hello"},
+        {"channel_name": "missing", "message": "lost"},
+        {"channel_name": "dev", "message": "too long"},
+        {"team_name": "other", "channel_name": "town", "message": "wrong team"},
+        {"channel_name": "dev", "message": "hi dev"},
+    ]
+    (text,), requests, notifier = _call_tools(monkeypatch, [("post-messages", {"team_name": "team", "messages": messages})])
+
+    lines = text.splitlines()
+    assert lines[0] == "Posted messages: 2 succeeded, 3 failed."
+    assert lines[1].startswith("1. channel 'town': Post ID: p")
+    assert lines[2].startswith("2. channel 'missing': Error: Failed to get channel ID. Status: 404")
+    assert lines[3].startswith("3. channel 'dev': Error: Failed to create post. Status: 400")
+    assert lines[4].startswith("4. channel 'town': Error: Failed to get team ID. Status: 404")
+    assert lines[5].startswith("5. channel 'dev': Post ID: p")
+    # The failed items did not stop the others
+    assert sorted(requests) == [("post", "id-dev"), ("post", "id-dev"), ("post", "id-town")]
+    assert notifier.changes == 1
+
+
+def test_pin_messages_and_add_reactions_report_each_item(monkeypatch):
+    (pinned, reacted, all_failed), requests, notifier = _call_tools(monkeypatch, [
+        ("pin-messages", {"post_ids": ["p1", "gone", "p2"]}),
+        ("add-reactions", {"user_id": "u1", "reactions": [
+            {"post_id": "p1", "emoji_name": "tada"}, {"post_id": "p2"},
+        ]}),
+        ("pin-messages", {"post_ids": ["gone"]}),
+    ])
+
+    assert pinned.splitlines() == [
+        "Pinned messages: 2 succeeded, 1 failed.",
+        "1. Post ID p1: pinned",
+        "2. Post ID gone: Error: Failed to pin post. Status: 404, Error: post not found",
+        "3. Post ID p2: pinned",
+    ]
+    assert reacted.splitlines() == [
+        "Added reactions: 1 succeeded, 1 failed.",
+        "1. Post ID p1: added :tada:",
+        "2. Post ID p2: Error: Missing required arguments: post_id and emoji_name",
+    ]
+    assert all_failed.splitlines()[0] == "Pinned messages: 0 succeeded, 1 failed."
+    assert ("reaction", "p2") not in requests
+    # A batch where everything failed changes nothing
+    assert notifier.changes == 2
@@ -0,0 +1,85 @@
+from mattermost_mcp_server import cache as cache_module
+from mattermost_mcp_server.cache import BoundedCache, MattermostCache, estimate_size
+
+
+def test_least_recently_used_entries_are_evicted_with_callback():
+    size = estimate_size({"n": 0})
+    store = BoundedCache(max_bytes=2 * size, ttl=60)
+    evicted = []
+    store.on_evict("post", lambda key, value: evicted.append((key, value)))
+
+    store.put("post", "a", {"n": 0})
+    store.put("post", "b", {"n": 1})
+    store.get("post", "a")
+    store.put("post", "c", {"n": 2})
+
+    assert evicted == [("b", {"n": 1})]
+    assert store.get("post", "b") is None
+    assert store.bytes <= store.max_bytes
+    assert store.stats()["namespaces"]["post"]["evictions"] == 1
+
+
+def test_expired_entries_are_dropped_with_callback(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    store = BoundedCache(max_bytes=0, ttl=10)
+    evicted = []
+    store.on_evict("team", lambda key, value: evicted.append(key))
+
+    store.put("team", "t1", {"id": "t1"})
+    now[0] += 10
+    assert store.get("team", "t1") is None
+    assert evicted == ["t1"]
+    assert store.stats()["namespaces"]["team"]["expirations"] == 1
+
+
+def test_replacing_an_entry_does_not_call_the_callback():
+    store = BoundedCache(max_bytes=0, ttl=60)
+    evicted = []
+    store.on_evict("post", lambda key, value: evicted.append(key))
+    store.put("post", "a", {"n": 0})
+    store.put("post", "a", {"n": 1})
+    assert evicted == []
+    assert store.get("post", "a") == {"n": 1}
+
+
+def test_evicted_teams_and_channels_leave_the_name_indexes():
+    team = {"id": "t1", "name": "team"}
+    channel = {"id": "c1", "team_id": "t1", "name": "town-square"}
+    cache = MattermostCache(max_bytes=estimate_size(team) + estimate_size(channel), ttl=60)
+    cache.put_team(team)
+    cache.put_channel(channel)
+    assert cache.team_id("team") == "t1"
+    assert cache.channel_id("t1", "town-square") == "c1"
+
+    # A large post pushes both out of the cache
+    cache.put_post({"id": "p1", "message": "x" * 20})
+
+    assert cache.team_id("team") is None
+    assert cache.channel_id("t1", "town-square") is None
+    assert cache.stats()["indexed_team_names"] == 0
+    assert cache.stats()["indexed_channel_names"] == 0
+
+
+def test_lists_are_incomplete_once_a_member_is_evicted():
+    cache = MattermostCache(max_bytes=0, ttl=60)
+    cache.set_team_channels("t1", [{"id": "c1", "team_id": "t1", "name": "a"}, {"id": "c2", "team_id": "t1", "name": "b"}])
+    assert [channel["id"] for channel in cache.team_channels("t1")] == ["c1", "c2"]
+    cache.store.pop("channel", "c2")
+    assert cache.team_channels("t1") is None
+
+
+def test_member_channel_ids_outlive_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = MattermostCache(max_bytes=0, ttl=10)
+    assert cache.member_channel_ids() is None
+    cache.set_teams([{"id": "t1", "name": "team"}])
+    cache.set_team_channels("t1", [{"id": "c1", "team_id": "t1", "name": "a"}])
+    cache.add_team_channel({"id": "c2", "team_id": "t1", "name": "b"})
+
+    now[0] += 10
+    assert cache.teams() is None
+    assert cache.member_channel_ids() == ["c1", "c2"]
+    cache.clear()
+    assert cache.member_channel_ids() is None
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mattermost_mcp_server import server
+from mattermost_mcp_server.cache import MattermostCache
+from mattermost_mcp_server.digest import estimate_tokens
+
+
+def _history(days=7, per_day=20):
+    """Posts of the last days, oldest first; today's are from the last hours"""
+    now = datetime.now()
+    posts = []
+    for days_ago in range(days - 1, -1, -1):
+        start = now - timedelta(hours=per_day) if days_ago == 0 else (now - timedelta(days=days_ago)).replace(hour=1)
+        for n in range(per_day):
+            create_at = int((start + timedelta(minutes=30 * n)).timestamp() * 1000)
+            posts.append({
+                "id": f"d{days_ago}-{n}",
+                "channel_id": "c1",
+                "user_id": f"u{n % 3}",
+                "username": f"user{n % 3}",
+                "create_at": create_at,
+                "message": f"day {days_ago} post {n}: " + "status update about the release " * 5,
+            })
+    return posts
+
+
+def test_summary_stays_within_budget_and_reuses_cached_digests(monkeypatch):
+    posts = _history()
+    walked = []
+    digested = []
+    digest_posts = server.digest_posts
+
+    async def walk_channel_posts(channel_id):
+        for end in range(len(posts), 0, -25):
+            walked.append(end)
+            yield posts[max(end - 25, 0):end]
+
+    async def fetch_usernames(posts):
+        return {}
+
+    def counting_digest_posts(day, day_posts, usernames):
+        digested.append(day)
+        return digest_posts(day, day_posts, usernames)
+
+    monkeypatch.setattr(server, "cache", MattermostCache(max_bytes=0, ttl=300))
+    monkeypatch.setattr(server, "walk_channel_posts", walk_channel_posts)
+    monkeypatch.setattr(server, "fetch_usernames", fetch_usernames)
+    monkeypatch.setattr(server, "digest_posts", counting_digest_posts)
+
+    def summarize(max_tokens):
+        walked.clear()
+        digested.clear()
+        return asyncio.run(server.build_channel_summary("c1", days=7, max_tokens=max_tokens)), len(walked), list(digested)
+
+    summary, first_walk, first_digested = summarize(1500)
+    assert estimate_tokens(summary) <= 1500
+    digests, recent = summary.split("Most recent messages:")
+    assert digests.startswith("Digest of earlier days:")
+    # The tail holds the newest posts, the digests cover the days before it
+    assert posts[-1]["message"] in recent
+    past_days = [day for day in first_digested if day < datetime.now().date()]
+    assert past_days and all(server.cached_digest("c1", day) for day in past_days)
+
+    summary_again, second_walk, second_digested = summarize(1500)
+    assert summary_again == summary
+    # Cached digests are reused: no past day is digested again, and the walk stops after the tail
+    assert [day for day in second_digested if day < datetime.now().date()] == []
+    assert second_walk < first_walk
+
+    small, _, _ = summarize(300)
+    assert estimate_tokens(small) <= 300
@@ -0,0 +1,78 @@
+import asyncio
+import socket
+import time
+
+from aiohttp import web
+
+from mattermost_mcp_server import server
+from mattermost_mcp_server.cache import MattermostCache
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _posts(*posts):
+    return web.json_response({"order": [post["id"] for post in reversed(posts)], "posts": {post["id"]: post for post in posts}})
+
+
+ROOT = {"id": "root", "channel_id": "c1", "root_id": "", "message": "question", "create_at": 1}
+
+
+def _reply(post_id, message, create_at, **fields):
+    return {"id": post_id, "channel_id": "c1", "root_id": "root", "message": message, "create_at": create_at, **fields}
+
+
+def _app(requests):
+    async def thread(request):
+        requests.append(("thread", request.match_info["post_id"]))
+        return _posts(ROOT, _reply("r1", "first answer", 2), _reply("r2", "second answer", 3))
+
+    async def channel_posts(request):
+        requests.append(("since", int(request.query["since"])))
+        return _posts(
+            _reply("r1", "first answer (edited)", 2),
+            _reply("r2", "second answer", 3, delete_at=4),
+            {"id": "other", "channel_id": "c1", "root_id": "", "message": "unrelated", "create_at": 4},
+            _reply("r3", "third answer", 5),
+        )
+
+    app = web.Application()
+    app.router.add_get("/api/v4/posts/{post_id}/thread", thread)
+    app.router.add_get("/api/v4/channels/c1/posts", channel_posts)
+    return app
+
+
+def test_cached_threads_are_refreshed_with_the_changes_since_the_last_fetch(monkeypatch):
+    port = _free_port()
+    monkeypatch.setattr(server, "MATTERMOST_URL", "127.0.0.1")
+    monkeypatch.setattr(server, "MATTERMOST_PORT", port)
+    monkeypatch.setattr(server, "websocket", None)
+    monkeypatch.setattr(server, "search_index", None)
+    monkeypatch.setattr(server, "cache", MattermostCache(max_bytes=0, ttl=300))
+    requests = []
+
+    async def run():
+        runner = web.AppRunner(_app(requests))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            first = await server.fetch_thread("r1")
+            refreshed = await server.fetch_thread("r1")
+            return first, refreshed
+        finally:
+            await server.close_http_session()
+            await runner.cleanup()
+
+    started = int(time.time() * 1000)
+    first, refreshed = asyncio.run(run())
+
+    assert [post["message"] for post in first] == ["question", "first answer", "second answer"]
+    assert [post["message"] for post in refreshed] == ["question", "first answer (edited)", "third answer"]
+    # The whole thread was fetched once; the refresh asked for the channel's changes since then
+    assert requests[0] == ("thread", "r1")
+    assert requests[1][0] == "since"
+    assert started - 2 * server.WEBSOCKET_CATCH_UP_MARGIN * 1000 < requests[1][1] <= started
+    assert len(requests) == 2
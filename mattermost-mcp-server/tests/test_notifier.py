@@ -0,0 +1,87 @@
+import asyncio
+
+from mattermost_mcp_server.notifier import ResourceListNotifier
+
+
+class FakeSession:
+    def __init__(self):
+        self.notified = 0
+
+    async def send_resource_list_changed(self):
+        self.notified += 1
+
+
+def test_changes_within_the_window_are_coalesced():
+    async def run():
+        uris = ["a"]
+
+        async def list_uris():
+            return uris
+
+        notifier = ResourceListNotifier(list_uris, window=0.01)
+        session = FakeSession()
+        notifier.listed(session, ["a"])
+        uris = ["a", "b"]
+        for _ in range(5):
+            notifier.changed()
+        await notifier._task
+        notifier.changed()
+        await notifier._task
+        return notifier, session
+
+    notifier, session = asyncio.run(run())
+    assert session.notified == 1
+    assert (notifier.sent, notifier.suppressed) == (1, 1)
+
+
+def test_a_change_while_listing_is_checked_again():
+    async def run():
+        uris = ["a"]
+        listing = asyncio.Event()
+        proceed = asyncio.Event()
+
+        async def list_uris():
+            current = list(uris)
+            listing.set()
+            await proceed.wait()
+            return current
+
+        notifier = ResourceListNotifier(list_uris, window=0.01)
+        session = FakeSession()
+        notifier.listed(session, ["a"])
+        notifier.changed()
+        await listing.wait()
+        # The resource appears after the listing has started
+        uris.append("b")
+        notifier.changed()
+        proceed.set()
+        await notifier._task
+        return notifier, session
+
+    notifier, session = asyncio.run(run())
+    assert session.notified == 1
+    assert notifier._listed[session] == frozenset(["a", "b"])
+
+
+def test_a_failed_listing_is_logged_and_later_changes_still_notify(caplog):
+    async def run():
+        calls = []
+
+        async def list_uris():
+            calls.append(None)
+            if len(calls) == 1:
+                raise ValueError("Mattermost is down")
+            return ["a", "b"]
+
+        notifier = ResourceListNotifier(list_uris, window=0.01)
+        session = FakeSession()
+        notifier.listed(session, ["a"])
+        notifier.changed()
+        await notifier._task
+        notifier.changed()
+        await notifier._task
+        return session
+
+    session = asyncio.run(run())
+    assert session.notified == 1
+    assert "Mattermost is down" in caplog.text
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+from mattermost_mcp_server.search_index import PostSearchIndex, to_fts_query
+
+
+def test_terms_are_quoted_and_joined():
+    assert to_fts_query("deploy failed") == '"deploy" "failed"'
+    assert to_fts_query("deploy failed", is_or_search=True) == '"deploy" OR "failed"'
+    assert to_fts_query('"release notes" deploy*') == '"release notes" "deploy"*'
+
+
+def test_quotes_inside_terms_are_escaped():
+    assert to_fts_query('say"hi') == '"say""hi"'
+
+
+def test_server_only_modifiers_are_not_translated():
+    for terms in ["from:alice deploy", "in:town-square deploy", "deploy -staging", "after:2024-01-01", "channel:dev x"]:
+        assert to_fts_query(terms) is None
+    assert to_fts_query("") is None
+    assert to_fts_query('""') is None
+
+
+def test_queries_run_against_the_index():
+    index = PostSearchIndex()
+    index.add_posts([
+        {"id": "p1", "channel_id": "c1", "message": "the deploy failed again", "create_at": 1},
+        {"id": "p2", "channel_id": "c1", "message": "deployment notes", "create_at": 2},
+    ])
+    assert [post["id"] for post in index.search(to_fts_query("deploy failed"))] == ["p1"]
+    assert sorted(post["id"] for post in index.search(to_fts_query("deploy*"))) == ["p1", "p2"]
+    # FTS5 operators in the terms are words to look for, not query syntax
+    assert index.search(to_fts_query("NOT deploy OR")) == []
+
+
+def test_changes_on_the_event_loop_are_written_in_a_worker_thread(tmp_path):
+    path = str(tmp_path / "index.db")
+    index = PostSearchIndex(path)
+    writers = []
+    write_pending = index._write_pending
+
+    def _write_pending():
+        writers.append(threading.current_thread())
+        write_pending()
+
+    index._write_pending = _write_pending
+
+    async def run():
+        index.add_posts([{"id": "p1", "channel_id": "c1", "message": "deploy failed"}])
+        index.add_posts([{"id": "p2", "channel_id": "c1", "message": "deploy fixed"}])
+        index.remove_post("p1")
+        index.mark_covered("c1")
+        # Queued, not written yet: the coverage is known right away
+        assert index.stats()["pending_writes"] == 4
+        assert index.covers(["c1"])
+        await index.flush()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert writers and loop_thread not in writers
+    assert index.stats()["pending_writes"] == 0
+    assert [post["id"] for post in index.search(to_fts_query("deploy"))] == ["p2"]
+    assert PostSearchIndex(path).covered_channels() == {"c1"}
@@ -0,0 +1,127 @@
+import asyncio
+import contextvars
+import types as pytypes
+
+import httpx
+import mcp.types as types
+from mcp.server.lowlevel import Server
+from mcp.server.streamable_http import MCP_SESSION_ID_HEADER
+
+from mattermost_mcp_server.streamable_http import RequestLimiter, create_app
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}},
+}
+HEADERS = {"accept": "application/json, text/event-stream"}
+
+
+class CountingServer(Server):
+    """Counts its running sessions, as create_app requires"""
+
+    active_sessions = 0
+
+    async def run(self, *args, **kwargs):
+        self.active_sessions += 1
+        try:
+            return await super().run(*args, **kwargs)
+        finally:
+            self.active_sessions -= 1
+
+
+class FakeSession:
+    """Client session of a request (the limiter keeps them by weak reference)"""
+
+
+def _serve(max_sessions=0, session_idle_timeout=0):
+    server = CountingServer("test")
+    limiter = RequestLimiter(per_session=4, total=8)
+    app = create_app(server, max_sessions, limiter, dict, session_idle_timeout)
+    return server, app
+
+
+async def _initialize(client):
+    return await client.post("/mcp", json=INITIALIZE, headers=HEADERS)
+
+
+def test_sessions_initialized_at_once_cannot_pass_the_limit():
+    async def run():
+        server, app = _serve(max_sessions=2)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+                responses = await asyncio.gather(*(_initialize(client) for _ in range(5)))
+                stats = (await client.get("/stats")).json()
+        return [response.status_code for response in responses], stats
+
+    statuses, stats = asyncio.run(run())
+    assert sorted(statuses) == [200, 200, 503, 503, 503]
+    assert stats["rejected_sessions"] == 3
+
+
+def test_idle_sessions_are_terminated():
+    async def run():
+        server, app = _serve(max_sessions=1, session_idle_timeout=0.2)
+        reaper = app.state.session_reaper
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+                session_id = (await _initialize(client)).headers[MCP_SESSION_ID_HEADER]
+                await reaper.reap()
+                # Still running: a second session is turned away
+                assert (await _initialize(client)).status_code == 503
+
+                await asyncio.sleep(0.3)
+                await reaper.reap()
+                await asyncio.sleep(0.1)
+                assert server.active_sessions == 0
+                expired = await client.post(
+                    "/mcp",
+                    json={"jsonrpc": "2.0", "id": 2, "method": "ping"},
+                    headers={**HEADERS, MCP_SESSION_ID_HEADER: session_id},
+                )
+                assert expired.status_code == 404
+                assert (await _initialize(client)).status_code == 200
+                return reaper.reaped
+
+    assert asyncio.run(run()) == 1
+
+
+def test_requests_wait_for_the_session_and_total_limits():
+    request_ctx = contextvars.ContextVar("request_ctx")
+    running = {"now": 0, "max": 0}
+
+    async def handler(request):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return request
+
+    class FakeServer:
+        request_handlers = {types.CallToolRequest: handler, types.PingRequest: handler}
+
+        @property
+        def request_context(self):
+            return request_ctx.get()
+
+    async def call(limiter, server, session):
+        request_ctx.set(pytypes.SimpleNamespace(session=session))
+        return await server.request_handlers[types.CallToolRequest]("request")
+
+    async def run(per_session, total, sessions):
+        server = FakeServer()
+        server.request_handlers = dict(FakeServer.request_handlers)
+        limiter = RequestLimiter(per_session, total)
+        limiter.install(server)
+        assert server.request_handlers[types.PingRequest] is handler
+        running["max"] = 0
+        await asyncio.gather(*(call(limiter, server, session) for session in sessions for _ in range(4)))
+        return running["max"], limiter.stats()
+
+    session = FakeSession()
+    max_running, stats = asyncio.run(run(per_session=2, total=8, sessions=[session]))
+    assert max_running == 2
+    assert (stats["active"], stats["waiting"]) == (0, 0)
+    max_running, _ = asyncio.run(run(per_session=2, total=3, sessions=[FakeSession() for _ in range(3)]))
+    assert max_running == 3
@@ -0,0 +1,80 @@
+import asyncio
+import socket
+
+from aiohttp import web
+
+from mattermost_mcp_server import server
+from mattermost_mcp_server.cache import MattermostCache
+from mattermost_mcp_server.search_index import PostSearchIndex
+
+SINCE = 1_000_000
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _posts(*posts):
+    return web.json_response({"order": [post["id"] for post in posts], "posts": {post["id"]: post for post in posts}})
+
+
+def _app(requests):
+    async def posts(request):
+        requests.append(dict(request.query))
+        if "since" in request.query:
+            return _posts(
+                {"id": "old", "channel_id": "c1", "message": "old", "create_at": 1, "delete_at": SINCE + 1},
+                {"id": "edited", "channel_id": "c1", "message": "edited later", "create_at": 2},
+                {"id": "missed", "channel_id": "c1", "message": "missed while away", "create_at": SINCE + 2},
+            )
+        return _posts(
+            {"id": "old", "channel_id": "c1", "message": "old", "create_at": 1},
+            {"id": "edited", "channel_id": "c1", "message": "edited", "create_at": 2},
+        )
+
+    async def teams(request):
+        return web.json_response([{"id": "t1", "name": "team"}])
+
+    async def channels(request):
+        return web.json_response([{"id": "c1", "name": "town", "team_id": "t1"}])
+
+    app = web.Application()
+    app.router.add_get("/api/v4/users/me/teams", teams)
+    app.router.add_get("/api/v4/users/me/teams/t1/channels", channels)
+    app.router.add_get("/api/v4/channels/c1/posts", posts)
+    return app
+
+
+def test_reconnect_applies_the_changes_since_the_last_message(monkeypatch):
+    port = _free_port()
+    index = PostSearchIndex()
+    monkeypatch.setattr(server, "MATTERMOST_URL", "127.0.0.1")
+    monkeypatch.setattr(server, "MATTERMOST_PORT", port)
+    monkeypatch.setattr(server, "MATTERMOST_SEARCH_BACKFILL", False)
+    monkeypatch.setattr(server, "search_index", index)
+    monkeypatch.setattr(server, "cache", MattermostCache(max_bytes=0, ttl=300, search_index=index))
+    requests = []
+
+    async def run():
+        runner = web.AppRunner(_app(requests))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            async for _ in server.fetch_posts("c1"):
+                pass
+            server.handle_websocket_reconnect(SINCE / 1000 + server.WEBSOCKET_CATCH_UP_MARGIN)
+            await server.websocket_catch_up_task
+        finally:
+            await server.close_http_session()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+    assert requests[-1]["since"] == str(SINCE)
+    assert [post["message"] for post in server.cache.channel_posts("c1")] == ["edited later", "missed while away"]
+    # The channel stays indexed: nothing has to be fetched again
+    assert index.covered_channels() == {"c1"}
+    assert [post["id"] for post in index.search("missed")] == ["missed"]
+    assert index.search("old") == []
@@ -147,7 +147,9 @@ class LangGraphAgent:
         logger.info(f"System Prompt: {self.system_prompt_template}")
         
         if self.name == "github":            
-            github_tools = [tool for tool in self.tools if tool.name.lower() in ["list_issues", "list_pull_requests"]]
+            # MCP tools are named "<server>_<tool>"; the plain tool name is in the metadata
+            github_tools = [tool for tool in self.tools
+                            if (tool.metadata or {}).get("mcp_tool", tool.name).lower() in ["list_issues", "list_pull_requests"]]
             
             github_context = ""
             for tool in github_tools:
@@ -100,12 +100,12 @@ class MattermostBaseBot:
         """Mattermostからのコマンドメッセージを処理"""
         logger.info(f"Handling command: {message_text=}, {user_id=}, {channel_id=}, {post_id=} {root_id=}")
 
-    async def send_response(self, channel_id, message, root_id=None):
-        """Mattermostチャンネルに応答を送信"""
+    async def send_response(self, channel_id, message, root_id=None, file_ids=None):
+        """Mattermostチャンネルに応答を送信（file_idsでアップロード済みファイルを添付）"""
         if channel_id is None:
             logger.warning(f"Channel id is not sent, using default channel - {self.channel_id}")
             channel_id = self.channel_id
-        self.mattermost_client.post_message(channel_id, message, root_id)
+        self.mattermost_client.post_message(channel_id, message, root_id, file_ids=file_ids)
 
     async def run(self):
         """実行"""
@@ -1,4 +1,10 @@
-from mattermost_mcp_host.mcp_client import MCPClient
+from mattermost_mcp_host.mcp_client import ToolIndex
+from mattermost_mcp_host.mcp_pool import create_mcp_client, sticky_routing_key
+from mattermost_mcp_host.mcp_supervisor import MCPSupervisor
+from mattermost_mcp_host.mcp_limiter import fair_queue_key
+from mattermost_mcp_host.mcp_progress import MattermostStatusPost, progress_reporter
+from mattermost_mcp_host.mcp_content import MattermostAttachments, attachment_sink
+from mattermost_mcp_host.mcp_gateway import gateway_client_config
 from mattermost_mcp_host.agent.utils import get_thread_history
 import mattermost_mcp_host.config as config
 from mattermost_mcp_host.agent import LangGraphAgent
@@ -30,8 +36,95 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
     def __init__(self):
         super().__init__()
         self.mcp_clients = {}  # 複数のMCPクライアントを格納するdict
+        self.server_tools = {}  # サーバー名 -> LangChainツールのリスト
+        self.tool_index = ToolIndex()  # "<サーバー名>.<ツール名>" -> (クライアント, ツール)
         self.command_prefix = config.COMMAND_PREFIX
-        
+        self.agent = None
+        self._startup_tasks = set()  # クォーラム到達後も接続中のサーバー
+        self._request_tasks = set()  # 処理中のLLMリクエスト（1リクエスト1タスク）
+        self.supervisor = MCPSupervisor(self.mcp_clients)  # ヘルスチェックと再起動
+
+    async def _connect_server(self, server_name, server_config):
+        """1つのMCPサーバーに接続し、ツールをLangChainツールに変換"""
+        timeout = server_config.get('connect_timeout', config.MCP_CONNECT_TIMEOUT)
+        if config.MCP_GATEWAY_URL or config.MCP_GATEWAY_SOCKET:
+            # サーバーは共有ゲートウェイが起動済み
+            server_config = gateway_client_config(server_name, server_config)
+        client = create_mcp_client(server_config=server_config, name=server_name)
+        await client.connect(timeout=timeout)
+        try:
+            langchain_tools = await asyncio.wait_for(client.convert_mcp_tools_to_langchain(), timeout)
+        except BaseException:
+            await client.close()
+            raise
+        self.mcp_clients[server_name] = client
+        self.server_tools[server_name] = langchain_tools
+        self.tool_index.update_server(server_name, client, await client.list_tools())
+        client.add_tools_changed_listener(self._on_tools_changed)
+        logger.info(f"Connected to MCP server '{server_name}' via {client.server_type}")
+        wait_started = getattr(client, 'wait_started', None)
+        if wait_started is not None:
+            # スナップショットから構築したサーバーは、実際に起動してからクォーラムに数える
+            # (起動に失敗してもツールは残り、スーパーバイザーが再起動する)
+            await wait_started()
+
+    async def _on_tools_changed(self, client):
+        """サーバーのツールカタログが変化したときにインデックスとエージェントを更新"""
+        server_name = client.name
+        logger.info(f"Reloading tools of MCP server '{server_name}'")
+        self.server_tools[server_name] = await client.convert_mcp_tools_to_langchain()
+        self.tool_index.update_server(server_name, client, await client.list_tools())
+        if self.agent is not None:
+            self.agent.set_tools(self._collect_tools())
+
+    async def _connect_servers(self, server_configs):
+        """
+        すべてのMCPサーバーに並行して接続し、クォーラムに達したら戻る
+
+        クォーラム到達時点でまだ接続中のサーバーは、準備ができ次第エージェントに追加される
+        """
+        quorum = config.MCP_STARTUP_QUORUM or len(server_configs)
+        quorum = min(quorum, len(server_configs))
+
+        pending = {
+            asyncio.create_task(self._connect_server(server_name, server_config)): server_name
+            for server_name, server_config in server_configs.items()
+        }
+        ready = 0
+        while pending and ready < quorum:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                ready += self._log_connect_result(pending.pop(task), task)
+
+        if pending:
+            logger.info(f"Quorum of {quorum} MCP servers reached; still connecting: {', '.join(pending.values())}")
+        for task, server_name in pending.items():
+            self._startup_tasks.add(task)
+            task.add_done_callback(lambda t, name=server_name: self._on_late_server(name, t))
+
+    def _log_connect_result(self, server_name, task):
+        """接続タスクの結果をログに記録し、成功したかどうかを返す"""
+        if task.cancelled():
+            logger.warning(f"Connection to MCP server '{server_name}' was cancelled")
+            return False
+        error = task.exception()
+        if error is not None:
+            # 1つが失敗しても他のサーバーで続行
+            logger.error(f"Failed to connect to MCP server '{server_name}': {str(error)}")
+            return False
+        return True
+
+    def _on_late_server(self, server_name, task):
+        """クォーラム到達後に接続が完了したサーバーのツールをエージェントに追加"""
+        self._startup_tasks.discard(task)
+        if self._log_connect_result(server_name, task) and self.agent is not None:
+            logger.info(f"Attaching late MCP server '{server_name}' to the agent")
+            self.agent.set_tools(self._collect_tools())
+
+    def _collect_tools(self):
+        """接続済みの全サーバーのツールを1つのリストにまとめる"""
+        return [tool for tools in self.server_tools.values() for tool in tools]
+
     async def initialize(self):
         """Mattermostクライアントを初期化し、Websocket経由で接続"""
         
@@ -40,30 +133,19 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
             server_configs = load_server_configs()
             logger.info(f"Found {len(server_configs)} MCP servers in config")
             
-            all_langchain_tools = []
-            # 各MCPクライアントの初期化
-            for server_name, server_config in server_configs.items():
-                try:
-                    client = MCPClient(server_config=server_config)
-
-                    await client.connect()
-                    self.mcp_clients[server_name] = client
-                    lanchain_tools = await client.convert_mcp_tools_to_langchain()
-                    all_langchain_tools.extend(lanchain_tools)
-                    logger.info(f"Connected to MCP server '{server_name}' via stdio")
-                except Exception as e:
-                    logger.error(f"Failed to connect to MCP server '{server_name}': {str(e)}")
-                    # 1つが失敗しても他のサーバーで続行
-                    continue
+            # 各MCPクライアントを並行して初期化
+            await self._connect_servers(server_configs)
             
             if not self.mcp_clients:
                 raise ValueError("No MCP servers could be connected")
+            self.supervisor.start()
 
         except Exception as e:
             logger.error(f"Failed to initialize MCP servers: {str(e)}")
             raise
         
         # エージェントツールのセットアップ
+        all_langchain_tools = self._collect_tools()
         logger.info(f"Setting up agent with {all_langchain_tools} tools")
         logger.info(f"Number of tools : {len(all_langchain_tools)}")
 
@@ -94,28 +176,26 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
             user_id: 会話履歴を追跡するためのユーザーID
             post_id: スレッド化のための投稿ID
         """
+        # スレッド履歴の取得 - post_idが存在する場合、それが新しいスレッドのルート
+        root_id = post_id if root_id is None or root_id == "" else root_id
+        # 長時間実行ツールの進捗はスレッド内の1つのステータス投稿に表示（レート制限付きで編集）
+        status = MattermostStatusPost(self.mattermost_client, channel_id, root_id)
+        # ツールが返した画像やファイルはこのチャンネルにアップロードして応答に添付
+        attachments = MattermostAttachments(self.mattermost_client, channel_id)
+        # リクエスト単位のコンテキスト変数（finallyで元に戻し、次のリクエストに漏らさない）
+        tokens = [
+            (progress_reporter, progress_reporter.set(status)),
+            # ステートフルなツールは同じスレッド内で同じセッションにルーティング
+            (sticky_routing_key, sticky_routing_key.set(root_id)),
+            (fair_queue_key, fair_queue_key.set(root_id)),
+            (attachment_sink, attachment_sink.set(attachments)),
+        ]
         try:
-            # スレッド履歴の取得 - post_idが存在する場合、それが新しいスレッドのルート
-            root_id = post_id if root_id is None or root_id == "" else root_id
             logger.info(f"Fetching thread history for root_id: {root_id}")
             
             # タイピングインジケーターの送信
             # await self.send_response(channel_id, "Processing your request...", root_id)
             
-            # 接続されているすべてのMCPサーバーから利用可能なツールを収集
-            all_tools = {}
-            for server_name, client in self.mcp_clients.items():
-                try:
-                    server_tools = await client.list_tools()
-                    # 競合を避けるためにツール名にサーバー名のプレフィックスを追加
-                    prefixed_tools = {
-                        f"{server_name}.{name}": tool 
-                        for name, tool in server_tools.items()
-                    }
-                    all_tools.update(prefixed_tools)
-                except Exception as e:
-                    logger.error(f"Error getting tools from {server_name}: {str(e)}")
-            
             # スレッド履歴の取得（新しい会話の場合は空）
             thread_history = await get_thread_history(self.mattermost_client.driver, root_id, channel_id)
             
@@ -138,6 +218,9 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
                 }
             )
             
+            # 応答の前にステータス投稿を削除
+            await status.close()
+
             # エージェントのメッセージから最終応答を抽出
             responses = self.agent.extract_response(result["messages"])
             logger.info(f"Agent response: {responses}")
@@ -146,12 +229,21 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
             # 重複を避けるために以前のエージェントの応答を除外
             for response in responses:
                 if response not in previous_agent_responses:
-                    await self.send_response(channel_id, response or "No response generated", root_id)
+                    await self.send_response(
+                        channel_id, response or "No response generated", root_id, file_ids=attachments.take_file_ids()
+                    )
+            # 1つの投稿に添付しきれなかったファイル
+            while attachments:
+                await self.send_response(channel_id, "", root_id, file_ids=attachments.take_file_ids())
                 
         except Exception as e:
             logger.error(f"Error handling LLM request: {str(e)}")
             logger.error(traceback.format_exc())
             await self.send_response(channel_id, f"Error processing your request: {str(e)}", root_id)
+        finally:
+            await status.close()
+            for var, token in reversed(tokens):
+                var.reset(token)
 
     async def handle_message(self, post):
         """Mattermostからの受信メッセージを処理"""
@@ -186,7 +278,10 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
                 await self.handle_command(channel_id, message, user_id, post_id, root_id)
             else:
                 # LLMへのダイレクトメッセージ
-                await self.handle_llm_request(channel_id, message, user_id, post_id, root_id)
+                # 各リクエストは独自のタスクで実行：受信ループを止めず、複数スレッドがフェアキューで交互に処理される
+                task = asyncio.create_task(self.handle_llm_request(channel_id, message, user_id, post_id, root_id))
+                self._request_tasks.add(task)
+                task.add_done_callback(self._request_tasks.discard)
                 
         except Exception as e:
             logger.error(f"Error handling message: {str(e)}")
@@ -275,6 +370,17 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
                         tool_args = {parameter_name: parameter_value}
                         logger.info(f"Calling tool {tool_name} with key-value inputs: {tool_args}")
                 
+                # 名前空間付きインデックスからツールを解決
+                entry = self.tool_index.resolve(ToolIndex.qualified_name(server_name, tool_name))
+                if entry is None:
+                    await self.send_response(
+                        channel_id,
+                        f"Unknown tool '{tool_name}' on {server_name}. Use {self.command_prefix}{server_name} tools to list tools.",
+                        root_id
+                    )
+                    return
+                client, _ = entry
+
                 try:
                     result = await client.call_tool(tool_name, tool_args)
                     await self.send_response(channel_id, f"Tool result from {server_name}: {result}", root_id)
@@ -286,7 +392,53 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
                     logger.error(f"Error calling tool {tool_name} on {server_name}: {str(e)}")
                     await self.send_response(channel_id, f"Error calling tool {tool_name} on {server_name}: {str(e)}", root_id)
                     
+            elif subcommand == 'stats':
+                # 同時実行数・キュー待ち時間・処理時間
+                stats = client.stats()
+                # プールの場合はメンバーごと
+                is_pool = bool(stats) and all(isinstance(value, dict) for value in stats.values())
+                members = stats if is_pool else {server_name: stats}
+                response = f"Call stats for {server_name}:\n"
+                for name, member_stats in members.items():
+                    if not member_stats:
+                        response += f"- {name}: not running\n"
+                        continue
+                    response += (
+                        f"- {name}: {member_stats['in_flight']}/{member_stats['limit'] or '∞'} in flight, "
+                        f"{member_stats['queued']} queued, {member_stats['calls']} calls, "
+                        f"wait avg {member_stats['avg_wait']:.2f}s / max {member_stats['max_wait']:.2f}s, "
+                        f"service avg {member_stats['avg_service']:.2f}s / max {member_stats['max_service']:.2f}s, "
+                        f"{member_stats['timeouts']} timeouts, {member_stats['cancelled']} cancelled\n"
+                    )
+                await self.send_response(channel_id, response, root_id)
+
+            elif subcommand == 'cache':
+                # ツール結果キャッシュの統計
+                stats = client.result_cache.stats(server_name)
+                response = (
+                    f"Result cache for {server_name}: {stats['hits']} hits, {stats['misses']} misses "
+                    f"(hit rate {stats['hit_rate']:.0%})\n"
+                    f"Shared cache: {stats['entries']} entries, {stats['bytes']}/{stats['max_bytes']} bytes, "
+                    f"{stats['evictions']} evictions, {stats['expirations']} expirations\n"
+                )
+                for name, counts in stats['tools'].items():
+                    response += f"- {name}: {counts['hits']} hits, {counts['misses']} misses\n"
+                await self.send_response(channel_id, response, root_id)
+
             elif subcommand == 'resources':
+                if len(command_parts) > 2:
+                    # URIが指定された場合はリソースの内容を表示（購読済みならローカルのミラーから）
+                    uri = command_parts[2]
+                    result = await client.read_resource(uri)
+                    response = f"Resource {uri}:\n"
+                    for content in result.contents:
+                        if hasattr(content, 'text'):
+                            response += content.text + "\n"
+                        else:
+                            response += f"[{content.mimeType or 'binary'} content]\n"
+                    await self.send_response(channel_id, response, root_id)
+                    return
+
                 # 正しいクライアントインスタンスを使用
                 resources = await client.list_resources()
                 response = "Available MCP resources:\n"
@@ -326,8 +478,10 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
                 **各サーバーのコマンド:**
                 1. `{self.command_prefix}<server_name> tools` - サーバーで利用可能なすべてのツールを一覧表示
                 2. `{self.command_prefix}<server_name> call <tool_name> <parameter_name> <value>` - 特定のツールを呼び出し
-                3. `{self.command_prefix}<server_name> resources` - 利用可能なすべてのリソースを一覧表示
+                3. `{self.command_prefix}<server_name> resources [uri]` - 利用可能なすべてのリソースを一覧表示（URIを指定すると内容を表示）
                 4. `{self.command_prefix}<server_name> prompts` - 利用可能なすべてのプロンプトを一覧表示
+                5. `{self.command_prefix}<server_name> cache` - ツール結果キャッシュのヒット率を表示
+                6. `{self.command_prefix}<server_name> stats` - 同時実行数、キュー待ち時間、処理時間を表示
 
                 **例:**
                 • サーバーの一覧表示:
@@ -398,7 +552,10 @@ class MattermostMCPBotOriginal(MattermostBaseBot):
             # 初期化の逆の順序でクライアントを閉じる
             if self.mattermost_client:
                 self.mattermost_client.close()
-            for client in self.mcp_clients.values():
+            await self.supervisor.stop()
+            for task in list(self._startup_tasks) + list(self._request_tasks):
+                task.cancel()
+            for client in list(self.mcp_clients.values()):
                 await client.close()
         
 async def start():
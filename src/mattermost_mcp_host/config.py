@@ -1,4 +1,5 @@
 import os
+import socket
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -30,6 +31,63 @@ COMMAND_PREFIX = os.environ.get('COMMAND_PREFIX', '#')
 # Logging Configuration
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 
+# MCP server startup
+# Seconds to wait for a single server to connect and list its tools (overridable per server with "connect_timeout")
+MCP_CONNECT_TIMEOUT = float(os.environ.get('MCP_CONNECT_TIMEOUT', '60'))
+# Number of servers that must be ready before the bot starts; 0 waits for all of them.
+# Servers that finish later are attached to the agent when they become ready.
+MCP_STARTUP_QUORUM = int(os.environ.get('MCP_STARTUP_QUORUM', '0'))
+# Seconds before a cached tool catalog is re-fetched (overridable per server with "tools_ttl").
+# 0 keeps the catalog until the server sends notifications/tools/list_changed.
+MCP_TOOLS_TTL = float(os.environ.get('MCP_TOOLS_TTL', '0'))
+# Servers with "lazy" set are started on their first tool call and stopped after this many idle seconds
+MCP_LAZY_IDLE_TIMEOUT = float(os.environ.get('MCP_LAZY_IDLE_TIMEOUT', '600'))
+# Build the agent from persisted tool/resource/prompt catalogs of MCP servers while the servers start
+# (disable per server with "snapshot": false)
+MCP_SNAPSHOTS = os.environ.get('MCP_SNAPSHOTS', 'true').lower() == 'true'
+# Directory for the persisted catalogs
+MCP_SNAPSHOT_DIR = os.environ.get('MCP_SNAPSHOT_DIR', str(Path.home() / '.cache' / 'mattermost-mcp-host' / 'snapshots'))
+# Maximum number of subscribed resources mirrored per server (0 disables the mirror)
+MCP_RESOURCE_MIRROR_SIZE = int(os.environ.get('MCP_RESOURCE_MIRROR_SIZE', '256'))
+
+# Tool calls in flight per server (0 = unlimited); further calls wait in a fair queue
+MCP_MAX_IN_FLIGHT = int(os.environ.get('MCP_MAX_IN_FLIGHT', '8'))
+# Seconds before a tool call is cancelled with notifications/cancelled (0 = no timeout)
+MCP_CALL_TIMEOUT = float(os.environ.get('MCP_CALL_TIMEOUT', '300'))
+# Minimum seconds between two edits of the status post that shows the progress of running tools
+MCP_PROGRESS_UPDATE_INTERVAL = float(os.environ.get('MCP_PROGRESS_UPDATE_INTERVAL', '2'))
+
+# MCP server health checks and restarts
+MCP_HEALTH_CHECK_INTERVAL = float(os.environ.get('MCP_HEALTH_CHECK_INTERVAL', '30'))
+MCP_PING_TIMEOUT = float(os.environ.get('MCP_PING_TIMEOUT', '10'))
+MCP_RESTART_BACKOFF_BASE = float(os.environ.get('MCP_RESTART_BACKOFF_BASE', '1'))
+MCP_RESTART_BACKOFF_MAX = float(os.environ.get('MCP_RESTART_BACKOFF_MAX', '300'))
+# Consecutive transport failures before calls to a server fail fast, and seconds before one call is retried
+MCP_BREAKER_THRESHOLD = int(os.environ.get('MCP_BREAKER_THRESHOLD', '3'))
+MCP_BREAKER_RESET_TIMEOUT = float(os.environ.get('MCP_BREAKER_RESET_TIMEOUT', '30'))
+
+# Cache for results of read-only/idempotent MCP tools
+# Default seconds to keep a result (overridable per server and per tool in "result_cache"); 0 disables caching
+MCP_RESULT_CACHE_TTL = float(os.environ.get('MCP_RESULT_CACHE_TTL', '60'))
+# Maximum total size of the cached results in bytes
+MCP_RESULT_CACHE_MAX_BYTES = int(os.environ.get('MCP_RESULT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+# Shared MCP gateway (mattermost-mcp-gateway) that several bot instances use instead of starting the servers themselves
+# Unix socket of the gateway; used by the gateway to listen and by the bots to connect
+MCP_GATEWAY_SOCKET = os.environ.get('MCP_GATEWAY_SOCKET', '')
+# Address the gateway listens on without a socket
+MCP_GATEWAY_HOST = os.environ.get('MCP_GATEWAY_HOST', '127.0.0.1')
+MCP_GATEWAY_PORT = int(os.environ.get('MCP_GATEWAY_PORT', '8808'))
+# Base URL of the gateway for the bots (e.g. http://127.0.0.1:8808); bots use the gateway if this or the socket is set
+MCP_GATEWAY_URL = os.environ.get('MCP_GATEWAY_URL', '')
+# Name of this bot instance towards the gateway, which applies quotas per client
+MCP_GATEWAY_CLIENT_ID = os.environ.get('MCP_GATEWAY_CLIENT_ID', socket.gethostname())
+# Default quotas per bot instance: tool calls in flight (further calls wait) and calls per minute (0 = unlimited)
+MCP_GATEWAY_CLIENT_MAX_IN_FLIGHT = int(os.environ.get('MCP_GATEWAY_CLIENT_MAX_IN_FLIGHT', '16'))
+MCP_GATEWAY_CLIENT_CALLS_PER_MINUTE = int(os.environ.get('MCP_GATEWAY_CLIENT_CALLS_PER_MINUTE', '0'))
+# Quotas of individual clients as JSON, e.g. {"bot-1": {"max_in_flight": 4, "calls_per_minute": 60}}
+MCP_GATEWAY_QUOTAS = os.environ.get('MCP_GATEWAY_QUOTAS', '')
+
 # DEFAULT LLM 
 DEFAULT_PROVIDER = os.environ.get('DEFAULT_PROVIDER', 'azure') 
 DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', 'gpt-4o')
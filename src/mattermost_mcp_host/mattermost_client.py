@@ -83,7 +83,7 @@ class MattermostClient:
         """
         self.message_handlers.append(handler)
 
-    def post_message(self, channel_id, message, root_id=None):
+    def post_message(self, channel_id, message, root_id=None, file_ids=None):
         """
         Post a message to a channel
         
@@ -91,6 +91,7 @@ class MattermostClient:
             channel_id: Channel ID
             message: Message text
             root_id: Optional ID of the parent message for threading
+            file_ids: Optional IDs of uploaded files to attach
         """
         post_data = {
             'channel_id': channel_id,
@@ -100,9 +101,52 @@ class MattermostClient:
         # If root_id is provided, add it to create a threaded reply
         if root_id:
             post_data['root_id'] = root_id
+        if file_ids:
+            post_data['file_ids'] = file_ids
         
         return self.driver.posts.create_post(post_data)
 
+    def update_message(self, post_id, message):
+        """
+        Replace the text of a post
+
+        Args:
+            post_id: ID of the post
+            message: New message text
+        """
+        return self.driver.posts.patch_post(post_id, options={'message': message})
+
+    def delete_message(self, post_id):
+        """
+        Delete a post
+
+        Args:
+            post_id: ID of the post
+        """
+        return self.driver.posts.delete_post(post_id)
+
+    def upload_file(self, channel_id, filename, stream):
+        """
+        Upload a file to attach to a post later
+
+        The body is streamed from the file object (which must support len()),
+        so the file is never loaded into memory as a whole.
+
+        Args:
+            channel_id: Channel ID of the post the file will be attached to
+            filename: Name of the file
+            stream: Readable binary file object
+
+        Returns:
+            Upload response with the 'file_infos' of the uploaded file
+        """
+        return self.driver.client.make_request(
+            'post',
+            '/files',
+            params={'channel_id': channel_id, 'filename': filename},
+            data=stream,
+        ).json()
+
     def get_messages(self, channel_id, limit=10):
         """
         Get recent messages from a channel
@@ -1,25 +1,199 @@
 import os
+import re
 import sys
+import time
+import hashlib
+import asyncio
 import logging
 import shutil
+import contextlib
+import contextvars
+from collections import OrderedDict
+from datetime import timedelta
 
+import anyio
+import httpx
 from mcp import ClientSession, StdioServerParameters
+from mcp.shared.exceptions import McpError
 from mcp.types import (
             CallToolResult,
+            CancelledNotification,
+            CancelledNotificationParams,
+            ClientNotification,
             EmbeddedResource,
-            ImageContent,
+            ResourceListChangedNotification,
+            ResourceUpdatedNotification,
+            ServerNotification,
             TextContent,
+            TextResourceContents,
+            ToolListChangedNotification,
         )
 
-NonTextContent = ImageContent | EmbeddedResource
 from mcp.client.stdio import stdio_client
-from mcp.client.sse import sse_client  # noqa
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import MCP_PROTOCOL_VERSION, MCP_SESSION_ID, StreamableHTTPTransport
 from langchain_core.tools import BaseTool, StructuredTool, ToolException
 
+import mattermost_mcp_host.config as config
+from mattermost_mcp_host.mcp_supervisor import CircuitBreaker, MCPServerUnavailable, is_transport_error
+from mattermost_mcp_host.mcp_result_cache import ToolResultCache, result_cache
+from mattermost_mcp_host.mcp_progress import progress_reporter
+from mattermost_mcp_host.mcp_schema import get_validator
+from mattermost_mcp_host.mcp_limiter import CallStats, FairLimiter, fair_queue_key
+from mattermost_mcp_host.mcp_content import binary_content, has_binary_content, replace_binary_content
+
 PYTHON_EXECUTABLE = sys.executable
 
+# Values of the "type" field that select the Streamable HTTP transport ("sse" selects the legacy SSE transport)
+STREAMABLE_HTTP_TYPES = ('http', 'streamable-http', 'streamable_http', 'streamablehttp')
+
+
+# Collects the ids of the requests a _ClientSession sends from the current task (see MCPClient.call_tool)
+_sent_request_ids = contextvars.ContextVar('mcp_sent_request_ids', default=None)
+
+
+class _ClientSession(ClientSession):
+    """
+    ClientSession whose request ids can continue those of a previous session,
+    and which reports the id of every request it sends to _sent_request_ids.
+    """
+
+    def __init__(self, *args, first_request_id=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._request_id = first_request_id
+
+    @property
+    def next_request_id(self):
+        """The id the next request will be sent with."""
+        return self._request_id
+
+    async def send_request(self, request, *args, **kwargs):
+        sent = _sent_request_ids.get()
+        if sent is not None:
+            # The base class takes this id before its first await
+            sent.append(self._request_id)
+        return await super().send_request(request, *args, **kwargs)
+
+
+@contextlib.asynccontextmanager
+async def _streamablehttp_client(url, headers, timeout, sse_read_timeout, httpx_client_factory, auth,
+                                 session_id=None, protocol_version=None):
+    """
+    Streamable HTTP transport (as mcp.client.streamable_http.streamablehttp_client)
+    that can join an existing server-side session.
+
+    The SDK transport only learns the session id and protocol version from an
+    initialize response and opens the GET stream for server notifications when
+    the initialized notification is sent. When session_id is given, the
+    transport starts with both and opens the GET stream right away instead.
+    The session is never terminated on exit (see MCPClient._terminate_http_session).
+    """
+    transport = StreamableHTTPTransport(url, headers, timeout, sse_read_timeout, auth)
+    transport.session_id = session_id
+    transport.protocol_version = protocol_version
+
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    async with anyio.create_task_group() as tg:
+        try:
+            async with httpx_client_factory(
+                headers=transport.request_headers,
+                timeout=httpx.Timeout(transport.timeout, read=transport.sse_read_timeout),
+                auth=transport.auth,
+            ) as client:
+                def start_get_stream():
+                    tg.start_soon(transport.handle_get_stream, client, read_stream_writer)
+
+                tg.start_soon(
+                    transport.post_writer,
+                    client,
+                    write_stream_reader,
+                    read_stream_writer,
+                    write_stream,
+                    start_get_stream,
+                    tg,
+                )
+                if session_id:
+                    start_get_stream()
+                try:
+                    yield read_stream, write_stream, transport.get_session_id
+                finally:
+                    tg.cancel_scope.cancel()
+        finally:
+            await read_stream_writer.aclose()
+            await write_stream.aclose()
+
+
+class ToolIndex:
+    """
+    Namespaced index of the tools of all connected MCP servers.
+
+    Maps "<server_name>.<tool_name>" to (client, tool) so that a tool can be
+    dispatched with a single dict lookup instead of listing every server.
+    """
+
+    # LLM providers only accept these characters (and at most 64 of them) in tool names
+    LLM_NAME_MAX_LENGTH = 64
+    _LLM_NAME_INVALID = re.compile(r"[^A-Za-z0-9_-]")
+
+    @staticmethod
+    def qualified_name(server_name, tool_name):
+        """Namespaced name of a tool, unique across all servers."""
+        return f"{server_name}.{tool_name}"
+
+    @classmethod
+    def llm_name(cls, server_name, tool_name):
+        """
+        The qualified name of a tool in the form LLM providers accept.
+
+        Tools with the same name on two servers get different names, so the
+        model can tell them apart.
+        """
+        qualified_name = cls.qualified_name(server_name, tool_name)
+        name = cls._LLM_NAME_INVALID.sub("_", qualified_name)
+        if len(name) > cls.LLM_NAME_MAX_LENGTH:
+            digest = hashlib.sha1(qualified_name.encode()).hexdigest()[:8]
+            name = f"{name[:cls.LLM_NAME_MAX_LENGTH - 9]}_{digest}"
+        return name
+
+    def __init__(self):
+        self._entries = {}
+        self._names_by_server = {}
+
+    def update_server(self, server_name, client, tools):
+        """Replace the indexed tools of a server with its current catalog."""
+        self.remove_server(server_name)
+        names = []
+        for tool_name, tool in tools.items():
+            qualified_name = self.qualified_name(server_name, tool_name)
+            self._entries[qualified_name] = (client, tool)
+            names.append(qualified_name)
+        self._names_by_server[server_name] = names
+
+    def remove_server(self, server_name):
+        """Drop all tools of a server from the index."""
+        for qualified_name in self._names_by_server.pop(server_name, []):
+            self._entries.pop(qualified_name, None)
+
+    def resolve(self, qualified_name):
+        """
+        Look up a tool by its namespaced name.
+
+        Returns:
+            (client, tool) tuple, or None if the tool is unknown
+        """
+        return self._entries.get(qualified_name)
+
+    def __contains__(self, qualified_name):
+        return qualified_name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class MCPClient:
-    def __init__(self, server_config, log_level="INFO"):
+    def __init__(self, server_config, log_level="INFO", name=None, server_name=None):
         """
         Initialize MCP client to connect to an MCP server based on config.
 
@@ -27,8 +201,13 @@ class MCPClient:
             server_config (dict): Configuration for the MCP server, including
                                   'command', 'args', 'env', 'type', 'url'.
             log_level (str): Logging level.
+            name (str): Name of the server in mcp-servers.json (used in logs).
+            server_name (str): Name used for cached tool results, so that the
+                               members of a pool share them (defaults to name).
         """
         self.config = server_config
+        self.name = name or server_config.get('command') or server_config.get('url')
+        self.server_name = server_name or self.name
         # Default to stdio server type
 
         self.server_type = server_config.get('type', 'stdio').lower()
@@ -36,11 +215,64 @@ class MCPClient:
         self.mcp_args = server_config.get('args', [])
         self.env = server_config.get('env', os.environ.copy()) # Default to current environment
         self.url = server_config.get('url') # For http/sse
+        self.headers = server_config.get('headers', {}) # For http/sse, values may reference ${ENV_VARS}
+        self.auth = server_config.get('auth') # For http/sse, e.g. {"type": "bearer", "token": "${API_TOKEN}"}
 
         self.session = None
         self.read = None
         self.write = None
         self.client_context = None  # Store the context manager (stdio or http)
+        self.server_info = None
+
+        # Streamable HTTP session, kept across reconnects so the server-side session can be resumed
+        self._get_http_session_id = None
+        self._http_session_id = None
+        self._terminate_on_close = True
+        # Request ids must not repeat within a resumed session
+        self._next_request_id = 0
+
+        # The transport is owned by a background task (see connect())
+        self._connection_task = None
+        self._ready = None
+        self._closing = None
+
+        # Tool catalog cache, refreshed on notifications/tools/list_changed or after tools_ttl seconds
+        self.tools_ttl = float(server_config.get('tools_ttl', config.MCP_TOOLS_TTL))
+        self._tools = None
+        self._tools_fetched_at = 0.0
+        self._tools_lock = asyncio.Lock()
+        self._tools_changed_listeners = []
+        self._tools_refresh_task = None
+        self._background_tasks = set()
+
+        # Cached resource list (servers with listChanged) and LRU mirror of subscribed resources
+        self.resource_mirror_size = int(server_config.get('resource_mirror_size', config.MCP_RESOURCE_MIRROR_SIZE))
+        # URIs to mirror as soon as the server is connected, or true for every listed resource
+        self.subscribe_resources = server_config.get('subscribe_resources', [])
+        self._resources = None
+        self._resource_mirror = OrderedDict()  # uri -> ReadResourceResult
+
+        # Results of read-only/idempotent tools (or tools listed in "result_cache.tools")
+        cache_config = server_config.get('result_cache') or {}
+        self.result_cache = result_cache
+        self.result_cache_ttl = float(cache_config.get('ttl', config.MCP_RESULT_CACHE_TTL))
+        cached_tools = cache_config.get('tools') or {}
+        # "tools" is a list of tool names or a dict of tool name -> TTL (null for the default TTL)
+        self.result_cache_tools = cached_tools if isinstance(cached_tools, dict) else dict.fromkeys(cached_tools)
+        self.result_cache_exclude = set(cache_config.get('exclude', []))
+
+        # Concurrent tool calls are capped per server; the rest wait in a fair queue
+        self.limiter = FairLimiter(server_config.get('max_in_flight', config.MCP_MAX_IN_FLIGHT))
+        self.call_stats = CallStats()
+        # Seconds before a call is cancelled (0 waits forever), overridable per tool in "tool_timeouts"
+        self.call_timeout = float(server_config.get('call_timeout', config.MCP_CALL_TIMEOUT))
+        self.tool_timeouts = server_config.get('tool_timeouts', {})
+
+        # Fails calls fast while the server is unhealthy (see MCPSupervisor)
+        self.breaker = CircuitBreaker(
+            failure_threshold=server_config.get('breaker_threshold', config.MCP_BREAKER_THRESHOLD),
+            reset_timeout=server_config.get('breaker_reset_timeout', config.MCP_BREAKER_RESET_TIMEOUT),
+        )
 
         # Configure logging
         logging.basicConfig(
@@ -49,19 +281,175 @@ class MCPClient:
         )
         self.logger = logging.getLogger(__name__)
 
-    async def connect(self):
-        """Establish connection with the MCP server based on type."""
+    async def connect(self, timeout=None):
+        """
+        Establish connection with the MCP server based on type.
+
+        The transport and session are entered and exited by a dedicated
+        background task, so several clients can be connected concurrently and
+        later closed from any task.
+
+        Args:
+            timeout: Seconds to wait for the server to become ready (None = no limit)
+
+        Returns:
+            The initialized ClientSession
+        """
+        if self._connection_task is None or self._connection_task.done():
+            self._ready = asyncio.Event()
+            self._closing = asyncio.Event()
+            self._connection_task = asyncio.create_task(
+                self._run_connection(), name=f"mcp-connection-{self.name}"
+            )
+
+        ready_waiter = asyncio.create_task(self._ready.wait())
+        try:
+            await asyncio.wait(
+                {ready_waiter, self._connection_task},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except BaseException:
+            # Cancelled while waiting: do not leave a half-started server behind
+            await self.close()
+            raise
+        finally:
+            ready_waiter.cancel()
+
+        if not self._ready.is_set():
+            if self._connection_task.done():
+                # Re-raise the error that stopped the connection task
+                self._connection_task.result()
+                raise ConnectionError(f"MCP server '{self.name}' closed during startup")
+            await self.close()
+            raise TimeoutError(f"Timed out after {timeout}s connecting to MCP server '{self.name}'")
+        return self.session
+
+    async def _run_connection(self):
+        """Open the transport, initialize the session and hold it until close()."""
+        try:
+            resumed = await self._probe_http_session()
+            if not resumed:
+                self._next_request_id = 0
+            await self._open_transport()
+            if resumed:
+                # The server already knows the session: no initialize, the transport joins it directly
+                self.logger.info(f"Resumed HTTP session {self._http_session_id} of MCP server '{self.name}'")
+            else:
+                self.server_info = await self.session.initialize()
+                if self._get_http_session_id:
+                    self._http_session_id = self._get_http_session_id()
+            self.logger.info(
+                f"Connected to MCP Server '{self.name}': "
+                f"{self.server_info.serverInfo.name} (version {self.server_info.serverInfo.version})"
+            )
+            await self.refresh_tools()
+            # Subscriptions belong to the session: start the mirror afresh
+            self._resources = None
+            self._resource_mirror.clear()
+            if self.subscribe_resources:
+                self._spawn(self._subscribe_configured_resources())
+            self._ready.set()
+            await self._hold_session()
+        finally:
+            await self._close_transport()
+            if self._closing.is_set() and self._terminate_on_close:
+                await self._terminate_http_session()
+
+    async def _hold_session(self):
+        """
+        Keep the session open until close(), refreshing the tool catalog
+        whenever it gets older than tools_ttl.
+
+        The refresh fires the tools changed listeners, so the tools given to
+        the model follow the server even if it never sends list_changed.
+        """
+        while True:
+            timeout = None
+            if self.tools_ttl > 0:
+                timeout = max(self._tools_fetched_at + self.tools_ttl - time.monotonic(), 0.05)
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout)
+                return
+            except asyncio.TimeoutError:
+                pass
+            if self._tools_expired() and (self._tools_refresh_task is None or self._tools_refresh_task.done()):
+                self._tools_refresh_task = self._spawn(self._refresh_expired_tools())
+
+    async def _refresh_expired_tools(self):
+        """Refresh the tool catalog after tools_ttl, logging failures (the next call retries)."""
+        try:
+            await self.refresh_tools()
+        except Exception as e:
+            self.logger.error(f"Failed to refresh tools of MCP server '{self.name}': {str(e)}")
+
+    async def _handle_message(self, message):
+        """
+        Handle requests, notifications and errors delivered by the session.
+
+        Runs inside the session's receive loop, so anything that needs another
+        round trip to the server is scheduled as a separate task.
+        """
+        if isinstance(message, ServerNotification):
+            if isinstance(message.root, ToolListChangedNotification):
+                self.logger.info(f"Tool list of MCP server '{self.name}' changed")
+                self._tools_fetched_at = 0.0
+                self._spawn(self.refresh_tools())
+            elif isinstance(message.root, ResourceUpdatedNotification):
+                uri = str(message.root.params.uri)
+                # Drop the stale copy right away, then mirror the new one
+                if self._resource_mirror.pop(uri, None) is not None:
+                    self._spawn(self._mirror_resource(uri))
+            elif isinstance(message.root, ResourceListChangedNotification):
+                self.logger.info(f"Resource list of MCP server '{self.name}' changed")
+                self._resources = None
+                self._spawn(self._prune_resource_mirror())
+
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _open_transport(self):
+        """Open the transport and session selected by the server type."""
         if self.server_type == 'stdio':
             await self._connect_stdio()
-        elif self.server_type in ['http', 'sse']:
+        elif self.server_type == 'sse' or self.server_type in STREAMABLE_HTTP_TYPES:
             await self._connect_http()
         else:
             raise ValueError(f"Unsupported MCP server type: {self.server_type}")
 
-        await self.session.initialize()
-        # server_info = await self.session.get_server_info() # Optional: Log server info
-        # self.logger.info(f"Connected to MCP Server: {server_info.name} (version {server_info.version})")
-        return self.session
+    async def _probe_http_session(self):
+        """
+        Check whether the Streamable HTTP session of a previous connection is
+        still known to the server, so it can be resumed without initialize.
+
+        The probe is a plain ping POST outside of the transport: a rejected
+        session id would otherwise tear down the transport's task group.
+
+        Returns:
+            True if the previous session can be resumed
+        """
+        if not self._http_session_id or self.server_info is None:
+            return False
+        headers = self._http_headers()
+        headers.update({
+            MCP_SESSION_ID: self._http_session_id,
+            MCP_PROTOCOL_VERSION: str(self.server_info.protocolVersion),
+            'Accept': 'application/json, text/event-stream',
+        })
+        try:
+            async with self._http_client_factory(headers=headers, auth=self._http_auth()) as client:
+                response = await client.post(self.url, json={"jsonrpc": "2.0", "id": "resume-probe", "method": "ping"})
+            if response.status_code == 200:
+                return True
+            self.logger.info(f"HTTP session of MCP server '{self.name}' expired (status {response.status_code})")
+        except Exception as e:
+            self.logger.info(f"Could not resume HTTP session of MCP server '{self.name}': {str(e)}")
+        self._http_session_id = None
+        return False
 
     async def _connect_stdio(self):
         """Establish connection via STDIO."""
@@ -80,32 +468,109 @@ class MCPClient:
 
         self.client_context = stdio_client(server_params)
         self.read, self.write = await self.client_context.__aenter__()
-        self.session = ClientSession(self.read, self.write)
+        self.session = _ClientSession(self.read, self.write, message_handler=self._handle_message)
         await self.session.__aenter__()
         self.logger.info("STDIO connection established.")
 
     async def _connect_http(self):
-        """Establish connection via HTTP/SSE."""
+        """Establish connection via Streamable HTTP or SSE."""
         if not self.url:
             raise ValueError("URL is required for HTTP/SSE connection.")
-        self.logger.info(f"Connecting via HTTP/SSE to URL: {self.url}")
-
-        raise NotImplementedError("HTTP/SSE connection is not implemented yet.")
-        # TODO: Implement HTTP/SSE connection
-        # Assuming HttpClientParameters and http_client exist in the SDK
-        # The http_client might handle both regular HTTP and SSE automatically
-        # based on server capabilities or configuration.
-        # client_params = HttpClientParameters(
-        #     base_url=self.url,
-        #     # Add any necessary headers or auth parameters here if needed
-        #     # headers=self.config.get('headers'),
-        # )
-
-        # self.client_context = sse_client(client_params) # Assuming http_client exists
-        # self.read, self.write = await self.client_context.__aenter__()
-        # self.session = ClientSession(self.read, self.write)
-        # await self.session.__aenter__()
-        # self.logger.info("HTTP/SSE connection established.")
+
+        headers = self._http_headers()
+        timeout = float(self.config.get('timeout', 30))
+        sse_read_timeout = float(self.config.get('sse_read_timeout', 300))
+
+        if self.server_type == 'sse':
+            self.logger.info(f"Connecting via SSE to URL: {self.url}")
+            self.client_context = sse_client(
+                self.url,
+                headers=headers,
+                timeout=timeout,
+                sse_read_timeout=sse_read_timeout,
+                httpx_client_factory=self._http_client_factory,
+                auth=self._http_auth(),
+            )
+            self.read, self.write = await self.client_context.__aenter__()
+        else:
+            self.logger.info(f"Connecting via Streamable HTTP to URL: {self.url}")
+            # The session is terminated by close() so that reconnect() can resume it
+            self.client_context = _streamablehttp_client(
+                self.url,
+                headers=headers,
+                timeout=timeout,
+                sse_read_timeout=sse_read_timeout,
+                httpx_client_factory=self._http_client_factory,
+                auth=self._http_auth(),
+                session_id=self._http_session_id,
+                protocol_version=str(self.server_info.protocolVersion) if self._http_session_id else None,
+            )
+            self.read, self.write, self._get_http_session_id = await self.client_context.__aenter__()
+
+        self.session = _ClientSession(
+            self.read, self.write, message_handler=self._handle_message, first_request_id=self._next_request_id
+        )
+        await self.session.__aenter__()
+        self.logger.info("HTTP/SSE connection established.")
+
+    def _http_headers(self):
+        """Build the request headers, expanding ${ENV_VARS} and adding bearer auth."""
+        headers = {name: os.path.expandvars(str(value)) for name, value in self.headers.items()}
+        if self.auth and self.auth.get('type', 'bearer').lower() == 'bearer':
+            token = self.auth.get('token') or os.environ.get(self.auth.get('token_env', ''), '')
+            headers['Authorization'] = f"Bearer {os.path.expandvars(token)}"
+        return headers
+
+    def _http_auth(self):
+        """Return an httpx auth object for auth types that are not plain headers."""
+        if self.auth and self.auth.get('type', 'bearer').lower() == 'basic':
+            return httpx.BasicAuth(
+                os.path.expandvars(self.auth.get('username', '')),
+                os.path.expandvars(self.auth.get('password', '')),
+            )
+        return None
+
+    def _http_client_factory(self, headers=None, timeout=None, auth=None):
+        """
+        Create the httpx client used by the HTTP/SSE transports.
+
+        The client keeps a pool of keep-alive connections, so the POST for
+        every JSON-RPC message reuses an open connection instead of paying a
+        new TCP/TLS handshake. Set "uds" to reach a server on a Unix socket.
+        """
+        limits = httpx.Limits(
+            max_connections=int(self.config.get('max_connections', 10)),
+            max_keepalive_connections=int(self.config.get('max_keepalive_connections', 10)),
+            keepalive_expiry=float(self.config.get('keepalive_expiry', 60)),
+        )
+        transport = httpx.AsyncHTTPTransport(
+            limits=limits,
+            uds=self.config.get('uds'),
+            retries=int(self.config.get('connect_retries', 1)),
+        )
+        return httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout or httpx.Timeout(30.0, read=300.0),
+            auth=auth,
+            follow_redirects=True,
+            transport=transport,
+        )
+
+    async def _terminate_http_session(self):
+        """Ask a Streamable HTTP server to drop our session (DELETE with the session id)."""
+        session_id = self._http_session_id
+        self._http_session_id = None
+        if not session_id:
+            return
+        headers = self._http_headers()
+        headers[MCP_SESSION_ID] = session_id
+        try:
+            async with self._http_client_factory(headers=headers, auth=self._http_auth()) as client:
+                response = await client.delete(self.url)
+            if response.status_code not in (200, 204, 405):
+                self.logger.warning(f"HTTP session termination failed: {response.status_code}")
+        except Exception as e:
+            self.logger.warning(f"HTTP session termination failed: {str(e)}")
 
     def _find_executable(self, command):
         """Find the full path for an executable command."""
@@ -136,15 +601,73 @@ class MCPClient:
         self.logger.warning(f"Could not find executable for command '{command}'. Assuming it's directly executable.")
         return command # Return original command as last resort
 
-    async def list_tools(self):
-        """List all available tools from the MCP server"""
+    def add_tools_changed_listener(self, listener):
+        """
+        Register a coroutine function called with this client whenever its
+        tool catalog changes after the initial fetch.
+        """
+        self._tools_changed_listeners.append(listener)
+
+    @property
+    def cached_tools(self):
+        """The cached tool catalog, without any round trip ({} before the first fetch)."""
+        return self._tools or {}
+
+    def _tools_expired(self):
+        """Whether the cached tool catalog is missing or older than tools_ttl."""
+        if self._tools is None or not self._tools_fetched_at:
+            return True
+        return self.tools_ttl > 0 and time.monotonic() - self._tools_fetched_at > self.tools_ttl
+
+    async def refresh_tools(self):
+        """
+        Fetch the tool catalog from the server and update the cache.
+
+        Returns:
+            True if the catalog changed compared to the cached one
+        """
         if not self.session:
             raise ConnectionError("MCP client not connected")
-        
-        response = await self.session.list_tools()
-        tools = response.tools
-        self.logger.info(f"Found {len(tools)} tools")
-        return {tool.name: tool for tool in tools}
+
+        async with self._tools_lock:
+            tools = {}
+            cursor = None
+            while True:
+                response = await self.session.list_tools(cursor=cursor)
+                tools.update({tool.name: tool for tool in response.tools})
+                cursor = response.nextCursor
+                if not cursor:
+                    break
+            self.logger.info(f"Found {len(tools)} tools")
+
+            previous = self._tools
+            changed = previous is not None and (
+                {name: tool.model_dump() for name, tool in previous.items()}
+                != {name: tool.model_dump() for name, tool in tools.items()}
+            )
+            self._tools = tools
+            self._tools_fetched_at = time.monotonic()
+
+        if changed:
+            # Tools may behave differently now
+            self.result_cache.invalidate(self.server_name)
+            for listener in self._tools_changed_listeners:
+                try:
+                    await listener(self)
+                except Exception as e:
+                    self.logger.error(f"Error in tools changed listener for '{self.name}': {str(e)}")
+        return changed
+
+    async def list_tools(self, refresh=False):
+        """
+        List all available tools from the MCP server.
+
+        Served from the cached catalog unless it is stale or refresh is True.
+        The returned dict is shared with the cache and must not be modified.
+        """
+        if refresh or self._tools_expired():
+            await self.refresh_tools()
+        return self._tools
 
     async def call_tool(self, tool_name, inputs=None):
         """
@@ -157,40 +680,236 @@ class MCPClient:
         Returns:
             Result from the tool
         """
+        if not self.breaker.allow():
+            raise MCPServerUnavailable(f"MCP server '{self.name}' is unavailable, try again later or answer without it")
         if not self.session:
+            self.breaker.record_failure()
             raise ConnectionError("MCP client not connected")
         
-        # TODO: Send this as response to user in Mattermost
-        self.logger.info(f"Calling tool: {tool_name} with inputs: {inputs}")
-        result = await self.session.call_tool(tool_name, arguments=inputs or {})
+        ttl = self._result_cache_ttl(tool_name)
+        if ttl > 0:
+            cache_key = ToolResultCache.make_key(self.server_name, tool_name, inputs)
+            result = self.result_cache.get(cache_key)
+            if result is not None:
+                self.logger.info(f"Using cached result for tool: {tool_name} with inputs: {inputs}")
+                return result
+
+        timeout = float(self.tool_timeouts.get(tool_name, self.call_timeout))
+        queued_at = time.monotonic()
+        await self.limiter.acquire(fair_queue_key.get())
+        started_at = time.monotonic()
+        request_ids = []
+        # Progress notifications of this call go to the request's status post
+        reporter = progress_reporter.get()
+        progress_key = object()
+        try:
+            if not self.session:
+                raise ConnectionError("MCP client not connected")
+            # TODO: Send this as response to user in Mattermost
+            self.logger.info(f"Calling tool: {tool_name} with inputs: {inputs}")
+            # The session reports the id it sends the call with, for notifications/cancelled
+            token = _sent_request_ids.set(request_ids)
+            try:
+                result = await self.session.call_tool(
+                    tool_name,
+                    arguments=inputs or {},
+                    read_timeout_seconds=timedelta(seconds=timeout) if timeout > 0 else None,
+                    progress_callback=reporter.callback(progress_key, tool_name) if reporter else None,
+                )
+            finally:
+                _sent_request_ids.reset(token)
+        except asyncio.CancelledError:
+            self.call_stats.cancelled += 1
+            self.breaker.record_neutral()
+            self._spawn(self._cancel_request(request_ids, "Cancelled by the client"))
+            raise
+        except Exception as e:
+            if isinstance(e, McpError) and e.error.code == httpx.codes.REQUEST_TIMEOUT:
+                # A slow call is not a broken server: leave the breaker (and the supervisor) out of it
+                self.call_stats.timeouts += 1
+                self.breaker.record_neutral()
+                self._spawn(self._cancel_request(request_ids, f"Timed out after {timeout:g} seconds"))
+            elif is_transport_error(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        finally:
+            if reporter:
+                reporter.finish(progress_key)
+            self.limiter.release()
+            self.call_stats.record(started_at - queued_at, time.monotonic() - started_at)
+        self.breaker.record_success()
+        # Binary results are uploaded to Mattermost rather than kept in memory
+        if ttl > 0 and not result.isError and not has_binary_content(result):
+            self.result_cache.put(cache_key, result, ttl)
         return result
 
+    async def _cancel_request(self, request_ids, reason):
+        """Tell the server to stop working on a request we no longer wait for."""
+        # Nothing to cancel if the call never got an id (e.g. cancelled before it was sent)
+        if not request_ids or not self.session:
+            return
+        request_id = request_ids[0]
+        try:
+            await self.session.send_notification(
+                ClientNotification(
+                    CancelledNotification(
+                        method="notifications/cancelled",
+                        params=CancelledNotificationParams(requestId=request_id, reason=reason),
+                    )
+                )
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not cancel request {request_id} on MCP server '{self.name}': {str(e)}")
+
+    def stats(self):
+        """In-flight/queued calls, queue-wait and service-time metrics."""
+        return self.call_stats.as_dict(self.limiter)
+
+    def _result_cache_ttl(self, tool_name):
+        """
+        Seconds to cache results of a tool, 0 if they must not be cached.
+
+        Tools listed in the "result_cache" config use their configured TTL,
+        tools annotated readOnlyHint or idempotentHint the default TTL.
+        """
+        if tool_name in self.result_cache_exclude:
+            return 0
+        if tool_name in self.result_cache_tools:
+            ttl = self.result_cache_tools[tool_name]
+            return self.result_cache_ttl if ttl is None else float(ttl)
+        annotations = getattr(self.cached_tools.get(tool_name), 'annotations', None)
+        if annotations and (annotations.readOnlyHint or annotations.idempotentHint):
+            return self.result_cache_ttl
+        return 0
+
+    @property
+    def is_alive(self):
+        """Whether the connection task is running and holds a session."""
+        return (
+            self._connection_task is not None
+            and not self._connection_task.done()
+            and self.session is not None
+        )
+
+    async def ping(self):
+        """Send a ping request to check that the server responds."""
+        if not self.session:
+            raise ConnectionError("MCP client not connected")
+        return await self.session.send_ping()
+
+    def _resource_capability(self, flag):
+        """Whether the server announced a resources capability ('subscribe' or 'listChanged')."""
+        capabilities = self.server_info.capabilities if self.server_info else None
+        return bool(capabilities and capabilities.resources and getattr(capabilities.resources, flag))
+
     async def list_resources(self):
-        """List all available resources from the MCP server"""
+        """
+        List all available resources from the MCP server
+
+        The list is kept until notifications/resources/list_changed if the
+        server sends that notification, otherwise it is fetched every time.
+        """
+        if self._resources is not None:
+            return self._resources
         if not self.session:
             raise ConnectionError("MCP client not connected")
         
-        response = await self.session.list_resources()
-        resources = response.resources
+        resources = []
+        cursor = None
+        while True:
+            response = await self.session.list_resources(cursor=cursor)
+            resources.extend(response.resources)
+            cursor = response.nextCursor
+            if not cursor:
+                break
         self.logger.info(f"Found {len(resources)} resources")
+        if self._resource_capability('listChanged'):
+            self._resources = resources
         return resources
 
     async def read_resource(self, uri):
         """
         Read a specific resource by URI
         
+        If the server supports subscriptions the resource is subscribed to and
+        mirrored locally: later reads are served from the mirror, which is
+        updated on notifications/resources/updated.
+
         Args:
             uri: URI of the resource to read
             
         Returns:
             Content of the resource
         """
+        uri = str(uri)
+        result = self._resource_mirror.get(uri)
+        if result is not None:
+            self._resource_mirror.move_to_end(uri)
+            return result
         if not self.session:
             raise ConnectionError("MCP client not connected")
-            
-        result = await self.session.read_resource(uri)
+
+        if not self._resource_capability('subscribe') or self.resource_mirror_size <= 0:
+            return await self.session.read_resource(uri)
+        return await self._mirror_resource(uri, subscribe=True)
+
+    async def _mirror_resource(self, uri, subscribe=False):
+        """Read a resource into the mirror (subscribing first, so no update is missed)."""
+        try:
+            if subscribe:
+                await self.session.subscribe_resource(uri)
+            result = await self.session.read_resource(uri)
+        except Exception as e:
+            if not subscribe:
+                # Background refresh after an update: the next read fetches it again
+                self.logger.warning(f"Could not refresh mirrored resource {uri}: {str(e)}")
+                return None
+            raise
+        self._resource_mirror[uri] = result
+        self._resource_mirror.move_to_end(uri)
+        while len(self._resource_mirror) > self.resource_mirror_size:
+            evicted, _ = self._resource_mirror.popitem(last=False)
+            self._spawn(self._unsubscribe_resource(evicted))
         return result
 
+    async def _unsubscribe_resource(self, uri):
+        try:
+            await self.session.unsubscribe_resource(uri)
+        except Exception as e:
+            self.logger.warning(f"Could not unsubscribe from resource {uri}: {str(e)}")
+
+    async def _prune_resource_mirror(self):
+        """After list_changed, drop mirrored resources that are no longer listed."""
+        try:
+            listed = {str(resource.uri) for resource in await self.list_resources()}
+        except Exception as e:
+            self.logger.warning(f"Could not list resources of MCP server '{self.name}': {str(e)}")
+            self._resource_mirror.clear()
+            return
+        for uri in [uri for uri in self._resource_mirror if uri not in listed]:
+            del self._resource_mirror[uri]
+            await self._unsubscribe_resource(uri)
+
+    async def _subscribe_configured_resources(self):
+        """Mirror the resources listed in "subscribe_resources" (true mirrors all listed resources)."""
+        try:
+            if self.subscribe_resources is True:
+                uris = [str(resource.uri) for resource in await self.list_resources()]
+            else:
+                uris = list(self.subscribe_resources)
+            for uri in uris[:self.resource_mirror_size]:
+                await self.read_resource(uri)
+            self.logger.info(f"Mirroring {len(self._resource_mirror)} resources of MCP server '{self.name}'")
+        except Exception as e:
+            self.logger.warning(f"Could not subscribe to resources of MCP server '{self.name}': {str(e)}")
+
+    @property
+    def mirrored_resources(self):
+        """URIs of the resources currently mirrored."""
+        return list(self._resource_mirror)
+
     async def list_prompts(self):
         """List all available prompts from the MCP server"""
         if not self.session:
@@ -218,17 +937,56 @@ class MCPClient:
         result = await self.session.get_prompt(name, arguments or {})
         return result
 
-    async def close(self):
-        """Close the connection to the MCP server"""
-        if self.session:
-            await self.session.__aexit__(None, None, None)
+    async def _close_transport(self):
+        """Exit the session and transport contexts (runs in the connection task)."""
+        try:
+            if self.session:
+                self._next_request_id = self.session.next_request_id
+                await self.session.__aexit__(None, None, None)
             if self.client_context:
                 await self.client_context.__aexit__(None, None, None)
+        except Exception as e:
+            self.logger.warning(f"Error while closing MCP server '{self.name}': {str(e)}")
+        finally:
             self.session = None
             self.read = None
             self.write = None
             self.client_context = None
-            self.logger.info("Connection closed")
+
+    async def reconnect(self, timeout=None):
+        """
+        Close and re-establish the connection.
+
+        For Streamable HTTP servers the previous session id is offered to the
+        server, so server-side session state survives the reconnect when the
+        server still knows it.
+        """
+        await self.close(terminate=False)
+        return await self.connect(timeout=timeout)
+
+    async def close(self, terminate=True):
+        """
+        Close the connection to the MCP server
+
+        Args:
+            terminate: Also end the server-side Streamable HTTP session
+        """
+        task = self._connection_task
+        if task is None:
+            return
+        self._connection_task = None
+        self._terminate_on_close = terminate
+        if not task.done():
+            if self._ready.is_set():
+                self._closing.set()
+            else:
+                # Still starting up (e.g. timed out): abort the startup
+                task.cancel()
+        try:
+            await task
+        except (Exception, asyncio.CancelledError) as e:
+            self.logger.debug(f"Connection task for '{self.name}' ended with: {e!r}")
+        self.logger.info("Connection closed")
 
     async def convert_mcp_tools_to_langchain(self) -> list[BaseTool]:
         """
@@ -237,49 +995,83 @@ class MCPClient:
         Returns:
             List of LangChain tools
         """
-        
-        # Define helper function for converting call tool results
-        async def _convert_call_tool_result(
-            call_tool_result: CallToolResult,
-        ) -> tuple[str | list[str], list[NonTextContent] | None]:
-            text_contents: list[TextContent] = []
-            non_text_contents: list[NonTextContent] = []
-            for content in call_tool_result.content:
-                if isinstance(content, TextContent):
-                    text_contents.append(content)
-                else:
-                    non_text_contents.append(content)
-
-            tool_content: str | list[str] = [content.text for content in text_contents]
-            if len(text_contents) == 1:
-                tool_content = tool_content[0]
-
-            if call_tool_result.isError:
-                raise ToolException(tool_content)
-            self.logger.info(f"tool_content: {tool_content}")
-            # TODO: Handle non-text contents in a more appropriate way, e.g., by returning them as a list of EmbeddedResource or ImageContent or some other representation
-            self.logger.info(f"non_text_contents: {non_text_contents}")
-            return tool_content, non_text_contents or None
-        
-        # Get all MCP tools
-        mcp_tools = await self.list_tools()
-        langchain_tools = []
-        
-        # Convert each MCP tool to a LangChain tool
-        for tool_name, tool_info in mcp_tools.items():
+        return await convert_mcp_tools_to_langchain(self, self.server_name)
+
+
+async def convert_mcp_tools_to_langchain(client, server_name) -> list[BaseTool]:
+    """
+    Convert the tools of an MCP client (or client pool) to LangChain tools
+
+    Args:
+        client: Object providing list_tools(), call_tool() and logger
+        server_name: Name of the server in mcp-servers.json; the LangChain
+                     tools are named after ToolIndex.llm_name() so that tools
+                     of different servers never collide
+
+    Returns:
+        List of LangChain tools
+    """
+    
+    # Define helper function for converting call tool results
+    async def _convert_call_tool_result(
+        tool_name: str,
+        call_tool_result: CallToolResult,
+    ) -> tuple[str | list[str], list[dict] | None]:
+        if call_tool_result.isError:
+            errors = [content.text for content in call_tool_result.content if isinstance(content, TextContent)]
+            raise ToolException(errors[0] if len(errors) == 1 else errors)
+
+        tool_content: str | list[str] = []
+        attachments: list[dict] = []
+        for content in call_tool_result.content:
+            if isinstance(content, TextContent):
+                tool_content.append(content.text)
+            elif isinstance(content, EmbeddedResource) and isinstance(content.resource, TextResourceContents):
+                tool_content.append(content.resource.text)
+            elif binary_content(content) is not None:
+                # Images and blobs are streamed to Mattermost; the model only sees a short reference
+                reference, attachment = await replace_binary_content(tool_name, content)
+                tool_content.append(reference)
+                if attachment:
+                    attachments.append(attachment)
+            else:
+                tool_content.append(content.model_dump_json(exclude_none=True))
+
+        if len(tool_content) == 1:
+            tool_content = tool_content[0]
+        client.logger.info(f"tool_content: {tool_content}")
+        return tool_content, attachments or None
+    
+    def _make_call_tool(tool_name, validator):
+        # Bound in a closure, so that no tool argument can override them
+        async def _call_tool(**arguments):
+            if validator is not None:
+                arguments, error = validator.validate(arguments)
+                if error:
+                    raise ToolException(f"Invalid arguments for tool {tool_name}:\n{error}")
+            call_tool_result = await client.call_tool(tool_name, inputs=arguments)
+            return await _convert_call_tool_result(tool_name, call_tool_result)
+        return _call_tool
+
+    # Get all MCP tools
+    mcp_tools = await client.list_tools()
+    langchain_tools = []
+    
+    # Convert each MCP tool to a LangChain tool
+    for tool_name, tool_info in mcp_tools.items():
+        # Compiled once per distinct schema; bad arguments are reported to the model without a round trip
+        validator = get_validator(tool_info.inputSchema)
+
+        # Create a LangChain StructuredTool
+        langchain_tool = StructuredTool(
+            name=ToolIndex.llm_name(server_name, tool_name),
+            description=tool_info.description or "",
+            args_schema=tool_info.inputSchema,
             # Create a function that will call the MCP tool
-            async def _call_tool(tool_name=tool_name, **arguments):
-                call_tool_result = await self.call_tool(tool_name, inputs=arguments)
-                return await _convert_call_tool_result(call_tool_result)
-            
-            # Create a LangChain StructuredTool
-            langchain_tool = StructuredTool(
-                name=tool_name,
-                description=tool_info.description or "",
-                args_schema=tool_info.inputSchema,
-                coroutine=_call_tool,
-                response_format="content_and_artifact",
-            )
-            langchain_tools.append(langchain_tool)
+            coroutine=_make_call_tool(tool_name, validator),
+            response_format="content_and_artifact",
+            metadata={"mcp_server": server_name, "mcp_tool": tool_name},
+        )
+        langchain_tools.append(langchain_tool)
 
-        return langchain_tools
+    return langchain_tools
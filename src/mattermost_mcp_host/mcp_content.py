@@ -0,0 +1,179 @@
+import io
+import base64
+import asyncio
+import logging
+import mimetypes
+import contextvars
+import posixpath
+from urllib.parse import urlparse
+
+from mcp.types import BlobResourceContents, EmbeddedResource
+
+logger = logging.getLogger(__name__)
+
+# Where binary tool results of the current request go (a MattermostAttachments).
+# Without one they are only described to the model.
+attachment_sink = contextvars.ContextVar('mcp_attachment_sink', default=None)
+
+# Base64 characters decoded per step (a multiple of 4)
+DECODE_CHUNK_CHARS = 4 * 16 * 1024
+
+
+def strip_base64(data):
+    """Remove the whitespace (e.g. MIME line breaks) that base64 payloads may contain."""
+    return ''.join(data.split())
+
+
+def decoded_size(data):
+    """Number of bytes encoded by a base64 string, without decoding it."""
+    data = strip_base64(data)
+    padding = len(data) - len(data.rstrip('='))
+    return len(data) * 3 // 4 - padding
+
+
+def binary_content(content):
+    """
+    The base64 payload of an image, audio or blob resource content.
+
+    Returns:
+        (base64 data, MIME type, file name) or None for other contents
+    """
+    if isinstance(content, EmbeddedResource):
+        resource = content.resource
+        if not isinstance(resource, BlobResourceContents):
+            return None
+        name = posixpath.basename(urlparse(str(resource.uri)).path) or 'resource'
+        return resource.blob, resource.mimeType or 'application/octet-stream', name
+    data = getattr(content, 'data', None)
+    mime_type = getattr(content, 'mimeType', None)
+    if isinstance(data, str) and mime_type:
+        return data, mime_type, content.type
+    return None
+
+
+def has_binary_content(result):
+    """Whether a CallToolResult carries image, audio or blob contents."""
+    return any(binary_content(content) is not None for content in result.content)
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Base64Reader(io.RawIOBase):
+    """
+    Read-only file object that decodes a base64 string chunk by chunk.
+
+    Lets HTTP clients stream the decoded bytes with a known Content-Length
+    without ever holding the decoded file in memory. Whitespace is removed
+    first so that chunks stay aligned to 4 characters; any other character
+    outside the base64 alphabet raises binascii.Error instead of silently
+    shifting the decoded bytes.
+    """
+
+    def __init__(self, data, chunk_chars=DECODE_CHUNK_CHARS):
+        data = strip_base64(data)
+        if len(data) % 4:
+            raise ValueError("Invalid base64 data: length is not a multiple of 4")
+        self._data = data
+        self._chunk_chars = chunk_chars
+        self._offset = 0
+        self._buffer = memoryview(b'')
+        self._position = 0
+        self._size = decoded_size(data)
+
+    def __len__(self):
+        return self._size - self._position
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, b):
+        while not self._buffer and self._offset < len(self._data):
+            chunk = self._data[self._offset:self._offset + self._chunk_chars]
+            self._offset += len(chunk)
+            self._buffer = memoryview(base64.b64decode(chunk, validate=True))
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self._position += n
+        return n
+
+
+class MattermostAttachments:
+    # Files attached to a single post (Mattermost's default limit)
+    MAX_FILES_PER_POST = 5
+
+    def __init__(self, mattermost_client, channel_id):
+        """
+        Uploads binary tool results of one request to a Mattermost channel.
+
+        The uploaded files are attached to the reply posts (see take_file_ids()).
+
+        Args:
+            mattermost_client: MattermostClient used for the uploads.
+            channel_id (str): Channel of the reply.
+        """
+        self.mattermost_client = mattermost_client
+        self.channel_id = channel_id
+        self._file_ids = []
+        self._count = 0
+
+    def _file_name(self, tool_name, name, mime_type):
+        self._count += 1
+        root, extension = posixpath.splitext(name)
+        if not extension:
+            extension = mimetypes.guess_extension(mime_type) or ''
+        return f"{tool_name}-{self._count}-{root}{extension}"
+
+    async def upload(self, tool_name, data, mime_type, name):
+        """
+        Stream a base64 payload to Mattermost as a file.
+
+        Returns:
+            Dict with 'file_id', 'name', 'mime_type' and 'size'
+        """
+        file_name = self._file_name(tool_name, name, mime_type)
+        reader = Base64Reader(data)
+        size = len(reader)
+        response = await asyncio.to_thread(self.mattermost_client.upload_file, self.channel_id, file_name, reader)
+        file_id = response['file_infos'][0]['id']
+        self._file_ids.append(file_id)
+        logger.info(f"Uploaded {file_name} ({format_size(size)}) from tool {tool_name}")
+        return {'file_id': file_id, 'name': file_name, 'mime_type': mime_type, 'size': size}
+
+    def take_file_ids(self):
+        """Remove and return the file ids for the next reply post (at most MAX_FILES_PER_POST)."""
+        file_ids = self._file_ids[:self.MAX_FILES_PER_POST]
+        del self._file_ids[:self.MAX_FILES_PER_POST]
+        return file_ids
+
+    def __bool__(self):
+        return bool(self._file_ids)
+
+
+async def replace_binary_content(tool_name, content):
+    """
+    Upload a binary content to the current request's attachments and return
+    the short text the model sees instead of the payload.
+
+    Returns:
+        (reference text, attachment dict or None)
+    """
+    data, mime_type, name = binary_content(content)
+    sink = attachment_sink.get()
+    size = format_size(decoded_size(data))
+    if sink is None:
+        return f"[{mime_type} content ({size}) omitted]", None
+    try:
+        attachment = await sink.upload(tool_name, data, mime_type, name)
+    except Exception as e:
+        logger.error(f"Failed to upload {mime_type} content from tool {tool_name}: {str(e)}")
+        return f"[{mime_type} content ({size}) could not be attached: {str(e)}]", None
+    return f"[{mime_type} content ({size}) attached to the reply as {attachment['name']}]", attachment
@@ -0,0 +1,358 @@
+import os
+import json
+import stat
+import time
+import socket
+import asyncio
+import weakref
+import logging
+import argparse
+import contextlib
+
+import uvicorn
+import mcp.types as types
+from mcp.server.lowlevel import NotificationOptions, Server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from mcp.shared.exceptions import McpError
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import mattermost_mcp_host.config as config
+from mattermost_mcp_host.mcp_limiter import FairLimiter, fair_queue_key
+from mattermost_mcp_host.mcp_pool import create_mcp_client, sticky_routing_key
+from mattermost_mcp_host.mcp_progress import progress_reporter
+from mattermost_mcp_host.mcp_result_cache import result_cache
+from mattermost_mcp_host.mcp_supervisor import MCPSupervisor, is_transport_error
+
+logger = logging.getLogger(__name__)
+
+# Header that identifies a bot instance to the gateway (for quotas)
+CLIENT_ID_HEADER = 'x-mcp-client-id'
+
+# Server settings about starting the server, which only the gateway needs
+_UPSTREAM_KEYS = ('command', 'args', 'env', 'type', 'url', 'headers', 'auth', 'uds', 'lazy', 'pool', 'subscribe_resources')
+
+
+def gateway_client_config(server_name, server_config):
+    """
+    Config for reaching a server through the gateway at MCP_GATEWAY_URL
+    (or MCP_GATEWAY_SOCKET) instead of starting it.
+    """
+    client_config = {key: value for key, value in server_config.items() if key not in _UPSTREAM_KEYS}
+    client_config.update(
+        type='http',
+        url=f"{(config.MCP_GATEWAY_URL or 'http://localhost').rstrip('/')}/servers/{server_name}/mcp",
+        headers={CLIENT_ID_HEADER: config.MCP_GATEWAY_CLIENT_ID},
+    )
+    if config.MCP_GATEWAY_SOCKET:
+        client_config['uds'] = config.MCP_GATEWAY_SOCKET
+    return client_config
+
+
+class ClientQuota:
+    def __init__(self, max_in_flight, calls_per_minute):
+        """
+        Limits of one bot instance: concurrent calls (further calls wait) and
+        calls per minute (further calls are rejected).
+        """
+        self.limiter = FairLimiter(max_in_flight)
+        self.calls_per_minute = float(calls_per_minute)
+        self._tokens = self.calls_per_minute
+        self._updated = time.monotonic()
+        self.calls = 0
+        self.rejected = 0
+
+    def take(self):
+        """Take one call from the per-minute budget (a token bucket); False if it is used up."""
+        if self.calls_per_minute <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.calls_per_minute, self._tokens + (now - self._updated) * self.calls_per_minute / 60)
+        self._updated = now
+        if self._tokens < 1:
+            self.rejected += 1
+            return False
+        self._tokens -= 1
+        return True
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'rejected': self.rejected,
+            'in_flight': self.limiter.active,
+            'queued': self.limiter.waiting,
+        }
+
+
+class _ProgressForwarder:
+    """progress_reporter that passes the upstream server's progress on to the calling bot."""
+
+    def __init__(self, session, progress_token, request_id):
+        self.session = session
+        self.progress_token = progress_token
+        self.request_id = request_id
+
+    def callback(self, key, label):
+        async def _on_progress(progress, total, message):
+            await self.session.send_progress_notification(
+                self.progress_token, progress, total, message, related_request_id=str(self.request_id)
+            )
+        return _on_progress
+
+    def finish(self, key):
+        pass
+
+
+class _GatewayServer(Server):
+    """Server announcing tools/list_changed, which the gateway forwards from upstream."""
+
+    def create_initialization_options(self, notification_options=None, experimental_capabilities=None):
+        return super().create_initialization_options(
+            notification_options or NotificationOptions(tools_changed=True), experimental_capabilities
+        )
+
+
+class _SessionManagerEndpoint:
+    """ASGI endpoint of one server's Streamable HTTP session manager."""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def __call__(self, scope, receive, send):
+        await self.manager.handle_request(scope, receive, send)
+
+
+class MCPGateway:
+    def __init__(self, server_configs, quotas=None):
+        """
+        Owns the MCP servers of mcp-servers.json and re-exposes each of them
+        over Streamable HTTP at /servers/<name>/mcp, so that several bot
+        instances share one set of server processes, pools and result cache.
+
+        Calls of all bot sessions are multiplexed onto the upstream clients
+        (with their pools, in-flight limits and supervisor). Each bot instance,
+        identified by the X-MCP-Client-Id header, gets its own quota.
+
+        Args:
+            server_configs (dict): Server name -> server configuration.
+            quotas (dict): Client id -> {"max_in_flight", "calls_per_minute"},
+                           overriding the MCP_GATEWAY_CLIENT_* defaults.
+        """
+        self.server_configs = server_configs
+        self.quota_config = quotas or {}
+        self.clients = {}
+        self.supervisor = MCPSupervisor(self.clients)
+        self._quotas = {}
+        self._sessions = {}  # server name -> bot sessions that used it
+        self._managers = {}
+
+    async def connect(self):
+        """Start all servers concurrently; servers that fail are left out."""
+        async def _connect(server_name, server_config):
+            client = create_mcp_client(server_config=server_config, name=server_name)
+            await client.connect(timeout=server_config.get('connect_timeout', config.MCP_CONNECT_TIMEOUT))
+            await client.list_tools()
+            client.add_tools_changed_listener(self._on_tools_changed)
+            self.clients[server_name] = client
+
+        names = list(self.server_configs)
+        results = await asyncio.gather(
+            *(_connect(name, self.server_configs[name]) for name in names), return_exceptions=True
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to connect to MCP server '{name}': {str(result)}")
+        self.supervisor.start()
+        logger.info(f"Gateway serving MCP servers: {', '.join(self.clients)}")
+
+    async def close(self):
+        await self.supervisor.stop()
+        for client in self.clients.values():
+            await client.close()
+
+    def _quota(self, client_id):
+        quota = self._quotas.get(client_id)
+        if quota is None:
+            settings = self.quota_config.get(client_id, {})
+            quota = ClientQuota(
+                settings.get('max_in_flight', config.MCP_GATEWAY_CLIENT_MAX_IN_FLIGHT),
+                settings.get('calls_per_minute', config.MCP_GATEWAY_CLIENT_CALLS_PER_MINUTE),
+            )
+            self._quotas[client_id] = quota
+        return quota
+
+    async def _on_tools_changed(self, client):
+        """Tell the bots using a server that its tools changed."""
+        for session in list(self._sessions.get(client.name, ())):
+            try:
+                await session.send_tool_list_changed()
+            except Exception as e:
+                logger.warning(f"Could not notify a session of '{client.name}' about changed tools: {str(e)}")
+
+    async def _call_tool(self, server_name, context, params):
+        client_id = 'anonymous'
+        if context.request is not None:
+            client_id = context.request.headers.get(CLIENT_ID_HEADER, client_id)
+        quota = self._quota(client_id)
+        if not quota.take():
+            return types.CallToolResult(
+                content=[types.TextContent(type="text", text=f"Call quota of client '{client_id}' exceeded, try again later")],
+                isError=True,
+            )
+
+        await quota.limiter.acquire(server_name)
+        # Calls of one bot instance share its pool members and its turn in the upstream fair queue
+        tokens = [
+            (sticky_routing_key, sticky_routing_key.set(client_id)),
+            (fair_queue_key, fair_queue_key.set(client_id)),
+        ]
+        try:
+            quota.calls += 1
+            progress_token = context.meta.progressToken if context.meta else None
+            if progress_token is not None:
+                tokens.append((
+                    progress_reporter,
+                    progress_reporter.set(_ProgressForwarder(context.session, progress_token, context.request_id)),
+                ))
+            return await self.clients[server_name].call_tool(params.name, params.arguments)
+        except McpError:
+            raise
+        except Exception as e:
+            # A broken or unavailable upstream is an error of the request, not a result for the model
+            if is_transport_error(e):
+                raise
+            return types.CallToolResult(content=[types.TextContent(type="text", text=str(e))], isError=True)
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
+            quota.limiter.release()
+
+    def _make_server(self, server_name):
+        """MCP server that forwards every request to one upstream client."""
+        server = _GatewayServer(f"mcp-gateway/{server_name}")
+        client = self.clients[server_name]
+        sessions = self._sessions.setdefault(server_name, weakref.WeakSet())
+
+        def _context():
+            context = server.request_context
+            sessions.add(context.session)
+            return context
+
+        async def _list_tools(request):
+            _context()
+            tools = await client.list_tools()
+            return types.ServerResult(types.ListToolsResult(tools=list(tools.values())))
+
+        async def _call_tool(request):
+            return types.ServerResult(await self._call_tool(server_name, _context(), request.params))
+
+        async def _list_resources(request):
+            _context()
+            return types.ServerResult(types.ListResourcesResult(resources=await client.list_resources()))
+
+        async def _read_resource(request):
+            _context()
+            return types.ServerResult(await client.read_resource(request.params.uri))
+
+        async def _list_prompts(request):
+            _context()
+            return types.ServerResult(types.ListPromptsResult(prompts=await client.list_prompts()))
+
+        async def _get_prompt(request):
+            _context()
+            return types.ServerResult(await client.get_prompt(request.params.name, request.params.arguments))
+
+        server.request_handlers.update({
+            types.ListToolsRequest: _list_tools,
+            types.CallToolRequest: _call_tool,
+            types.ListResourcesRequest: _list_resources,
+            types.ReadResourceRequest: _read_resource,
+            types.ListPromptsRequest: _list_prompts,
+            types.GetPromptRequest: _get_prompt,
+        })
+        return server
+
+    def stats(self):
+        return {
+            'servers': {name: client.stats() for name, client in self.clients.items()},
+            'clients': {client_id: quota.stats() for client_id, quota in self._quotas.items()},
+            'result_cache': result_cache.stats(),
+        }
+
+    def app(self):
+        """Starlette app with one Streamable HTTP endpoint per server and /stats."""
+        routes = []
+        for server_name in self.clients:
+            manager = StreamableHTTPSessionManager(app=self._make_server(server_name))
+            self._managers[server_name] = manager
+            routes.append(Route(
+                f"/servers/{server_name}/mcp",
+                endpoint=_SessionManagerEndpoint(manager),
+                methods=["GET", "POST", "DELETE"],
+            ))
+
+        async def _stats(request):
+            return JSONResponse(self.stats())
+        routes.append(Route("/stats", endpoint=_stats))
+
+        @contextlib.asynccontextmanager
+        async def _lifespan(app):
+            async with contextlib.AsyncExitStack() as stack:
+                for manager in self._managers.values():
+                    await stack.enter_async_context(manager.run())
+                yield
+
+        return Starlette(routes=routes, lifespan=_lifespan)
+
+
+def _remove_stale_socket(path):
+    """Remove a Unix socket left behind by a previous gateway that nobody listens on."""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+            return
+    raise RuntimeError(f"Another process is listening on {path}")
+
+
+async def serve(socket_path=None, host=None, port=None):
+    # Imported here: the bot module itself uses gateway_client_config
+    from mattermost_mcp_host.bot.mattermost_mcp_bot_original import load_server_configs
+
+    gateway = MCPGateway(load_server_configs(), quotas=json.loads(config.MCP_GATEWAY_QUOTAS or '{}'))
+    await gateway.connect()
+    try:
+        if socket_path:
+            _remove_stale_socket(socket_path)
+            server_config = uvicorn.Config(gateway.app(), uds=socket_path, log_level=config.LOG_LEVEL.lower())
+            logger.info(f"MCP gateway listening on unix:{socket_path}")
+        else:
+            server_config = uvicorn.Config(gateway.app(), host=host, port=port, log_level=config.LOG_LEVEL.lower())
+            logger.info(f"MCP gateway listening on http://{host}:{port}")
+        await uvicorn.Server(server_config).serve()
+    finally:
+        await gateway.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared MCP gateway for mattermost-mcp-host bot instances")
+    parser.add_argument('--socket', default=config.MCP_GATEWAY_SOCKET, help="Unix socket to listen on")
+    parser.add_argument('--host', default=config.MCP_GATEWAY_HOST, help="Host to listen on (without --socket)")
+    parser.add_argument('--port', type=int, default=config.MCP_GATEWAY_PORT, help="Port to listen on (without --socket)")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(serve(socket_path=args.socket, host=args.host, port=args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import time
+import asyncio
+import logging
+
+from langchain_core.tools import BaseTool
+
+import mattermost_mcp_host.config as config
+from mattermost_mcp_host.mcp_client import convert_mcp_tools_to_langchain
+from mattermost_mcp_host.mcp_result_cache import result_cache
+from mattermost_mcp_host.mcp_supervisor import CircuitBreaker, MCPServerUnavailable
+
+
+def _dump_all(items):
+    return [item.model_dump() for item in items]
+
+
+class LazyMCPClient:
+    def __init__(self, server_config, factory, log_level="INFO", name=None):
+        """
+        MCP server that is only started when one of its tools is called.
+
+        The tool catalog comes from the persisted snapshot, so the agent can be
+        built without starting the server. The server (an MCPClient or
+        MCPClientPool created by factory) is started on the first call and
+        stopped again after idle_timeout seconds without calls. Without a
+        snapshot the server is started once at connect() to take one.
+
+        Args:
+            server_config (dict): Server configuration; "lazy" is true or
+                                  {"idle_timeout": seconds}.
+            factory (callable): Creates the underlying client from (server_config, log_level, name).
+            log_level (str): Logging level.
+            name (str): Name of the server in mcp-servers.json.
+        """
+        # Imported here: mcp_snapshot builds on this module
+        from mattermost_mcp_host.mcp_snapshot import SnapshotStore
+
+        self.config = server_config
+        self.name = name or server_config.get('command') or server_config.get('url')
+        self.server_type = server_config.get('type', 'stdio').lower()
+        self.log_level = log_level
+
+        lazy_config = server_config.get('lazy')
+        lazy_config = lazy_config if isinstance(lazy_config, dict) else {}
+        self.idle_timeout = float(lazy_config.get('idle_timeout', config.MCP_LAZY_IDLE_TIMEOUT))
+        self.connect_timeout = server_config.get('connect_timeout', config.MCP_CONNECT_TIMEOUT)
+
+        self.client = None  # The running server, None while stopped
+        self.result_cache = result_cache
+        # Opens when the server fails to start, so calls fail fast instead of each waiting connect_timeout
+        self.breaker = CircuitBreaker(
+            failure_threshold=1,
+            reset_timeout=server_config.get('breaker_reset_timeout', config.MCP_BREAKER_RESET_TIMEOUT),
+        )
+        self.snapshots = SnapshotStore()
+        self._factory = factory
+        self._tools = None
+        self._server_info = None
+        self._start_lock = asyncio.Lock()
+        self._outstanding = 0
+        self._last_used = time.monotonic()
+        self._background_tasks = set()
+        self._tools_changed_listeners = []
+
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def members(self):
+        """Running connections, for the supervisor (none while the server is stopped)."""
+        if self.client is None:
+            return []
+        return list(getattr(self.client, 'members', [self.client]))
+
+    @property
+    def server_info(self):
+        return self.client.server_info if self.client else self._server_info
+
+    @property
+    def cached_tools(self):
+        return self._tools or {}
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def connect(self, timeout=None):
+        """Load the snapshot; start the server only if there is none."""
+        if timeout is not None:
+            self.connect_timeout = timeout
+        snapshot = self.snapshots.load(self.name, self.config)
+        if snapshot is None:
+            self.logger.info(f"No snapshot for MCP server '{self.name}', starting it once")
+            await self._ensure_started()
+            self._last_used = time.monotonic()
+        else:
+            self._load_snapshot(snapshot)
+            self.logger.info(f"Loaded {len(self._tools)} tools of MCP server '{self.name}' from snapshot")
+        self._spawn(self._stop_when_idle())
+
+    async def wait_started(self):
+        """Lazy servers count as up once their catalog is loaded."""
+
+    def _load_snapshot(self, snapshot):
+        self._tools = snapshot['tools']
+        self._server_info = snapshot['server_info']
+
+    def _server_config(self):
+        """Configuration of the underlying client: the same server, started right away."""
+        return {key: value for key, value in self.config.items() if key != 'lazy'}
+
+    async def _ensure_started(self):
+        """Start the server if it is not running and return its client."""
+        async with self._start_lock:
+            if self.client is None:
+                if not self.breaker.allow():
+                    raise MCPServerUnavailable(
+                        f"MCP server '{self.name}' failed to start, try again later or answer without it"
+                    )
+                await self._start()
+            return self.client
+
+    async def _start(self):
+        """Start the server (with the start lock held), opening the breaker if that fails."""
+        client = self._factory(self._server_config(), self.log_level, self.name)
+        try:
+            await client.connect(timeout=self.connect_timeout)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        self.client = client
+        client.add_tools_changed_listener(self._on_tools_changed)
+        self.logger.info(f"Started MCP server '{self.name}'")
+        await self._update_tools(await client.list_tools())
+
+    async def _update_tools(self, tools):
+        """
+        Take the catalog of the running server, persisting it and notifying
+        listeners if it differs from the snapshot.
+
+        Returns:
+            True if the catalog changed
+        """
+        previous = self._tools
+        self._tools = tools
+        self._server_info = self.client.server_info
+        if previous is not None and _dump_all(previous.values()) == _dump_all(tools.values()):
+            return False
+        self.snapshots.save(self.name, self.config, tools, self._server_info)
+        if previous is None:
+            return False
+        await self._notify_tools_changed()
+        return True
+
+    async def _notify_tools_changed(self):
+        for listener in self._tools_changed_listeners:
+            try:
+                await listener(self)
+            except Exception as e:
+                self.logger.error(f"Error in tools changed listener for '{self.name}': {str(e)}")
+
+    async def _on_tools_changed(self, client):
+        await self._update_tools(await client.list_tools())
+
+    async def _stop_when_idle(self):
+        while True:
+            await asyncio.sleep(max(min(self.idle_timeout / 2, 60), 1))
+            await self.stop_if_idle()
+
+    async def stop_if_idle(self):
+        """
+        Stop the server after idle_timeout seconds without calls.
+
+        The start lock is held until the server is closed, so a call arriving
+        meanwhile starts a new server instead of using the closing one.
+        """
+        async with self._start_lock:
+            if (
+                self.client is not None
+                and self._outstanding == 0
+                and time.monotonic() - self._last_used > self.idle_timeout
+                # A crashed server is left to the supervisor's restart
+                and all(member.is_alive for member in self.members)
+            ):
+                client, self.client = self.client, None
+                self.logger.info(f"Stopping idle MCP server '{self.name}'")
+                await client.close()
+
+    async def close(self):
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        async with self._start_lock:
+            client, self.client = self.client, None
+            if client is not None:
+                await client.close()
+
+    async def call_tool(self, tool_name, inputs=None):
+        """
+        Call a tool, starting the server first if it is stopped
+
+        Args:
+            tool_name: Name of the tool to call
+            inputs: Dictionary of inputs for the tool (or None for tools without inputs)
+
+        Returns:
+            Result from the tool
+        """
+        return await self._with_server('call_tool', tool_name, inputs)
+
+    async def _with_server(self, method, *args):
+        """Run a request against the server, starting it if needed."""
+        self._outstanding += 1
+        try:
+            client = await self._ensure_started()
+            return await getattr(client, method)(*args)
+        finally:
+            self._outstanding -= 1
+            self._last_used = time.monotonic()
+
+    def stats(self):
+        """Call metrics of the running server ({} while it is stopped)."""
+        return self.client.stats() if self.client else {}
+
+    def add_tools_changed_listener(self, listener):
+        """Register a listener called with this client when the tool catalog changes."""
+        self._tools_changed_listeners.append(listener)
+
+    async def refresh_tools(self):
+        """Re-fetch the catalog from the server (starting it if needed)."""
+        tools = await self._with_server('list_tools', True)
+        return await self._update_tools(tools)
+
+    async def list_tools(self, refresh=False):
+        """The snapshot catalog (or the running server's, which replaces it)."""
+        if refresh or self._tools is None:
+            await self.refresh_tools()
+        return self._tools
+
+    async def list_resources(self):
+        return await self._with_server('list_resources')
+
+    async def read_resource(self, uri):
+        return await self._with_server('read_resource', uri)
+
+    async def list_prompts(self):
+        return await self._with_server('list_prompts')
+
+    async def get_prompt(self, name, arguments=None):
+        return await self._with_server('get_prompt', name, arguments)
+
+    async def convert_mcp_tools_to_langchain(self) -> list[BaseTool]:
+        """Convert the snapshot's tools to LangChain tools that start the server on first use."""
+        return await convert_mcp_tools_to_langchain(self, self.name)
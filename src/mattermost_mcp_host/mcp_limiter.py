@@ -0,0 +1,96 @@
+import asyncio
+import contextvars
+from collections import OrderedDict, deque
+
+# Queue that calls of the current request wait in (e.g. the Mattermost thread id).
+# Waiting calls are admitted round-robin across queues, so one busy thread
+# cannot starve the others.
+fair_queue_key = contextvars.ContextVar('mcp_fair_queue_key', default=None)
+
+
+class FairLimiter:
+    def __init__(self, limit):
+        """
+        Limit on concurrent calls with a fair queue.
+
+        Calls beyond the limit wait in one FIFO queue per key; a freed slot is
+        handed to the next key in round-robin order.
+
+        Args:
+            limit (int): Maximum number of calls in flight (0 for no limit).
+        """
+        self.limit = int(limit)
+        self.active = 0
+        self._queues = OrderedDict()  # key -> deque of futures
+
+    @property
+    def waiting(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def acquire(self, key=None):
+        if self.limit <= 0 or (self.active < self.limit and not self._queues):
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation
+                self.release()
+            else:
+                queue = self._queues.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._queues[key]
+            raise
+
+    def release(self):
+        """Hand the slot to the next waiting call, or free it."""
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class CallStats:
+    """Queue-wait and service-time metrics of the tool calls to one server."""
+
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_service = 0.0
+        self.max_service = 0.0
+
+    def record(self, wait, service):
+        self.calls += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_service += service
+        self.max_service = max(self.max_service, service)
+
+    def as_dict(self, limiter=None):
+        stats = {
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'avg_wait': self.total_wait / self.calls if self.calls else 0.0,
+            'max_wait': self.max_wait,
+            'avg_service': self.total_service / self.calls if self.calls else 0.0,
+            'max_service': self.max_service,
+        }
+        if limiter is not None:
+            stats.update(in_flight=limiter.active, queued=limiter.waiting, limit=limiter.limit)
+        return stats
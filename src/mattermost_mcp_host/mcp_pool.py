@@ -0,0 +1,267 @@
+import time
+import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+
+from langchain_core.tools import BaseTool
+
+from mattermost_mcp_host.mcp_client import MCPClient, convert_mcp_tools_to_langchain
+from mattermost_mcp_host.mcp_snapshot import SnapshotMCPClient
+import mattermost_mcp_host.config as config
+
+# Routing key for stateful tools (e.g. the Mattermost thread id). Calls made
+# with the same key are sent to the same pool member.
+sticky_routing_key = contextvars.ContextVar('mcp_sticky_routing_key', default=None)
+
+# Maximum number of remembered sticky routing keys per pool
+MAX_STICKY_KEYS = 1024
+
+
+def create_mcp_client(server_config, log_level="INFO", name=None):
+    """
+    Create the client for a configured MCP server.
+
+    Servers with a "pool" section whose max_size is above 1 get an
+    MCPClientPool, all others a single MCPClient. Unless snapshots are
+    disabled (MCP_SNAPSHOTS or "snapshot": false), that client is wrapped in a
+    SnapshotMCPClient that serves the persisted catalog until the server is up.
+    Servers with "lazy" set are always wrapped, as they start on first use.
+    """
+    if server_config.get('lazy') or (config.MCP_SNAPSHOTS and server_config.get('snapshot', True)):
+        return SnapshotMCPClient(server_config, create_mcp_client, log_level=log_level, name=name)
+    pool_config = server_config.get('pool') or {}
+    if int(pool_config.get('max_size', pool_config.get('min_size', 1))) > 1:
+        return MCPClientPool(server_config, log_level=log_level, name=name)
+    return MCPClient(server_config, log_level=log_level, name=name)
+
+
+class MCPClientPool:
+    def __init__(self, server_config, log_level="INFO", name=None):
+        """
+        Pool of sessions (one process each for stdio servers) for one MCP server.
+
+        Tool calls go to the member with the fewest outstanding requests. The
+        pool grows up to max_size while every member has at least
+        scale_up_queue_depth calls outstanding, and members above min_size are
+        closed after idle_timeout seconds without calls. Stateful tools are
+        always routed to the same member for a given sticky_routing_key.
+
+        Args:
+            server_config (dict): Server configuration with a "pool" section:
+                                  'min_size', 'max_size', 'scale_up_queue_depth',
+                                  'idle_timeout', 'stateful_tools'.
+            log_level (str): Logging level.
+            name (str): Name of the server in mcp-servers.json.
+        """
+        self.config = server_config
+        self.name = name or server_config.get('command') or server_config.get('url')
+        self.server_type = server_config.get('type', 'stdio').lower()
+        self.log_level = log_level
+
+        pool_config = server_config.get('pool') or {}
+        self.min_size = max(int(pool_config.get('min_size', 1)), 1)
+        self.max_size = max(int(pool_config.get('max_size', self.min_size)), self.min_size)
+        self.scale_up_queue_depth = max(int(pool_config.get('scale_up_queue_depth', 2)), 1)
+        self.idle_timeout = float(pool_config.get('idle_timeout', 300))
+        self.stateful_tools = set(pool_config.get('stateful_tools', []))
+
+        self.members = []  # The first member is the primary: catalog, resources and prompts
+        self._outstanding = {}
+        self._last_used = {}
+        self._sticky = OrderedDict()
+        self._member_count = 0
+        self._scaling = False
+        self._scale_task = None
+        self._closed = False
+        self._reaper_task = None
+
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def primary(self):
+        """The member used for everything that is not a tool call."""
+        if not self.members:
+            raise ConnectionError("MCP client not connected")
+        return self.members[0]
+
+    @property
+    def server_info(self):
+        return self.primary.server_info if self.members else None
+
+    def _new_member(self):
+        """Create an (unconnected) member client."""
+        member_config = {key: value for key, value in self.config.items() if key != 'pool'}
+        self._member_count += 1
+        return MCPClient(
+            member_config, log_level=self.log_level, name=f"{self.name}#{self._member_count}", server_name=self.name
+        )
+
+    def _register(self, member):
+        self.members.append(member)
+        self._outstanding[member] = 0
+        self._last_used[member] = time.monotonic()
+
+    async def connect(self, timeout=None):
+        """Start min_size members concurrently; the pool is usable once the primary is up."""
+        members = [self._new_member() for _ in range(self.min_size)]
+        results = await asyncio.gather(
+            *(member.connect(timeout=timeout) for member in members), return_exceptions=True
+        )
+        for member, result in zip(members, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Failed to start pool member '{member.name}': {str(result)}")
+            else:
+                self._register(member)
+        if not self.members:
+            # Every member failed: surface the first error
+            raise results[0]
+
+        if self.max_size > self.min_size:
+            self._reaper_task = asyncio.create_task(self._reap_idle_members())
+        self.logger.info(f"Started pool for MCP server '{self.name}' with {len(self.members)} members")
+        return self.primary.session
+
+    async def close(self):
+        """Close all members of the pool."""
+        self._closed = True
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        members, self.members = self.members, []
+        self._outstanding.clear()
+        self._last_used.clear()
+        self._sticky.clear()
+        for member in members:
+            await member.close()
+
+    def _is_stateful(self, tool_name):
+        """Whether calls to a tool must stay on one member (config or "statefulHint" annotation)."""
+        if tool_name in self.stateful_tools:
+            return True
+        tool = self.primary.cached_tools.get(tool_name)
+        annotations = getattr(tool, 'annotations', None)
+        return bool(annotations and getattr(annotations, 'statefulHint', False))
+
+    def _least_outstanding(self):
+        # Prefer members whose circuit breaker is closed
+        healthy = [member for member in self.members if member.breaker.state == member.breaker.CLOSED]
+        return min(healthy or self.members, key=lambda member: self._outstanding[member])
+
+    def _select_member(self, tool_name):
+        """Pick the member for a tool call."""
+        if not self._is_stateful(tool_name):
+            return self._least_outstanding()
+
+        key = sticky_routing_key.get()
+        if key is None:
+            return self.primary
+        member = self._sticky.get(key)
+        if member not in self._outstanding:
+            member = self._least_outstanding()
+            self._sticky[key] = member
+            if len(self._sticky) > MAX_STICKY_KEYS:
+                self._sticky.popitem(last=False)
+        self._sticky.move_to_end(key)
+        return member
+
+    def _maybe_scale_up(self):
+        """Add a member in the background when every member is busy enough."""
+        if self._scaling or len(self.members) >= self.max_size:
+            return
+        if min(self._outstanding.values()) < self.scale_up_queue_depth:
+            return
+        self._scaling = True
+        self._scale_task = asyncio.create_task(self._add_member())
+
+    async def _add_member(self):
+        member = self._new_member()
+        try:
+            await member.connect(timeout=self.config.get('connect_timeout'))
+            if self._closed:
+                await member.close()
+                return
+            self._register(member)
+            self.logger.info(f"Scaled up pool '{self.name}' to {len(self.members)} members")
+        except Exception as e:
+            self.logger.error(f"Failed to scale up pool '{self.name}': {str(e)}")
+        finally:
+            self._scaling = False
+
+    async def _reap_idle_members(self):
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1))
+            await self.reap_idle_members()
+
+    async def reap_idle_members(self):
+        """Close members above min_size that have been idle for idle_timeout seconds."""
+        now = time.monotonic()
+        for member in list(self.members[self.min_size:]):
+            if self._outstanding[member] == 0 and now - self._last_used[member] > self.idle_timeout:
+                self.members.remove(member)
+                del self._outstanding[member]
+                del self._last_used[member]
+                for key in [key for key, sticky in self._sticky.items() if sticky is member]:
+                    del self._sticky[key]
+                self.logger.info(f"Scaled down pool '{self.name}' to {len(self.members)} members")
+                await member.close()
+
+    async def call_tool(self, tool_name, inputs=None):
+        """
+        Call a tool on the least loaded member (or the sticky member for stateful tools)
+
+        Args:
+            tool_name: Name of the tool to call
+            inputs: Dictionary of inputs for the tool (or None for tools without inputs)
+
+        Returns:
+            Result from the tool
+        """
+        member = self._select_member(tool_name)
+        self._outstanding[member] += 1
+        self._maybe_scale_up()
+        try:
+            return await member.call_tool(tool_name, inputs)
+        finally:
+            if member in self._outstanding:
+                self._outstanding[member] -= 1
+                self._last_used[member] = time.monotonic()
+
+    @property
+    def result_cache(self):
+        return self.primary.result_cache
+
+    def stats(self):
+        """Call metrics per member, with the calls routed to it but not yet finished."""
+        return {
+            member.name: {**member.stats(), 'outstanding': self._outstanding[member]}
+            for member in self.members
+        }
+
+    def add_tools_changed_listener(self, listener):
+        """Register a listener called with the pool when the tool catalog changes."""
+        async def _relay(_member):
+            await listener(self)
+        self.primary.add_tools_changed_listener(_relay)
+
+    async def refresh_tools(self):
+        return await self.primary.refresh_tools()
+
+    async def list_tools(self, refresh=False):
+        return await self.primary.list_tools(refresh=refresh)
+
+    async def list_resources(self):
+        return await self.primary.list_resources()
+
+    async def read_resource(self, uri):
+        return await self.primary.read_resource(uri)
+
+    async def list_prompts(self):
+        return await self.primary.list_prompts()
+
+    async def get_prompt(self, name, arguments=None):
+        return await self.primary.get_prompt(name, arguments)
+
+    async def convert_mcp_tools_to_langchain(self) -> list[BaseTool]:
+        """Convert the pool's tools to LangChain tools that dispatch through the pool."""
+        return await convert_mcp_tools_to_langchain(self, self.name)
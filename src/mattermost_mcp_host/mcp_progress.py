@@ -0,0 +1,109 @@
+import time
+import asyncio
+import logging
+import contextvars
+
+import mattermost_mcp_host.config as config
+
+logger = logging.getLogger(__name__)
+
+# Where progress notifications of the current request's tool calls go (a MattermostStatusPost)
+progress_reporter = contextvars.ContextVar('mcp_progress_reporter', default=None)
+
+
+def format_progress(label, progress, total, message):
+    if total:
+        status = f"{label}: {min(progress / total, 1.0):.0%}"
+    else:
+        status = f"{label}: {progress:g}"
+    return f"⏳ {status} - {message}" if message else f"⏳ {status}"
+
+
+class MattermostStatusPost:
+    def __init__(self, mattermost_client, channel_id, root_id=None, interval=None):
+        """
+        One status post in a thread showing the progress of running tool calls.
+
+        The post is created on the first progress notification and edited
+        afterwards. Notifications only update the local state; the post is
+        written at most once per interval seconds, with the latest state.
+
+        Args:
+            mattermost_client: MattermostClient used to write the post.
+            channel_id (str): Channel of the thread.
+            root_id (str): Root post of the thread.
+            interval (float): Minimum seconds between two REST calls
+                              (defaults to MCP_PROGRESS_UPDATE_INTERVAL).
+        """
+        self.mattermost_client = mattermost_client
+        self.channel_id = channel_id
+        self.root_id = root_id
+        self.interval = config.MCP_PROGRESS_UPDATE_INTERVAL if interval is None else interval
+        self._lines = {}  # call key -> status line
+        self._post_id = None
+        self._sent_text = None
+        self._last_sent = 0.0
+        self._flush_task = None
+        self._sending = False
+        self._closed = False
+
+    def callback(self, key, label):
+        """Progress callback for one tool call (see ClientSession.call_tool)."""
+        async def _on_progress(progress, total, message):
+            self.update(key, format_progress(label, progress, total, message))
+        return _on_progress
+
+    def update(self, key, text):
+        if self._closed:
+            return
+        self._lines[key] = text
+        self._schedule()
+
+    def finish(self, key):
+        """Remove a finished call from the status."""
+        if self._lines.pop(key, None) is not None:
+            self._schedule()
+
+    def _schedule(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        """Write the latest state, waiting out the rate limit first."""
+        while not self._closed:
+            delay = self._last_sent + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            text = "\n".join(self._lines.values())
+            # Nothing running: keep the last status until the next call or close()
+            if not text or text == self._sent_text:
+                return
+            self._last_sent = time.monotonic()
+            self._sending = True
+            try:
+                if self._post_id is None:
+                    post = await asyncio.to_thread(self.mattermost_client.post_message, self.channel_id, text, self.root_id)
+                    self._post_id = post['id']
+                else:
+                    await asyncio.to_thread(self.mattermost_client.update_message, self._post_id, text)
+                self._sent_text = text
+            except Exception as e:
+                logger.warning(f"Failed to update status post: {str(e)}")
+                return
+            finally:
+                self._sending = False
+
+    async def close(self):
+        """Stop updating and remove the status post once the reply is ready."""
+        self._closed = True
+        if self._flush_task is not None:
+            # Let a write in progress finish so that a just created post is known and deleted
+            if not self._sending:
+                self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        post_id, self._post_id = self._post_id, None
+        if post_id is not None:
+            try:
+                await asyncio.to_thread(self.mattermost_client.delete_message, post_id)
+            except Exception as e:
+                logger.warning(f"Failed to delete status post: {str(e)}")
@@ -0,0 +1,101 @@
+import json
+import time
+from collections import OrderedDict, defaultdict
+
+import mattermost_mcp_host.config as config
+
+
+def canonical_arguments(arguments):
+    """Serialize tool arguments so that equal arguments give the same string."""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+class ToolResultCache:
+    def __init__(self, max_bytes=None):
+        """
+        LRU cache of tool call results, bounded by the size of the cached results.
+
+        Entries are keyed by (server, tool, canonical arguments) and expire
+        after the TTL given when they were stored.
+
+        Args:
+            max_bytes (int): Maximum total size of the cached results (JSON bytes).
+                             0 disables the cache.
+        """
+        self.max_bytes = config.MCP_RESULT_CACHE_MAX_BYTES if max_bytes is None else int(max_bytes)
+        self._entries = OrderedDict()  # key -> (result, size, expires_at)
+        self._bytes = 0
+        self.hits = defaultdict(int)    # (server, tool) -> count
+        self.misses = defaultdict(int)  # (server, tool) -> count
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(server_name, tool_name, arguments):
+        return (server_name, tool_name, canonical_arguments(arguments))
+
+    def get(self, key):
+        """Return the cached result for key, or None (counted as a miss)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses[key[:2]] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits[key[:2]] += 1
+        return entry[0]
+
+    def put(self, key, result, ttl):
+        """Cache a result for ttl seconds, evicting least recently used entries to stay within max_bytes."""
+        if ttl <= 0 or self.max_bytes <= 0:
+            return
+        size = len(result.model_dump_json().encode()) if hasattr(result, 'model_dump_json') else len(str(result).encode())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (result, size, time.monotonic() + ttl)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self, server_name, tool_name=None):
+        """Drop all entries of a server (or of one of its tools)."""
+        for key in [key for key in self._entries if key[0] == server_name and tool_name in (None, key[1])]:
+            self._remove(key)
+
+    def stats(self, server_name=None):
+        """Hit/miss counters and hit rate, for all servers or for one server."""
+        def _selected(counter):
+            return {key: count for key, count in counter.items() if server_name in (None, key[0])}
+
+        hits, misses = _selected(self.hits), _selected(self.misses)
+        total_hits, total_misses = sum(hits.values()), sum(misses.values())
+        lookups = total_hits + total_misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': total_hits,
+            'misses': total_misses,
+            'hit_rate': total_hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'tools': {
+                f"{server}.{tool}": {'hits': hits.get((server, tool), 0), 'misses': misses.get((server, tool), 0)}
+                for server, tool in sorted(set(hits) | set(misses))
+            },
+        }
+
+
+# Cache shared by all MCP clients of the bot
+result_cache = ToolResultCache()
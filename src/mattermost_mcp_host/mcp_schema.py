@@ -0,0 +1,164 @@
+import json
+import math
+import hashlib
+import logging
+
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import SchemaError
+from jsonschema.validators import validator_for
+
+logger = logging.getLogger(__name__)
+
+# Compiled validators by schema hash, shared by all servers (and pool members)
+_validators = {}
+
+# Validation errors reported to the model per call
+MAX_REPORTED_ERRORS = 5
+
+# Returned by _coerce_scalar when a value cannot be converted
+_NOT_COERCED = object()
+
+
+def schema_hash(schema):
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ArgumentValidator:
+    def __init__(self, schema):
+        """
+        Compiled validator for a tool's inputSchema.
+
+        Args:
+            schema (dict): JSON Schema of the tool arguments.
+        """
+        self.schema = schema
+        cls = validator_for(schema, default=Draft202012Validator)
+        cls.check_schema(schema)
+        # No format checking: 2020-12 treats "format" as an annotation, and so do the servers
+        self._validator = cls(schema)
+
+    def validate(self, arguments):
+        """
+        Coerce arguments towards the schema and validate them.
+
+        Returns:
+            (coerced arguments, error message or None)
+        """
+        arguments = _coerce(self.schema, arguments)
+        errors = sorted(self._validator.iter_errors(arguments), key=lambda error: list(error.absolute_path))
+        if not errors:
+            return arguments, None
+        lines = []
+        for error in errors[:MAX_REPORTED_ERRORS]:
+            path = ".".join(str(part) for part in error.absolute_path)
+            lines.append(f"- {path}: {error.message}" if path else f"- {error.message}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            lines.append(f"- ... and {len(errors) - MAX_REPORTED_ERRORS} more errors")
+        return arguments, "\n".join(lines)
+
+
+def get_validator(schema):
+    """
+    The compiled validator for a schema, or None if the schema itself is invalid
+    (the server then validates the arguments, as before).
+    """
+    if not isinstance(schema, dict) or not schema:
+        return None
+    key = schema_hash(schema)
+    if key not in _validators:
+        try:
+            _validators[key] = ArgumentValidator(schema)
+        except SchemaError as e:
+            logger.warning(f"Not validating arguments against an invalid tool schema: {e.message}")
+            _validators[key] = None
+    return _validators[key]
+
+
+def _types(schema):
+    types = schema.get('type')
+    if types is None:
+        return []
+    return types if isinstance(types, list) else [types]
+
+
+def _matches(value, type_name):
+    if type_name == 'integer':
+        return isinstance(value, int) and not isinstance(value, bool)
+    if type_name == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, {
+        'string': str, 'boolean': bool, 'object': dict, 'array': list, 'null': type(None),
+    }.get(type_name, object))
+
+
+def _reject_constant(name):
+    # NaN and Infinity are not JSON, whatever json.loads accepts
+    raise ValueError(f"{name} is not a valid JSON value")
+
+
+def _coerce_scalar(value, type_name):
+    """Convert a value to a JSON type the way LLMs commonly get it wrong; _NOT_COERCED if not possible."""
+    if isinstance(value, str):
+        text = value.strip()
+        if type_name == 'integer':
+            try:
+                return int(text)
+            except ValueError:
+                number = float(text)
+                return int(number) if number.is_integer() else _NOT_COERCED
+        if type_name == 'number':
+            number = float(text)
+            if not math.isfinite(number):
+                return _NOT_COERCED
+            return int(number) if number.is_integer() and '.' not in text else number
+        if type_name == 'boolean' and text.lower() in ('true', 'false'):
+            return text.lower() == 'true'
+        if type_name == 'object':
+            parsed = json.loads(text, parse_constant=_reject_constant)
+            return parsed if _matches(parsed, type_name) else _NOT_COERCED
+        if type_name == 'array':
+            # A JSON encoded list, or a single item the model did not wrap in a list
+            try:
+                parsed = json.loads(text, parse_constant=_reject_constant)
+            except ValueError:
+                parsed = None
+            return parsed if isinstance(parsed, list) else [value]
+        if type_name == 'null' and text.lower() in ('null', 'none', ''):
+            return None
+    elif type_name == 'string' and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    elif type_name == 'array' and not isinstance(value, (list, dict)):
+        return [value]
+    elif type_name == 'integer' and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return _NOT_COERCED
+
+
+def _coerce(schema, value):
+    """Recursively coerce a value to the types of a schema; values that cannot be coerced are kept."""
+    if not isinstance(schema, dict):
+        return value
+    types = _types(schema)
+    if types and not any(_matches(value, type_name) for type_name in types):
+        for type_name in types:
+            try:
+                coerced = _coerce_scalar(value, type_name)
+            except ValueError:
+                continue
+            if coerced is not _NOT_COERCED:
+                value = coerced
+                break
+
+    if isinstance(value, dict):
+        properties = schema.get('properties', {})
+        required = set(schema.get('required', []))
+        coerced = {}
+        for name, item in value.items():
+            # LLMs often send null for optional arguments they do not want to set
+            if item is None and name not in required and 'null' not in _types(properties.get(name, {})):
+                continue
+            coerced[name] = _coerce(properties.get(name, schema.get('additionalProperties')), item)
+        return coerced
+    if isinstance(value, list) and isinstance(schema.get('items'), dict):
+        return [_coerce(schema['items'], item) for item in value]
+    return value
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+
+from mcp.types import InitializeResult, Prompt, Resource, Tool
+
+import asyncio
+
+import mattermost_mcp_host.config as config
+from mattermost_mcp_host.mcp_lazy import LazyMCPClient, _dump_all
+from mattermost_mcp_host.mcp_supervisor import CircuitBreaker, MCPServerUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_key(server_config):
+    """
+    Hash of the settings that identify a server's catalog: command, args
+    (or URL), env and the optional "version" of the server config, which can
+    be bumped to discard snapshots when a server is upgraded in place.
+    """
+    identity = {
+        'type': server_config.get('type', 'stdio').lower(),
+        'command': server_config.get('command'),
+        'args': server_config.get('args', []),
+        'url': server_config.get('url'),
+        'env': server_config.get('env'),
+        'version': server_config.get('version'),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:32]
+
+
+class SnapshotStore:
+    def __init__(self, directory=None):
+        """
+        Tool, resource and prompt catalogs of MCP servers persisted to disk,
+        one JSON file per server.
+
+        Args:
+            directory (str): Directory for the snapshot files (defaults to MCP_SNAPSHOT_DIR).
+        """
+        self.directory = Path(directory or config.MCP_SNAPSHOT_DIR).expanduser()
+
+    def _path(self, server_name, server_config):
+        safe_name = "".join(c if c.isalnum() or c in '-_' else '_' for c in server_name)
+        return self.directory / f"{safe_name}-{snapshot_key(server_config)}.json"
+
+    def load(self, server_name, server_config):
+        """
+        Load a server's snapshot.
+
+        Returns:
+            Dict with 'tools' (name -> Tool), 'resources', 'prompts' and
+            'server_info', or None if there is no usable snapshot
+        """
+        path = self._path(server_name, server_config)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return {
+                'tools': {tool['name']: Tool.model_validate(tool) for tool in data['tools']},
+                'resources': [Resource.model_validate(resource) for resource in data.get('resources', [])],
+                'prompts': [Prompt.model_validate(prompt) for prompt in data.get('prompts', [])],
+                'server_info': InitializeResult.model_validate(data['server_info']) if data.get('server_info') else None,
+            }
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {str(e)}")
+            return None
+
+    def save(self, server_name, server_config, tools, server_info=None, resources=(), prompts=()):
+        """Write a server's snapshot (atomically, so a crash never leaves a partial file)."""
+        path = self._path(server_name, server_config)
+        data = {
+            'server': server_name,
+            'saved_at': time.time(),
+            'server_info': server_info.model_dump(mode='json') if server_info else None,
+            'tools': [tool.model_dump(mode='json', exclude_none=True) for tool in tools.values()],
+            'resources': [resource.model_dump(mode='json', exclude_none=True) for resource in resources],
+            'prompts': [prompt.model_dump(mode='json', exclude_none=True) for prompt in prompts],
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write snapshot {path}: {str(e)}")
+
+
+class SnapshotMCPClient(LazyMCPClient):
+    def __init__(self, server_config, factory, log_level="INFO", name=None):
+        """
+        MCP server whose catalog is served from a persisted snapshot.
+
+        Extends LazyMCPClient to servers that are not lazy, and to resources
+        and prompts. connect() returns as soon as the snapshot is loaded, so
+        the agent can be built without waiting for the server, which is then
+        started in the background (lazy servers keep starting on the first
+        request and stopping when idle). Once the server runs, its catalog is
+        compared with the snapshot; a changed snapshot is rewritten and a
+        changed tool list is reported to the listeners. Until the server runs,
+        its calls fail fast if its start failed; the supervisor restarts it.
+
+        Args:
+            server_config (dict): Server configuration; "lazy" is true or
+                                  {"idle_timeout": seconds}.
+            factory (callable): Creates the underlying client from (server_config, log_level, name).
+            log_level (str): Logging level.
+            name (str): Name of the server in mcp-servers.json.
+        """
+        super().__init__(server_config, factory, log_level=log_level, name=name)
+        self.lazy = bool(server_config.get('lazy'))
+        self._resources = []
+        self._prompts = []
+        self._start_task = None
+
+    @property
+    def members(self):
+        """Running connections, or this client while its server fails to start (restarted by the supervisor)."""
+        if self.client is None and not self.lazy and self.breaker.state != CircuitBreaker.CLOSED:
+            return [self]
+        return super().members
+
+    @property
+    def is_alive(self):
+        return self.client is not None
+
+    async def connect(self, timeout=None):
+        """
+        Load the snapshot; wait for the server only if there is none.
+
+        The server started in the background is awaited by wait_started().
+        """
+        if self.lazy:
+            return await super().connect(timeout)
+        if timeout is not None:
+            self.connect_timeout = timeout
+        snapshot = self.snapshots.load(self.name, self.config)
+        if snapshot is None:
+            self.logger.info(f"No snapshot for MCP server '{self.name}', waiting for the server")
+            await super()._ensure_started()
+        else:
+            self._load_snapshot(snapshot)
+            self.logger.info(f"Loaded {len(self._tools)} tools of MCP server '{self.name}' from snapshot")
+            self._start_task = self._spawn(self._start_in_background())
+
+    async def wait_started(self):
+        """
+        Wait until the server started by connect() runs.
+
+        Raises:
+            MCPServerUnavailable: The server failed to start
+        """
+        if self.lazy:
+            return
+        if self._start_task is not None and not self._start_task.done():
+            await asyncio.wait({self._start_task})
+        if self.client is None:
+            raise MCPServerUnavailable(f"MCP server '{self.name}' failed to start, try again later or answer without it")
+
+    async def reconnect(self, timeout=None):
+        """Start the server again after a failed start (called by the supervisor)."""
+        if timeout is not None:
+            self.connect_timeout = timeout
+        async with self._start_lock:
+            if self.client is None:
+                await self._start()
+
+    def _load_snapshot(self, snapshot):
+        super()._load_snapshot(snapshot)
+        self._resources = snapshot['resources']
+        self._prompts = snapshot['prompts']
+
+    def _server_config(self):
+        server_config = super()._server_config()
+        server_config['snapshot'] = False
+        return server_config
+
+    async def _start_in_background(self):
+        try:
+            await super()._ensure_started()
+        except Exception as e:
+            # The open breaker fails calls fast and hands the server to the supervisor
+            self.logger.error(f"Failed to start MCP server '{self.name}': {str(e)}")
+
+    async def _ensure_started(self):
+        """Return the running server; only lazy servers are started by requests."""
+        if self.lazy:
+            return await super()._ensure_started()
+        await self.wait_started()
+        return self.client
+
+    async def _fetch_optional(self, method, capability):
+        """List resources or prompts if the server supports them."""
+        capabilities = getattr(self.client.server_info, 'capabilities', None)
+        if not getattr(capabilities, capability, None):
+            return []
+        try:
+            return await getattr(self.client, method)()
+        except Exception as e:
+            self.logger.warning(f"Could not list {capability} of MCP server '{self.name}': {str(e)}")
+            return []
+
+    async def _update_tools(self, tools):
+        """
+        Compare the running server's catalog (tools, resources and prompts)
+        with the snapshot, rewrite the snapshot if it is outdated and notify
+        listeners if the tools changed.
+
+        Returns:
+            True if the tools changed
+        """
+        resources = await self._fetch_optional('list_resources', 'resources')
+        prompts = await self._fetch_optional('list_prompts', 'prompts')
+        previous_tools = self._tools
+        previous_version = getattr(getattr(self._server_info, 'serverInfo', None), 'version', None)
+        tools_changed = previous_tools is None or (
+            _dump_all(previous_tools.values()) != _dump_all(tools.values())
+        )
+        catalog_changed = (
+            tools_changed
+            # A server upgraded in place replaces its snapshot even if the catalog looks the same
+            or previous_version != self.client.server_info.serverInfo.version
+            or _dump_all(self._resources) != _dump_all(resources)
+            or _dump_all(self._prompts) != _dump_all(prompts)
+        )
+        self._tools, self._resources, self._prompts = tools, resources, prompts
+        self._server_info = self.client.server_info
+        if not catalog_changed:
+            return False
+        self.logger.info(f"Updating snapshot of MCP server '{self.name}'")
+        self.snapshots.save(self.name, self.config, tools, self._server_info, resources, prompts)
+        if previous_tools is None or not tools_changed:
+            return False
+        await self._notify_tools_changed()
+        return True
+
+    async def list_resources(self):
+        """The running server's resources, or the snapshot's while it is stopped."""
+        if self.client is None:
+            return self._resources
+        return await super().list_resources()
+
+    async def list_prompts(self):
+        """The running server's prompts, or the snapshot's while it is stopped."""
+        if self.client is None:
+            return self._prompts
+        return await super().list_prompts()
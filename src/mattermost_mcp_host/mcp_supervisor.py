@@ -0,0 +1,194 @@
+import time
+import random
+import asyncio
+import logging
+
+import anyio
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+import mattermost_mcp_host.config as config
+
+logger = logging.getLogger(__name__)
+
+
+class MCPServerUnavailable(ConnectionError):
+    """Raised instead of calling an MCP server whose circuit breaker is open."""
+
+
+def is_transport_error(error):
+    """
+    Whether an exception means the server or its transport is broken, as
+    opposed to an error returned by a healthy server (e.g. invalid params).
+    """
+    if isinstance(error, McpError):
+        # Request timeouts (reported with the HTTP status code) are per call:
+        # a slow tool says nothing about the server's health
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, (
+        ConnectionError,
+        TimeoutError,
+        OSError,
+        anyio.ClosedResourceError,
+        anyio.BrokenResourceError,
+        anyio.EndOfStream,
+    ))
+
+
+class CircuitBreaker:
+    """
+    Per-server circuit breaker.
+
+    closed: calls go through. After failure_threshold consecutive transport
+    failures the breaker opens and calls fail fast. After reset_timeout seconds
+    one call is let through (half-open); its outcome closes or re-opens the
+    breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = float(reset_timeout)
+        self.on_open = None  # Optional callback, e.g. to wake up the supervisor
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self):
+        """Whether a call may be sent now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == self.OPEN or self._failures >= self.failure_threshold:
+            self.trip()
+
+    def record_neutral(self):
+        """Record an outcome that says nothing about the server (e.g. a timed-out or cancelled call)."""
+        self._probe_in_flight = False
+
+    def trip(self):
+        """Open the breaker immediately."""
+        was_open = self._state == self.OPEN
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        if not was_open and self.on_open:
+            self.on_open()
+
+
+class MCPSupervisor:
+    def __init__(self, clients):
+        """
+        Health-check MCP servers and restart broken ones.
+
+        Every check_interval seconds each client (each member of a pool) is
+        pinged. A client whose connection ended, whose ping fails or times out,
+        or whose circuit breaker opened is reconnected with exponential backoff;
+        reconnecting replays initialize and refreshes the tool catalog.
+
+        Args:
+            clients (dict): Server name -> MCPClient or MCPClientPool. The dict is
+                            read on every check, so servers added later are supervised.
+        """
+        self.clients = clients
+        self.check_interval = config.MCP_HEALTH_CHECK_INTERVAL
+        self.ping_timeout = config.MCP_PING_TIMEOUT
+        self.backoff_base = config.MCP_RESTART_BACKOFF_BASE
+        self.backoff_max = config.MCP_RESTART_BACKOFF_MAX
+        self._restarting = {}
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="mcp-supervisor")
+
+    async def stop(self):
+        tasks = [task for task in [self._task, *self._restarting.values()] if task]
+        self._task = None
+        self._restarting.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _targets(self):
+        """All supervised connections (pools are supervised member by member)."""
+        for client in list(self.clients.values()):
+            # A wrapper's own breaker (e.g. of a SnapshotMCPClient whose server failed to start)
+            breaker = getattr(client, 'breaker', None)
+            if breaker is not None and breaker.on_open is None:
+                breaker.on_open = self._wake.set
+            for target in list(getattr(client, 'members', [client])):
+                if target.breaker.on_open is None:
+                    target.breaker.on_open = self._wake.set
+                yield target
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            targets = [target for target in self._targets() if target not in self._restarting]
+            results = await asyncio.gather(*(self._is_healthy(target) for target in targets))
+            for target, healthy in zip(targets, results):
+                if not healthy:
+                    self._restarting[target] = asyncio.create_task(self._restart(target))
+
+    async def _is_healthy(self, client):
+        """Check the connection task, the breaker and a ping round trip."""
+        if not client.is_alive:
+            logger.warning(f"MCP server '{client.name}' has exited")
+            return False
+        if client.breaker.state != CircuitBreaker.CLOSED:
+            return False
+        try:
+            await asyncio.wait_for(client.ping(), timeout=self.ping_timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Health check of MCP server '{client.name}' failed: {e!r}")
+            return False
+
+    async def _restart(self, client):
+        """Reconnect a client until it succeeds, backing off exponentially."""
+        client.breaker.trip()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    logger.info(f"Restarting MCP server '{client.name}' (attempt {attempt + 1})")
+                    await client.reconnect(timeout=client.config.get('connect_timeout', config.MCP_CONNECT_TIMEOUT))
+                    client.breaker.record_success()
+                    logger.info(f"MCP server '{client.name}' restarted")
+                    return
+                except Exception as e:
+                    delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+                    delay *= random.uniform(0.5, 1.0)  # Jitter so servers do not restart in lockstep
+                    logger.error(f"Restart of MCP server '{client.name}' failed: {str(e)}. Retrying in {delay:.1f}s")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+        finally:
+            self._restarting.pop(client, None)
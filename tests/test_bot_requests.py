@@ -0,0 +1,62 @@
+import asyncio
+import types as pytypes
+
+from mattermost_mcp_host.bot import mattermost_mcp_bot_original as bot_module
+from mattermost_mcp_host.mcp_content import attachment_sink
+from mattermost_mcp_host.mcp_limiter import fair_queue_key
+from mattermost_mcp_host.mcp_pool import sticky_routing_key
+from mattermost_mcp_host.mcp_progress import progress_reporter
+
+
+class FakeMattermost:
+    def __init__(self):
+        self.driver = pytypes.SimpleNamespace(client=pytypes.SimpleNamespace(userid="bot"))
+        self.posts = []
+
+    def post_message(self, channel_id, message, root_id=None, file_ids=None):
+        self.posts.append((root_id, message))
+        return {"id": f"post{len(self.posts)}"}
+
+
+class FakeAgent:
+    """Answers each thread once both threads have started"""
+
+    def __init__(self):
+        self.running = []
+        self.both_running = asyncio.Event()
+
+    async def run(self, query, history, user_id=None, metadata=None):
+        self.running.append((sticky_routing_key.get(), fair_queue_key.get()))
+        if len(self.running) == 2:
+            self.both_running.set()
+        await self.both_running.wait()
+        return {"messages": [query.upper()]}
+
+    def extract_response(self, messages):
+        return messages
+
+
+def test_requests_run_in_their_own_task_and_leave_no_context_behind(monkeypatch):
+    async def get_thread_history(driver, root_id, channel_id):
+        return []
+
+    monkeypatch.setattr(bot_module, "get_thread_history", get_thread_history)
+
+    async def scenario():
+        bot = bot_module.MattermostMCPBotOriginal()
+        bot.mattermost_client = FakeMattermost()
+        bot.agent = FakeAgent()
+        # The receive loop handles the second post while the first request is still running
+        for thread in ("t1", "t2"):
+            await bot.handle_message({"id": thread, "root_id": "", "channel_id": "c1", "user_id": "u1", "message": thread})
+        await asyncio.wait_for(asyncio.gather(*bot._request_tasks), timeout=5)
+
+        # Nothing set for a request leaks into the loop that received it
+        assert [var.get() for var in (progress_reporter, sticky_routing_key, fair_queue_key, attachment_sink)] == [
+            None, None, None, None
+        ]
+        return bot
+
+    bot = asyncio.run(scenario())
+    assert bot.agent.running == [("t1", "t1"), ("t2", "t2")]
+    assert sorted(bot.mattermost_client.posts) == [("t1", "T1"), ("t2", "T2")]
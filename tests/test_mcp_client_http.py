@@ -0,0 +1,267 @@
+import asyncio
+import contextlib
+import socket
+
+import mcp.types as types
+import uvicorn
+from mcp.server.lowlevel import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from mcp.shared.exceptions import McpError
+from pydantic import AnyUrl
+
+from mattermost_mcp_host.mcp_client import MCPClient, ToolIndex
+from mattermost_mcp_host.mcp_supervisor import CircuitBreaker
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _SubscribableServer(Server):
+    """Announces resource subscriptions, which the low-level server never does by itself"""
+
+    def get_capabilities(self, notification_options, experimental_capabilities):
+        capabilities = super().get_capabilities(notification_options, experimental_capabilities)
+        if capabilities.resources:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+
+def _make_server(state):
+    server = _SubscribableServer("test-http")
+    resources = state.setdefault("resources", {})
+    subscribed = state.setdefault("subscribed", set())
+    reads = state.setdefault("reads", [])
+
+    @server.list_resources()
+    async def list_resources():
+        return [types.Resource(uri=uri, name=uri) for uri in resources]
+
+    @server.read_resource()
+    async def read_resource(uri):
+        reads.append(str(uri))
+        return [ReadResourceContents(content=resources[str(uri)], mime_type="text/plain")]
+
+    @server.subscribe_resource()
+    async def subscribe_resource(uri):
+        state["sessions"].append(server.request_context.session)
+        subscribed.add(str(uri))
+
+    @server.unsubscribe_resource()
+    async def unsubscribe_resource(uri):
+        subscribed.discard(str(uri))
+
+    @server.list_tools()
+    async def list_tools():
+        return [
+            types.Tool(name=name, description=name, inputSchema={"type": "object"})
+            for name in state["tools"]
+        ]
+
+    @server.call_tool()
+    async def call_tool(name, arguments):
+        # Remember the session so that the test can send it notifications later
+        state["sessions"].append(server.request_context.session)
+        request_id = server.request_context.request_id
+        state["request_ids"].append(request_id)
+        if name == "slow":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"].append(request_id)
+                raise
+        return [types.TextContent(type="text", text=name)]
+
+    return server
+
+
+@contextlib.asynccontextmanager
+async def _serve(state):
+    manager = StreamableHTTPSessionManager(app=_make_server(state))
+
+    async def app(scope, receive, send):
+        await manager.handle_request(scope, receive, send)
+
+    port = _free_port()
+    uvicorn_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    async with manager.run():
+        task = asyncio.create_task(uvicorn_server.serve())
+        while not uvicorn_server.started:
+            await asyncio.sleep(0.01)
+        try:
+            yield f"http://127.0.0.1:{port}/mcp"
+        finally:
+            uvicorn_server.should_exit = True
+            await task
+
+
+def test_reconnect_resumes_session_and_notification_stream():
+    async def scenario():
+        state = {"tools": ["echo"], "sessions": [], "request_ids": [], "cancelled": []}
+        changed = asyncio.Event()
+
+        async def on_tools_changed(_):
+            changed.set()
+
+        async with _serve(state) as url:
+            client = MCPClient({"type": "http", "url": url}, name="test")
+            client.add_tools_changed_listener(on_tools_changed)
+            try:
+                await client.connect(timeout=10)
+                session_id = client._http_session_id
+                await client.call_tool("echo")
+
+                await client.reconnect(timeout=10)
+                assert client._http_session_id == session_id
+                await client.call_tool("echo")
+                # Same server-side session, and request ids did not start over
+                assert state["sessions"][0] is state["sessions"][1]
+                assert state["request_ids"][1] > state["request_ids"][0]
+
+                # Server notifications arrive on the re-opened GET stream
+                state["tools"].append("reverse")
+                for _ in range(50):
+                    await state["sessions"][1].send_tool_list_changed()
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout=0.1)
+                        break
+                    except asyncio.TimeoutError:
+                        pass
+                assert changed.is_set()
+                assert "reverse" in client.cached_tools
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_calls_are_cancelled_without_opening_the_breaker():
+    async def scenario():
+        state = {"tools": ["echo", "slow"], "sessions": [], "request_ids": [], "cancelled": []}
+        async with _serve(state) as url:
+            client = MCPClient(
+                {"type": "http", "url": url, "tool_timeouts": {"slow": 0.2}, "breaker_threshold": 2},
+                name="test",
+            )
+            try:
+                await client.connect(timeout=10)
+                for _ in range(3):
+                    try:
+                        await client.call_tool("slow")
+                    except McpError:
+                        pass
+                for _ in range(50):
+                    if len(state["cancelled"]) == 3:
+                        break
+                    await asyncio.sleep(0.05)
+
+                assert client.breaker.state == CircuitBreaker.CLOSED
+                assert client.stats()["timeouts"] == 3
+                # Each cancellation named the request it belonged to
+                assert sorted(state["cancelled"]) == sorted(state["request_ids"])
+                assert (await client.call_tool("echo")).content[0].text == "echo"
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+async def _eventually(condition):
+    for _ in range(100):
+        if condition():
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+def test_read_resources_are_mirrored_until_evicted_or_updated():
+    async def scenario():
+        state = {"tools": [], "sessions": [], "request_ids": [], "cancelled": []}
+        state["resources"] = {"test://a": "a1", "test://b": "b1", "test://c": "c1"}
+        async with _serve(state) as url:
+            client = MCPClient({"type": "http", "url": url, "resource_mirror_size": 2}, name="test")
+            try:
+                await client.connect(timeout=10)
+
+                async def read(uri):
+                    return (await client.read_resource(uri)).contents[0].text
+
+                assert [await read("test://a"), await read("test://a")] == ["a1", "a1"]
+                assert state["reads"] == ["test://a"]
+                assert state["subscribed"] == {"test://a"}
+
+                # The least recently read resource is evicted and unsubscribed
+                await read("test://b")
+                await read("test://c")
+                assert client.mirrored_resources == ["test://b", "test://c"]
+                assert await _eventually(lambda: state["subscribed"] == {"test://b", "test://c"})
+
+                # An update replaces the mirrored copy without waiting for the next read
+                state["resources"]["test://b"] = "b2"
+                await state["sessions"][-1].send_resource_updated(AnyUrl("test://b"))
+                assert await _eventually(lambda: state["reads"].count("test://b") == 2)
+                assert await _eventually(lambda: "test://b" in client.mirrored_resources)
+                reads = len(state["reads"])
+                assert await read("test://b") == "b2"
+                assert len(state["reads"]) == reads
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_tool_catalog_is_refreshed_without_a_call():
+    async def scenario():
+        state = {"tools": ["echo"], "sessions": [], "request_ids": [], "cancelled": []}
+        changed = asyncio.Event()
+
+        async def on_tools_changed(_):
+            changed.set()
+
+        async with _serve(state) as url:
+            client = MCPClient({"type": "http", "url": url, "tools_ttl": 0.2}, name="test")
+            client.add_tools_changed_listener(on_tools_changed)
+            try:
+                await client.connect(timeout=10)
+                # The server changes its tools without notifying anyone
+                state["tools"].append("reverse")
+                await asyncio.wait_for(changed.wait(), timeout=5)
+                assert "reverse" in client.cached_tools
+            finally:
+                await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_same_named_tools_of_two_servers_do_not_collide():
+    async def scenario():
+        state = {"tools": ["echo"], "sessions": [], "request_ids": [], "cancelled": []}
+        async with _serve(state) as url:
+            clients = [MCPClient({"type": "http", "url": url}, name=name) for name in ("alpha", "beta.v2")]
+            try:
+                tools = []
+                for client in clients:
+                    await client.connect(timeout=10)
+                    tools.extend(await client.convert_mcp_tools_to_langchain())
+                result = await tools[1].ainvoke(
+                    {"name": tools[1].name, "args": {}, "id": "call-1", "type": "tool_call"}
+                )
+            finally:
+                for client in clients:
+                    await client.close()
+        return tools, result
+
+    tools, result = asyncio.run(scenario())
+    assert [tool.name for tool in tools] == ["alpha_echo", "beta_v2_echo"]
+    assert tools[1].metadata == {"mcp_server": "beta.v2", "mcp_tool": "echo"}
+    # The server is still called with its own tool name
+    assert result.content == "echo"
+
+
+def test_long_llm_tool_names_stay_within_the_provider_limit():
+    names = {ToolIndex.llm_name("server", "x" * 100 + suffix) for suffix in ("a", "b")}
+    assert len(names) == 2
+    assert all(len(name) == ToolIndex.LLM_NAME_MAX_LENGTH for name in names)
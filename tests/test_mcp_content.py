@@ -0,0 +1,66 @@
+import asyncio
+import base64
+import binascii
+import os
+
+import pytest
+
+from mattermost_mcp_host.mcp_content import Base64Reader, MattermostAttachments, decoded_size
+
+PAYLOAD = os.urandom(1000)
+
+
+@pytest.mark.parametrize("encode", [base64.b64encode, base64.encodebytes], ids=["plain", "mime"])
+@pytest.mark.parametrize("chunk_chars", [4, 8, 400, 4096])
+def test_reader_decodes_chunk_by_chunk(encode, chunk_chars):
+    data = encode(PAYLOAD).decode()
+    reader = Base64Reader(data, chunk_chars=chunk_chars)
+    assert decoded_size(data) == len(reader) == len(PAYLOAD)
+
+    first = reader.read(10)
+    assert 0 < len(first) <= 10 and len(reader) == len(PAYLOAD) - len(first)
+    assert first + reader.read() == PAYLOAD
+    assert len(reader) == 0 and reader.read(10) == b""
+
+
+@pytest.mark.parametrize("size", [1, 2, 3])
+def test_padding_is_not_counted(size):
+    data = base64.b64encode(PAYLOAD[:size]).decode()
+    assert decoded_size(data) == size
+    assert Base64Reader(data).read() == PAYLOAD[:size]
+
+
+def test_invalid_base64_is_rejected():
+    with pytest.raises(ValueError):
+        Base64Reader("abcde")
+    with pytest.raises(binascii.Error):
+        Base64Reader("ab*d" + base64.b64encode(PAYLOAD).decode()).read()
+
+
+class FakeMattermost:
+    def __init__(self):
+        self.files = {}
+
+    def upload_file(self, channel_id, file_name, reader):
+        file_id = f"file{len(self.files)}"
+        self.files[file_id] = (channel_id, file_name, reader.read())
+        return {"file_infos": [{"id": file_id}]}
+
+
+def test_attachments_are_split_across_posts():
+    mattermost = FakeMattermost()
+    attachments = MattermostAttachments(mattermost, "c1")
+    data = base64.b64encode(PAYLOAD).decode()
+
+    async def upload_all():
+        return [await attachments.upload("render", data, "image/png", "image") for _ in range(7)]
+
+    uploaded = asyncio.run(upload_all())
+    assert uploaded[0] == {"file_id": "file0", "name": "render-1-image.png", "mime_type": "image/png", "size": 1000}
+    assert mattermost.files["file6"] == ("c1", "render-7-image.png", PAYLOAD)
+
+    assert attachments
+    assert attachments.take_file_ids() == [f"file{n}" for n in range(5)]
+    assert attachments.take_file_ids() == ["file5", "file6"]
+    assert not attachments
+    assert attachments.take_file_ids() == []
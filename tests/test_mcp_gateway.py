@@ -0,0 +1,97 @@
+import asyncio
+import contextlib
+import socket
+
+import mcp.types as types
+import pytest
+import uvicorn
+from mcp.shared.exceptions import McpError
+
+import mattermost_mcp_host.config as config
+from mattermost_mcp_host.mcp_client import MCPClient
+from mattermost_mcp_host.mcp_gateway import MCPGateway, gateway_client_config
+from mattermost_mcp_host.mcp_limiter import fair_queue_key
+from mattermost_mcp_host.mcp_pool import sticky_routing_key
+from mattermost_mcp_host.mcp_supervisor import MCPServerUnavailable
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeUpstream:
+    """Upstream client of the gateway, recording the routing keys of each call"""
+
+    name = "upstream"
+    members = []
+
+    def __init__(self):
+        self.calls = []
+
+    async def list_tools(self):
+        return {name: types.Tool(name=name, inputSchema={"type": "object"}) for name in ("echo", "broken", "down")}
+
+    async def call_tool(self, tool_name, inputs=None):
+        self.calls.append((tool_name, sticky_routing_key.get(), fair_queue_key.get()))
+        if tool_name == "broken":
+            raise ValueError("bad input")
+        if tool_name == "down":
+            raise MCPServerUnavailable("MCP server 'upstream' is unavailable")
+        return types.CallToolResult(content=[types.TextContent(type="text", text=tool_name)])
+
+    def stats(self):
+        return {}
+
+    async def close(self):
+        pass
+
+
+@contextlib.asynccontextmanager
+async def _serve(gateway):
+    port = _free_port()
+    uvicorn_server = uvicorn.Server(uvicorn.Config(gateway.app(), host="127.0.0.1", port=port, log_level="error"))
+    task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        uvicorn_server.should_exit = True
+        await task
+
+
+def test_calls_are_forwarded_with_the_bot_routing_keys(monkeypatch):
+    monkeypatch.setattr(config, "MCP_GATEWAY_SOCKET", "")
+    monkeypatch.setattr(config, "MCP_GATEWAY_CLIENT_ID", "bot-1")
+    upstream = FakeUpstream()
+    gateway = MCPGateway({}, quotas={"bot-1": {"calls_per_minute": 3}})
+    gateway.clients["upstream"] = upstream
+
+    async def scenario():
+        async with _serve(gateway) as url:
+            monkeypatch.setattr(config, "MCP_GATEWAY_URL", url)
+            client = MCPClient(gateway_client_config("upstream", {"command": "upstream"}), name="upstream")
+            try:
+                await client.connect(timeout=10)
+                assert sorted(client.cached_tools) == ["broken", "down", "echo"]
+                # The routing keys of the bot do not reach the gateway, only its client id
+                sticky_routing_key.set("thread-1")
+                assert (await client.call_tool("echo")).content[0].text == "echo"
+
+                # Tool errors are results for the model, an unavailable upstream is an error
+                broken = await client.call_tool("broken")
+                assert broken.isError and broken.content[0].text == "bad input"
+                with pytest.raises(McpError, match="unavailable"):
+                    await client.call_tool("down")
+
+                rejected = await client.call_tool("echo")
+                assert rejected.isError and "quota" in rejected.content[0].text
+                return gateway.stats()["clients"]
+            finally:
+                await client.close()
+
+    stats = asyncio.run(scenario())
+    assert upstream.calls == [("echo", "bot-1", "bot-1"), ("broken", "bot-1", "bot-1"), ("down", "bot-1", "bot-1")]
+    assert stats == {"bot-1": {"calls": 3, "rejected": 1, "in_flight": 0, "queued": 0}}
@@ -0,0 +1,85 @@
+import asyncio
+
+import mcp.types as types
+
+import mattermost_mcp_host.config as config
+from mattermost_mcp_host.mcp_lazy import LazyMCPClient
+from mattermost_mcp_host.mcp_snapshot import SnapshotStore
+
+TOOLS = {"echo": types.Tool(name="echo", inputSchema={"type": "object"})}
+
+
+class FakeClient:
+    """Server started by the lazy client; close() waits until the test lets it finish"""
+
+    def __init__(self):
+        self.server_info = None
+        self.is_alive = True
+        self.calls = []
+        self.closing = asyncio.Event()
+        self.may_close = asyncio.Event()
+        self.closed = False
+
+    async def connect(self, timeout=None):
+        pass
+
+    async def close(self):
+        self.closing.set()
+        await self.may_close.wait()
+        self.closed = True
+
+    def add_tools_changed_listener(self, listener):
+        pass
+
+    async def list_tools(self, refresh=False):
+        return TOOLS
+
+    async def call_tool(self, tool_name, inputs=None):
+        self.calls.append(tool_name)
+        return tool_name
+
+
+def test_idle_server_is_stopped_and_a_call_during_shutdown_restarts_it(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "MCP_SNAPSHOT_DIR", str(tmp_path))
+    started = []
+
+    def factory(server_config, log_level, name):
+        assert "lazy" not in server_config
+        started.append(FakeClient())
+        return started[-1]
+
+    async def scenario():
+        client = LazyMCPClient({"command": "fake", "lazy": {"idle_timeout": 0.1}}, factory, name="fake")
+        # No snapshot yet: the server is started once to take one
+        await client.connect()
+        assert len(started) == 1 and client.client is started[0]
+
+        # A recently used server is kept
+        started[0].may_close.set()
+        await client.call_tool("echo")
+        await client.stop_if_idle()
+        assert client.client is started[0]
+
+        await asyncio.sleep(0.15)
+        started[0].may_close.clear()
+        stopping = asyncio.create_task(client.stop_if_idle())
+        await started[0].closing.wait()
+        assert client.client is None
+        call = asyncio.create_task(client.call_tool("echo"))
+        await asyncio.sleep(0.05)
+        # The call waits for the shutdown instead of using the closing server
+        assert not call.done()
+
+        started[0].may_close.set()
+        await stopping
+        assert await call == "echo"
+        started[1].may_close.set()
+        await client.close()
+
+    asyncio.run(scenario())
+    assert len(started) == 2
+    assert started[0].closed and started[0].calls == ["echo"]
+    assert started[1].calls == ["echo"]
+    # The catalog taken at connect() was persisted for the next start
+    snapshot = SnapshotStore(tmp_path).load("fake", {"command": "fake", "lazy": {"idle_timeout": 0.1}})
+    assert list(snapshot["tools"]) == ["echo"]
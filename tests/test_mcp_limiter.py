@@ -0,0 +1,69 @@
+import asyncio
+
+from mattermost_mcp_host.mcp_limiter import FairLimiter
+
+
+def test_calls_beyond_the_limit_wait():
+    async def scenario():
+        limiter = FairLimiter(1)
+        await limiter.acquire("a")
+        waiter = asyncio.create_task(limiter.acquire("a"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert (limiter.active, limiter.waiting) == (1, 1)
+
+        limiter.release()
+        await waiter
+        assert (limiter.active, limiter.waiting) == (1, 0)
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slots_are_handed_out_round_robin_across_keys():
+    async def scenario():
+        limiter = FairLimiter(1)
+        await limiter.acquire()
+        order = []
+
+        async def call(key, n):
+            await limiter.acquire(key)
+            order.append(f"{key}{n}")
+
+        tasks = [asyncio.create_task(call("a", n)) for n in range(3)]
+        tasks.append(asyncio.create_task(call("b", 0)))
+        await asyncio.sleep(0)
+        for _ in range(4):
+            limiter.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["a0", "b0", "a1", "a2"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = FairLimiter(1)
+        await limiter.acquire("a")
+        waiter = asyncio.create_task(limiter.acquire("a"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.waiting == 0
+
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_no_limit():
+    async def scenario():
+        limiter = FairLimiter(0)
+        for _ in range(100):
+            await limiter.acquire()
+        assert limiter.waiting == 0
+
+    asyncio.run(scenario())
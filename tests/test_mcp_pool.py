@@ -0,0 +1,136 @@
+import asyncio
+
+import mcp.types as types
+
+from mattermost_mcp_host.mcp_pool import MCPClientPool, sticky_routing_key
+from mattermost_mcp_host.mcp_supervisor import CircuitBreaker
+
+
+class FakeMember:
+    """Pool member whose calls block until the test releases them"""
+
+    def __init__(self, name, tools):
+        self.name = name
+        self.cached_tools = tools
+        self.breaker = CircuitBreaker()
+        self.calls = []
+        self.release = asyncio.Event()
+        self.closed = False
+        self.session = None
+
+    async def connect(self, timeout=None):
+        return self
+
+    async def close(self):
+        self.closed = True
+
+    async def call_tool(self, tool_name, inputs=None):
+        self.calls.append(tool_name)
+        await self.release.wait()
+        return tool_name
+
+    def stats(self):
+        return {}
+
+
+class FakePool(MCPClientPool):
+    def __init__(self, pool_config, tools=None):
+        super().__init__({"type": "http", "url": "http://test/mcp", "pool": pool_config}, name="test")
+        self.tools = tools or {}
+
+    def _new_member(self):
+        self._member_count += 1
+        return FakeMember(f"test#{self._member_count}", self.tools)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _release(pool):
+    for member in pool.members:
+        member.release.set()
+
+
+def test_calls_go_to_the_member_with_the_fewest_outstanding_requests():
+    async def scenario():
+        pool = FakePool({"min_size": 2, "max_size": 2})
+        await pool.connect()
+        first, second = pool.members
+        calls = [asyncio.create_task(pool.call_tool("echo")) for _ in range(3)]
+        await _settle()
+        assert (len(first.calls), len(second.calls)) == (2, 1)
+
+        second.release.set()
+        await _settle()
+        calls.append(asyncio.create_task(pool.call_tool("echo")))
+        await _settle()
+        assert len(second.calls) == 2
+        # An unhealthy member only gets calls when no other member is left
+        second.breaker.trip()
+        assert pool._select_member("echo") is first
+
+        _release(pool)
+        await asyncio.gather(*calls)
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_stateful_tools_stick_to_one_member_per_routing_key():
+    hinted = types.Tool(
+        name="hinted", inputSchema={"type": "object"}, annotations=types.ToolAnnotations(statefulHint=True)
+    )
+
+    async def scenario():
+        pool = FakePool({"min_size": 2, "max_size": 2, "stateful_tools": ["navigate"]}, tools={"hinted": hinted})
+        await pool.connect()
+        first, second = pool.members
+
+        async def call(key, tool_name):
+            sticky_routing_key.set(key)
+            await pool.call_tool(tool_name)
+
+        calls = []
+        for key, tool_name in [("a", "navigate"), ("b", "hinted"), ("a", "navigate"), ("a", "navigate")]:
+            calls.append(asyncio.create_task(call(key, tool_name)))
+            await _settle()
+        # Thread "a" stays on its member although the other one is less busy
+        assert first.calls == ["navigate"] * 3
+        assert second.calls == ["hinted"]
+
+        _release(pool)
+        await asyncio.gather(*calls)
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_pool_scales_up_when_busy_and_reaps_idle_members():
+    async def scenario():
+        pool = FakePool({"min_size": 1, "max_size": 2, "scale_up_queue_depth": 2, "idle_timeout": 0.1})
+        await pool.connect()
+        calls = [asyncio.create_task(pool.call_tool("echo")) for _ in range(2)]
+        await _settle()
+        await pool._scale_task
+        assert len(pool.members) == 2
+        added = pool.members[1]
+        calls.append(asyncio.create_task(pool.call_tool("echo")))
+        await _settle()
+        assert added.calls == ["echo"]
+
+        # Busy members are kept
+        await asyncio.sleep(0.15)
+        await pool.reap_idle_members()
+        assert len(pool.members) == 2
+
+        _release(pool)
+        await asyncio.gather(*calls)
+        await asyncio.sleep(0.15)
+        await pool.reap_idle_members()
+        assert pool.members != [] and added not in pool.members
+        assert added.closed
+        await pool.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+from mattermost_mcp_host.mcp_progress import MattermostStatusPost, format_progress
+
+
+class FakeMattermost:
+    def __init__(self, post_delay=0):
+        self.calls = []
+        self.post_delay = post_delay
+        self.posting = threading.Event()
+
+    def post_message(self, channel_id, message, root_id=None):
+        self.posting.set()
+        threading.Event().wait(self.post_delay)
+        self.calls.append(("post", message))
+        return {"id": "status"}
+
+    def update_message(self, post_id, message):
+        self.calls.append(("update", message))
+
+    def delete_message(self, post_id):
+        self.calls.append(("delete", post_id))
+
+
+def test_format_progress():
+    assert format_progress("search", 1, 4, "page 1") == "⏳ search: 25% - page 1"
+    assert format_progress("search", 3, None, None) == "⏳ search: 3"
+
+
+def test_updates_are_throttled_to_the_latest_state():
+    async def scenario():
+        mattermost = FakeMattermost()
+        status = MattermostStatusPost(mattermost, "c1", "root", interval=0.2)
+        on_progress = status.callback("call-1", "search")
+        for progress in range(5):
+            await on_progress(progress, 10, None)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.3)
+        status.update("call-2", "⏳ fetch")
+        await status._flush_task
+        status.finish("call-1")
+        await status._flush_task
+        await status.close()
+        return mattermost.calls
+
+    assert asyncio.run(scenario()) == [
+        ("post", "⏳ search: 0%"),
+        # Waited out the interval and skipped the intermediate states
+        ("update", "⏳ search: 40%"),
+        ("update", "⏳ search: 40%\n⏳ fetch"),
+        ("update", "⏳ fetch"),
+        ("delete", "status"),
+    ]
+
+
+def test_close_deletes_a_post_that_is_still_being_created():
+    async def scenario():
+        mattermost = FakeMattermost(post_delay=0.2)
+        status = MattermostStatusPost(mattermost, "c1", "root", interval=0)
+        status.update("call-1", "⏳ search")
+        await asyncio.to_thread(mattermost.posting.wait)
+        await status.close()
+        # Nothing is written after close()
+        status.update("call-1", "⏳ search: 50%")
+        await asyncio.sleep(0.05)
+        return mattermost.calls
+
+    assert asyncio.run(scenario()) == [("post", "⏳ search"), ("delete", "status")]
+
+
+def test_close_without_progress_writes_nothing():
+    async def scenario():
+        mattermost = FakeMattermost()
+        status = MattermostStatusPost(mattermost, "c1", "root")
+        await status.close()
+        return mattermost.calls
+
+    assert asyncio.run(scenario()) == []
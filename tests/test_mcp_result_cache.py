@@ -0,0 +1,87 @@
+from mcp.types import CallToolResult, TextContent
+
+from mattermost_mcp_host import mcp_result_cache
+from mattermost_mcp_host.mcp_result_cache import ToolResultCache
+
+
+def _result(text):
+    return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+def _size(result):
+    return len(result.model_dump_json().encode())
+
+
+def test_make_key_ignores_argument_order():
+    assert ToolResultCache.make_key("s", "t", {"a": 1, "b": 2}) == ToolResultCache.make_key("s", "t", {"b": 2, "a": 1})
+    assert ToolResultCache.make_key("s", "t", None) == ToolResultCache.make_key("s", "t", {})
+
+
+def test_get_counts_hits_and_misses():
+    cache = ToolResultCache(max_bytes=10_000)
+    key = ToolResultCache.make_key("s", "t", {"q": 1})
+    assert cache.get(key) is None
+    cache.put(key, _result("x"), ttl=60)
+    assert cache.get(key).content[0].text == "x"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["tools"] == {"s.t": {"hits": 1, "misses": 1}}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(mcp_result_cache.time, "monotonic", lambda: now[0])
+    cache = ToolResultCache(max_bytes=10_000)
+    key = ToolResultCache.make_key("s", "t", {})
+    cache.put(key, _result("x"), ttl=10)
+    now[0] += 10
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["bytes"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    size = _size(_result("a"))
+    cache = ToolResultCache(max_bytes=2 * size)
+    keys = [ToolResultCache.make_key("s", "t", {"n": n}) for n in range(3)]
+    cache.put(keys[0], _result("a"), ttl=60)
+    cache.put(keys[1], _result("b"), ttl=60)
+    cache.get(keys[0])
+    cache.put(keys[2], _result("c"), ttl=60)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_results_larger_than_the_cache_and_zero_ttl_are_not_stored():
+    cache = ToolResultCache(max_bytes=10)
+    key = ToolResultCache.make_key("s", "t", {})
+    cache.put(key, _result("a long result"), ttl=60)
+    assert cache.get(key) is None
+
+    cache = ToolResultCache(max_bytes=10_000)
+    cache.put(key, _result("a"), ttl=0)
+    assert cache.get(key) is None
+
+
+def test_invalidate_drops_a_server_or_a_tool():
+    cache = ToolResultCache(max_bytes=10_000)
+    keys = [
+        ToolResultCache.make_key("s", "t1", {}),
+        ToolResultCache.make_key("s", "t2", {}),
+        ToolResultCache.make_key("other", "t1", {}),
+    ]
+    for key in keys:
+        cache.put(key, _result("x"), ttl=60)
+
+    cache.invalidate("s", "t1")
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is not None
+
+    cache.invalidate("s")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+from mcp.types import CallToolResult, TextContent, Tool
+
+from mattermost_mcp_host.mcp_client import convert_mcp_tools_to_langchain
+from mattermost_mcp_host.mcp_schema import get_validator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "count": {"type": "integer"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "email": {"type": "string", "format": "email"},
+    },
+    "required": ["count"],
+}
+
+
+def test_arguments_are_coerced_to_the_schema():
+    arguments, error = get_validator(SCHEMA).validate({"count": "3", "tags": '["a"]', "email": None})
+    assert error is None
+    assert arguments == {"count": 3, "tags": ["a"]}
+
+
+def test_single_items_are_wrapped_in_a_list():
+    validator = get_validator(SCHEMA)
+    for tags, expected in [("a", ["a"]), ('{"a": 1}', ['{"a": 1}']), ("[1, 2]", ["1", "2"]), ("[NaN]", ["[NaN]"])]:
+        arguments, error = validator.validate({"count": 1, "tags": tags})
+        assert error is None
+        assert arguments["tags"] == expected
+
+
+def test_non_finite_numbers_are_rejected():
+    validator = get_validator({"type": "object", "properties": {"ratio": {"type": "number"}, "count": {"type": "integer"}}})
+    for text in ("nan", "inf", "-Infinity", "1e999"):
+        arguments, error = validator.validate({"ratio": text, "count": text})
+        assert arguments == {"ratio": text, "count": text}
+        assert error.startswith("- count:") and "\n- ratio:" in error
+    assert validator.validate({"ratio": "1e3", "count": "1e3"}) == ({"ratio": 1000, "count": 1000}, None)
+
+
+def test_errors_name_the_invalid_arguments():
+    _, error = get_validator(SCHEMA).validate({"count": "three"})
+    assert error.startswith("- count:")
+
+
+def test_formats_are_not_checked():
+    _, error = get_validator(SCHEMA).validate({"count": 1, "email": "not an email"})
+    assert error is None
+
+
+def test_invalid_schemas_are_not_validated():
+    assert get_validator({"type": "no-such-type"}) is None
+    assert get_validator({}) is None
+
+
+class _Client:
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, tools):
+        self.tools = tools
+        self.calls = []
+
+    async def list_tools(self):
+        return self.tools
+
+    async def call_tool(self, tool_name, inputs=None):
+        self.calls.append((tool_name, inputs))
+        return CallToolResult(content=[TextContent(type="text", text="ok")])
+
+
+def test_tool_arguments_cannot_override_the_bound_tool():
+    schema = {
+        "type": "object",
+        "properties": {"tool_name": {"type": "string"}, "validator": {"type": "string"}},
+    }
+    client = _Client({
+        "first": Tool(name="first", inputSchema=schema),
+        "second": Tool(name="second", inputSchema=schema),
+    })
+
+    async def scenario():
+        tools = await convert_mcp_tools_to_langchain(client, "test")
+        await tools[0].ainvoke({"tool_name": "second", "validator": "x"})
+
+    asyncio.run(scenario())
+    assert client.calls == [("first", {"tool_name": "second", "validator": "x"})]
@@ -0,0 +1,122 @@
+import asyncio
+
+import mcp.types as types
+import pytest
+
+from mattermost_mcp_host.mcp_snapshot import SnapshotMCPClient, SnapshotStore
+from mattermost_mcp_host.mcp_supervisor import MCPServerUnavailable
+
+CONFIG = {"command": "fake", "args": ["--serve"]}
+
+
+def _tools(*names):
+    return {name: types.Tool(name=name, inputSchema={"type": "object"}) for name in names}
+
+
+def _server_info(version="1"):
+    return types.InitializeResult(
+        protocolVersion="2025-06-18",
+        capabilities=types.ServerCapabilities(prompts=types.PromptsCapability()),
+        serverInfo=types.Implementation(name="fake", version=version),
+    )
+
+
+class FakeClient:
+    def __init__(self, tools, prompts=(), fail=False):
+        self.tools = tools
+        self.prompts = list(prompts)
+        self.fail = fail
+        self.server_info = _server_info()
+        self.started = asyncio.Event()
+
+    async def connect(self, timeout=None):
+        await self.started.wait()
+        if self.fail:
+            raise ConnectionError("server crashed")
+
+    async def close(self):
+        pass
+
+    def add_tools_changed_listener(self, listener):
+        pass
+
+    async def list_tools(self, refresh=False):
+        return self.tools
+
+    async def list_prompts(self):
+        return self.prompts
+
+
+def _snapshot_client(server, tmp_path):
+    client = SnapshotMCPClient(CONFIG, lambda *args: server, name="fake")
+    client.snapshots = SnapshotStore(tmp_path)
+    return client
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = SnapshotStore(tmp_path)
+    prompt = types.Prompt(name="summarize", description="Summarize a thread")
+    store.save("fake/server", CONFIG, _tools("echo", "reverse"), _server_info("2"), prompts=[prompt])
+
+    snapshot = store.load("fake/server", CONFIG)
+    assert list(snapshot["tools"]) == ["echo", "reverse"]
+    assert snapshot["tools"]["echo"] == _tools("echo")["echo"]
+    assert snapshot["prompts"] == [prompt]
+    assert snapshot["server_info"].serverInfo.version == "2"
+    # Another command line (or a bumped "version") is another server
+    assert store.load("fake/server", {**CONFIG, "version": "2"}) is None
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.save("fake", CONFIG, _tools("echo"))
+    next(tmp_path.glob("*.json")).write_text("{")
+    assert store.load("fake", CONFIG) is None
+
+
+def test_stale_snapshot_is_served_until_the_server_runs_and_then_replaced(tmp_path):
+    SnapshotStore(tmp_path).save("fake", CONFIG, _tools("echo"), _server_info())
+    server = FakeClient(_tools("echo", "reverse"), prompts=[types.Prompt(name="summarize")])
+    changed = []
+
+    async def on_tools_changed(client):
+        changed.append(list(client.cached_tools))
+
+    async def scenario():
+        client = _snapshot_client(server, tmp_path)
+        client.add_tools_changed_listener(on_tools_changed)
+        await client.connect()
+        # The agent is built from the snapshot while the server is still starting
+        assert list(await client.list_tools()) == ["echo"]
+        assert await client.list_prompts() == []
+
+        server.started.set()
+        await client.wait_started()
+        assert list(await client.list_tools()) == ["echo", "reverse"]
+        await client.close()
+
+    asyncio.run(scenario())
+    assert changed == [["echo", "reverse"]]
+    snapshot = SnapshotStore(tmp_path).load("fake", CONFIG)
+    assert list(snapshot["tools"]) == ["echo", "reverse"]
+    assert [prompt.name for prompt in snapshot["prompts"]] == ["summarize"]
+
+
+def test_wait_started_reports_a_failed_start(tmp_path):
+    SnapshotStore(tmp_path).save("fake", CONFIG, _tools("echo"), _server_info())
+    server = FakeClient(_tools("echo"), fail=True)
+
+    async def scenario():
+        client = _snapshot_client(server, tmp_path)
+        await client.connect()
+        server.started.set()
+        with pytest.raises(MCPServerUnavailable):
+            await client.wait_started()
+        # Calls fail fast and the supervisor sees the server as down
+        with pytest.raises(MCPServerUnavailable):
+            await client.call_tool("echo")
+        assert client.members == [client]
+        await client.close()
+
+    asyncio.run(scenario())
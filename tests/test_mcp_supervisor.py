@@ -0,0 +1,96 @@
+import httpx
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, INVALID_PARAMS, ErrorData
+
+from mattermost_mcp_host import mcp_supervisor
+from mattermost_mcp_host.mcp_supervisor import CircuitBreaker, is_transport_error
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(monkeypatch, **kwargs):
+    clock = _Clock()
+    monkeypatch.setattr(mcp_supervisor.time, "monotonic", clock)
+    return CircuitBreaker(**kwargs), clock
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    breaker, _ = _breaker(monkeypatch, failure_threshold=3, reset_timeout=30)
+    opened = []
+    breaker.on_open = lambda: opened.append(True)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert opened == [True]
+
+
+def test_breaker_success_resets_failure_count(monkeypatch):
+    breaker, _ = _breaker(monkeypatch, failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_lets_one_probe_through_when_half_open(monkeypatch):
+    breaker, clock = _breaker(monkeypatch, failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_reopens_when_probe_fails(monkeypatch):
+    breaker, clock = _breaker(monkeypatch, failure_threshold=3, reset_timeout=30)
+    breaker.trip()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_neutral_outcome_lets_the_next_probe_through(monkeypatch):
+    breaker, clock = _breaker(monkeypatch, failure_threshold=1, reset_timeout=30)
+    breaker.trip()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_neutral()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_trip_calls_on_open_once(monkeypatch):
+    breaker, _ = _breaker(monkeypatch)
+    opened = []
+    breaker.on_open = lambda: opened.append(True)
+    breaker.trip()
+    breaker.trip()
+    assert opened == [True]
+
+
+def test_is_transport_error():
+    assert is_transport_error(ConnectionError())
+    assert is_transport_error(McpError(ErrorData(code=CONNECTION_CLOSED, message="closed")))
+    assert not is_transport_error(McpError(ErrorData(code=INVALID_PARAMS, message="bad")))
+    # A timed-out call is not a broken server
+    assert not is_transport_error(McpError(ErrorData(code=httpx.codes.REQUEST_TIMEOUT, message="timeout")))
+    assert not is_transport_error(ValueError())